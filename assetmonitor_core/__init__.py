@@ -0,0 +1,14 @@
+# --------------------------------------------------------------------------
+# [공용 패키지] 두 화면(app.py / Assetmonitor.py)과 CLI(ingest_worker.py / backfill.py)가 같이 쓰는 코드
+# --------------------------------------------------------------------------
+#   데이터   : market_data, market_hub, intraday_cache, bar_buffer, bar_store, prefetch,
+#              snapshot_store, quote_stream, providers, fetch_scheduler, market_calendar
+#   계산     : pipeline, ranges, portfolio, progressive, keyed_cache, instrumentation
+#   그림     : charts
+#   화면 조각: dashboard (공용 자원 / 상단 바 / 진단 패널), views (차트 격자 / 트리맵)
+#
+# 서버 시작 시간을 줄이기 위해 여기서는 아무것도 불러오지 않고(하위 모듈을 직접 import),
+# 무거운 모듈은 실제로 쓰는 곳에서 불러옵니다.
+#   - plotly.express : 트리맵을 처음 그릴 때 (charts.create_treemap)
+#   - yfinance       : 처음 upstream 요청 / 실시간 스트림을 열 때 (providers, quote_stream)
+# 불러오기 / 리런 시간은 benchmarks/bench_startup.py 로 잽니다.
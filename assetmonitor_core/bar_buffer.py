@@ -0,0 +1,277 @@
+import math
+import threading
+from collections.abc import Mapping
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .market_calendar import exchange_for
+
+# --------------------------------------------------------------------------
+# [봉 버퍼] 종목별 DataFrame 대신 필드별 NumPy 배열 하나에 모든 종목의 봉을 담기
+# --------------------------------------------------------------------------
+# 당일 분봉 / 스냅샷 일봉을 종목마다 DataFrame 으로 들고 있으면 종목 수만큼
+# DatetimeIndex, 블록 관리자 같은 객체가 쌓이므로, 서버 전체에서 배열 하나씩만 씁니다.
+#
+#   ts (int64, UTC ns) / Open·High·Low·Close (float32) / Volume (uint64)
+#
+# 종목마다 id 와 고정 크기 구간(거래소 정규장 봉 수 + 여유)을 받아 그 안에 차례로 씁니다.
+#   - 같은 세션의 꼬리는 구간 안에서 이어 씀 (이미 보이는 봉은 같은 시각의 봉만 새 값으로)
+#   - 새 세션 / 통째 교체 / 구간이 모자라거나 시각이 어긋나면 새 구간을 받아 씀
+# 옛 구간은 그대로 두므로 읽는 쪽 뷰가 보던 봉이 밀리거나 섞이지 않고,
+# 버린 구간은 배열이 꽉 찼을 때 살아 있는 구간만 새 배열로 옮기면서 정리됩니다.
+# (옮기기 전 배열은 그걸 보던 뷰가 다 사라질 때 해제됨)
+#
+# 읽는 쪽은 frames(종목들) 로 그 순간의 위치를 잡은 BarFrames 를 받고,
+# 종목마다 BarView(배열 구간을 그대로 가리키는 읽기 전용 뷰)로 꺼냅니다.
+# BarView 는 create_chart 가 쓰는 df['Close'], df.index, df.empty 를 지원하고,
+# 차트 칸 지표는 array() 로, 트리맵 등락률은 BarFrames.last_bars 로 전 종목의 마지막 봉을
+# 버퍼 배열에서 한 번에 읽습니다 (인덱스 / 종목별 뷰를 만들지 않음).
+# float32 가격은 유효 숫자 7자리라 화면의 소수 둘째 자리까지는 그대로 나옵니다.
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+PRICE_FIELDS = ['Open', 'High', 'Low', 'Close']
+
+BAR_SECONDS = 300
+# 정규장 봉 수에 더하는 여유 (마감 동시호가 봉 등)
+SLACK_BARS = 2
+INITIAL_ROWS = 4096
+
+
+@lru_cache(maxsize=None)
+def _exchange_bars(exchange, bar_seconds):
+    minutes = 0
+    for open_time, close_time in exchange.sessions:
+        span = (close_time.hour * 60 + close_time.minute) - (open_time.hour * 60 + open_time.minute)
+        minutes += span % (24 * 60)
+    return math.ceil(minutes * 60 / bar_seconds) + SLACK_BARS
+
+
+def session_bars(ticker, bar_seconds=BAR_SECONDS):
+    # 종목 거래소의 하루 정규장에 들어가는 봉 수 (미국 주식 5분봉이면 78 + 여유)
+    return _exchange_bars(exchange_for(ticker), bar_seconds)
+
+
+def _allocate(rows):
+    columns = {'ts': np.zeros(rows, dtype=np.int64)}
+    columns.update({name: np.full(rows, np.nan, dtype=np.float32) for name in PRICE_FIELDS})
+    columns['Volume'] = np.zeros(rows, dtype=np.uint64)
+    return columns
+
+
+def _frame_arrays(df):
+    # DataFrame -> (시간대 이름, UTC ns, {필드: 배열}) (없는 필드는 빈 값 / 거래량 0)
+    index = pd.DatetimeIndex(df.index)
+    tz = str(index.tz) if index.tz is not None else None
+    values = {
+        name: (df[name].to_numpy(dtype=np.float32, na_value=np.nan) if name in df
+               else np.full(len(df), np.nan, dtype=np.float32))
+        for name in PRICE_FIELDS
+    }
+    volume = df['Volume'].to_numpy(dtype=float, na_value=np.nan) if 'Volume' in df else np.zeros(len(df))
+    values['Volume'] = np.nan_to_num(volume).astype(np.uint64)
+    return tz, index.as_unit("ns").asi8, values
+
+
+class BarBuffer:
+    def __init__(self, capacity=session_bars):
+        # capacity: 종목당 구간 크기 (숫자 또는 종목 -> 숫자 함수). 더 긴 봉이 들어오면 그만큼 늘림
+        self.capacity = capacity
+        self._ids = {}
+        # id 로 찾는 종목별 정보
+        self._tz = []
+        self._offset = []
+        self._size = []
+        self._length = []
+        self._columns = _allocate(INITIAL_ROWS)
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, ticker):
+        tid = self._ids.get(ticker)
+        return tid is not None and self._length[tid] > 0
+
+    def __len__(self):
+        return sum(1 for length in self._length if length)
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self._columns.values())
+
+    def _capacity_for(self, ticker):
+        return self.capacity(ticker) if callable(self.capacity) else self.capacity
+
+    def write(self, ticker, df, replace=False):
+        # df 의 첫 봉부터는 새 값으로 바꾸고 그 앞의 봉은 유지 (replace 면 df 로 통째로 교체)
+        if df is None or df.empty:
+            return
+        tz, ts, values = _frame_arrays(df)
+        with self._lock:
+            tid = self._ids.get(ticker)
+            if tid is None:
+                tid = self._ids[ticker] = len(self._tz)
+                self._tz.append(tz)
+                self._offset.append(0)
+                self._size.append(0)
+                self._length.append(0)
+
+            offset, length = self._offset[tid], self._length[tid]
+            stored = self._columns['ts'][offset:offset + length]
+            kept = 0 if replace else int(np.searchsorted(stored, ts[0]))
+            need = kept + len(ts)
+            # 이미 보이는 봉(kept ~ length)은 같은 시각을 같은 자리에 덮어쓸 때만 제자리에서
+            overlap = length - kept
+            in_place = (
+                not replace and length and self._size[tid] >= need and tz == self._tz[tid]
+                and overlap <= len(ts) and np.array_equal(stored[kept:], ts[:overlap])
+            )
+            if not in_place:
+                self._relocate(tid, kept, max(self._capacity_for(ticker), need))
+                offset = self._offset[tid]
+
+            start = offset + kept
+            self._columns['ts'][start:start + len(ts)] = ts
+            for name in FIELDS:
+                self._columns[name][start:start + len(ts)] = values[name]
+            self._tz[tid] = tz
+            self._length[tid] = need
+
+    def _relocate(self, tid, kept, size):
+        # 새 구간을 받아 앞쪽 kept 개 봉을 옮겨 둠 (옛 구간은 건드리지 않음)
+        if self._used + size > len(self._columns['ts']):
+            self._compact(size)
+        old = self._offset[tid]
+        offset = self._used
+        self._used += size
+        for column in self._columns.values():
+            column[offset:offset + kept] = column[old:old + kept]
+        self._offset[tid] = offset
+        self._size[tid] = size
+
+    def _compact(self, extra):
+        # 살아 있는 구간만 새 배열로 (옛 배열은 그걸 보는 뷰가 남아 있는 동안 그대로 유지)
+        live = sum(size for size, length in zip(self._size, self._length) if length) + extra
+        columns = _allocate(max(INITIAL_ROWS, live + live // 2))
+        used = 0
+        for tid, (offset, size, length) in enumerate(zip(self._offset, self._size, self._length)):
+            if not length:
+                self._size[tid] = 0
+                continue
+            for name, column in columns.items():
+                column[used:used + length] = self._columns[name][offset:offset + length]
+            self._offset[tid] = used
+            used += size
+        self._columns = columns
+        self._used = used
+
+    def last_timestamp(self, ticker):
+        # 마지막 봉 시각 (거래소 시간대) 또는 None
+        with self._lock:
+            tid = self._ids.get(ticker)
+            if tid is None or not self._length[tid]:
+                return None
+            value = self._columns['ts'][self._offset[tid] + self._length[tid] - 1]
+            tz = self._tz[tid]
+        ts = pd.Timestamp(int(value), unit="ns")
+        return ts.tz_localize("UTC").tz_convert(tz) if tz else ts
+
+    def get(self, ticker):
+        return self.frames([ticker]).get(ticker)
+
+    def frames(self, tickers):
+        # 지금 위치를 잡은 {종목: BarView} (봉이 있는 종목만)
+        with self._lock:
+            places = {}
+            for ticker in tickers:
+                tid = self._ids.get(ticker)
+                if tid is not None and self._length[tid]:
+                    places[ticker] = (self._offset[tid], self._length[tid], self._tz[tid])
+            return BarFrames(self._columns, places)
+
+    def drop(self, tickers):
+        # 다음 write 때 새 구간부터 (구간은 다음 정리 때 회수)
+        with self._lock:
+            for ticker in tickers:
+                tid = self._ids.get(ticker)
+                if tid is not None:
+                    self._length[tid] = 0
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+            self._tz, self._offset, self._size, self._length = [], [], [], []
+            self._columns = _allocate(INITIAL_ROWS)
+            self._used = 0
+
+
+class BarView:
+    # 종목 하나의 봉 구간. 배열은 버퍼를 그대로 가리키는 읽기 전용 뷰 (복사 없음)
+    columns = FIELDS
+
+    def __init__(self, columns, offset, length, tz):
+        self.tz = tz
+        self._columns = columns
+        self._window = slice(offset, offset + length)
+        self._index = None
+
+    def __len__(self):
+        return self._window.stop - self._window.start
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    def array(self, name):
+        view = self._columns[name][self._window]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def index(self):
+        if self._index is None:
+            index = pd.DatetimeIndex(self.array('ts').view("datetime64[ns]"))
+            self._index = index.tz_localize("UTC").tz_convert(self.tz) if self.tz else index
+        return self._index
+
+    def __contains__(self, name):
+        return name in FIELDS
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key not in FIELDS:
+                raise KeyError(key)
+            return pd.Series(self.array(key), index=self.index, name=key, copy=False)
+        return pd.DataFrame({name: self.array(name) for name in key}, index=self.index, copy=False)
+
+
+class BarFrames(Mapping):
+    # BarBuffer.frames 결과. 만들 때의 위치를 잡아 두므로 이후 버퍼에 꼬리가 붙어도 보이는 봉 수는 그대로
+    # 뷰는 꺼낼 때마다 새로 만듦 (보관하지 않으므로 다 그린 종목의 인덱스 / Series 는 바로 해제됨)
+    def __init__(self, columns, places):
+        self._columns = columns
+        self._places = places
+
+    def __getitem__(self, ticker):
+        return BarView(self._columns, *self._places[ticker])
+
+    def __iter__(self):
+        return iter(self._places)
+
+    def __len__(self):
+        return len(self._places)
+
+    def __contains__(self, ticker):
+        return ticker in self._places
+
+    def last_bars(self, tickers):
+        # 종목들의 (마지막 봉 시각 ns, 시간대 목록, 마지막 종가, 첫 시가) 를 버퍼에서 한 번에 모음
+        places = [self._places[t] for t in tickers]
+        offsets = np.fromiter((p[0] for p in places), dtype=np.int64, count=len(places))
+        last = offsets + np.fromiter((p[1] for p in places), dtype=np.int64, count=len(places)) - 1
+        return (
+            self._columns['ts'][last],
+            [p[2] for p in places],
+            self._columns['Close'][last].astype(float),
+            self._columns['Open'][offsets].astype(float),
+        )
@@ -0,0 +1,215 @@
+import os
+import sqlite3
+import threading
+import time as _time
+from contextlib import closing
+
+import pandas as pd
+
+# --------------------------------------------------------------------------
+# [로컬 저장소] 끝난 거래일의 봉 데이터를 디스크에 보관
+# --------------------------------------------------------------------------
+# 지난 날짜의 봉은 다시 바뀌지 않으므로 한 번 받으면 SQLite 파일에 저장하고,
+# 이후에는 네트워크 없이 디스크에서 바로 읽습니다. (프로세스 재시작에도 유지)
+# 키는 (종목, 날짜, 봉 간격)이며, 데이터가 없던 종목도 빈 세션으로 기록해
+# 휴장일 같은 날을 매번 다시 요청하지 않게 합니다.
+# 끝난 세션의 트리맵 등락률 표도 (날짜, 기간) 단위로 같이 보관합니다 (backfill.py 가 미리 채움).
+
+# 패키지 폴더가 아니라 저장소 최상위의 .cache
+DEFAULT_CACHE_DIR = os.environ.get(
+    "ASSETMONITOR_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache"),
+)
+DEFAULT_PATH = os.path.join(DEFAULT_CACHE_DIR, "bars.sqlite")
+
+# 저장할 전체 봉 개수 상한 (150종목 x 5분봉 78개 ≒ 하루 1.2만 행)
+# 넘치면 가장 오래 안 쓴 날짜부터 통째로 지웁니다.
+MAX_ROWS = 2_000_000
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    ticker TEXT NOT NULL,
+    session_date TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (ticker, session_date, interval, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sessions (
+    ticker TEXT NOT NULL,
+    session_date TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    tz TEXT,
+    rows INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (ticker, session_date, interval)
+);
+CREATE INDEX IF NOT EXISTS sessions_by_date ON sessions (session_date);
+CREATE TABLE IF NOT EXISTS changes (
+    session_date TEXT NOT NULL,
+    range TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    change REAL,
+    reason TEXT,
+    PRIMARY KEY (session_date, range, ticker)
+) WITHOUT ROWID;
+"""
+
+
+class BarStore:
+    def __init__(self, path=DEFAULT_PATH, max_rows=MAX_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def load(self, tickers, session_date, interval):
+        # 저장된 종목은 {종목: DataFrame}, 한 번도 저장 안 된 종목은 missing 으로 돌려줌
+        key_date = session_date.isoformat()
+        tickers = list(tickers)
+        frames, missing = {}, []
+
+        with self._lock, closing(self._connect()) as conn, conn:
+            placeholders = ",".join("?" * len(tickers))
+            stored = {
+                row[0]: (row[1], row[2])
+                for row in conn.execute(
+                    f"SELECT ticker, tz, rows FROM sessions "
+                    f"WHERE session_date = ? AND interval = ? AND ticker IN ({placeholders})",
+                    [key_date, interval, *tickers],
+                )
+            } if tickers else {}
+            if stored:
+                conn.execute(
+                    "UPDATE sessions SET last_access = ? WHERE session_date = ? AND interval = ?",
+                    (_time.time(), key_date, interval),
+                )
+
+            for ticker in tickers:
+                if ticker not in stored:
+                    missing.append(ticker)
+                    continue
+                tz, rows = stored[ticker]
+                if rows == 0:
+                    continue
+                df = pd.read_sql_query(
+                    "SELECT ts, open, high, low, close, volume FROM bars "
+                    "WHERE ticker = ? AND session_date = ? AND interval = ? ORDER BY ts",
+                    conn, params=(ticker, key_date, interval),
+                )
+                index = pd.to_datetime(df['ts'], unit='ns', utc=tz is not None)
+                if tz is not None:
+                    index = index.dt.tz_convert(tz)
+                df.index = pd.DatetimeIndex(index, name='Datetime')
+                df = df.drop(columns='ts')
+                df.columns = FIELDS
+                frames[ticker] = df
+
+        return frames, missing
+
+    def save(self, frames, tickers, session_date, interval):
+        # tickers 중 frames 에 없는 종목은 "데이터 없음(0행)"으로 기록
+        key_date = session_date.isoformat()
+        now = _time.time()
+
+        with self._lock, closing(self._connect()) as conn, conn:
+            for ticker in tickers:
+                df = frames.get(ticker)
+                conn.execute(
+                    "DELETE FROM bars WHERE ticker = ? AND session_date = ? AND interval = ?",
+                    (ticker, key_date, interval),
+                )
+                if df is None or df.empty:
+                    tz, records = None, []
+                else:
+                    index = df.index
+                    tz = str(index.tz) if index.tz is not None else None
+                    if tz is not None:
+                        index = index.tz_convert('UTC').tz_localize(None)
+                    ts = index.as_unit('ns').asi8
+                    values = df.reindex(columns=FIELDS).astype('float64')
+                    records = [
+                        (ticker, key_date, interval, int(t), *(None if pd.isna(v) else float(v) for v in row))
+                        for t, row in zip(ts, values.itertuples(index=False, name=None))
+                    ]
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", records
+                    )
+                conn.execute(
+                    "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?)",
+                    (ticker, key_date, interval, tz, len(records), now),
+                )
+            self._evict(conn)
+
+    def load_changes(self, tickers, session_date, range_key):
+        # 끝난 세션의 트리맵 등락률: (Ticker, Change) 표, 빠진 종목 {종목: 이유}, 저장 안 된 종목 목록
+        key_date = session_date.isoformat()
+        tickers = list(dict.fromkeys(tickers))
+        with self._lock, closing(self._connect()) as conn, conn:
+            placeholders = ",".join("?" * len(tickers))
+            rows = conn.execute(
+                f"SELECT ticker, change, reason FROM changes "
+                f"WHERE session_date = ? AND range = ? AND ticker IN ({placeholders})",
+                [key_date, range_key, *tickers],
+            ).fetchall() if tickers else []
+
+        found = {row[0]: row for row in rows}
+        computed = [(t, found[t][1]) for t in tickers if t in found and found[t][2] is None]
+        changes = pd.DataFrame(computed, columns=['Ticker', 'Change']).astype({'Change': float})
+        dropped = {t: found[t][2] for t in tickers if t in found and found[t][2] is not None}
+        missing = [t for t in tickers if t not in found]
+        return changes, dropped, missing
+
+    def save_changes(self, changes, dropped, session_date, range_key):
+        # changes: (Ticker, Change) 표, dropped: {종목: 이유} (이유가 있는 종목은 등락률 없이 기록)
+        key_date = session_date.isoformat()
+        records = [
+            (key_date, range_key, ticker, float(change), None)
+            for ticker, change in zip(changes['Ticker'], changes['Change'])
+        ]
+        records += [(key_date, range_key, ticker, None, reason) for ticker, reason in dropped.items()]
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO changes VALUES (?, ?, ?, ?, ?)", records)
+
+    def _evict(self, conn):
+        # 전체 행 수가 상한을 넘으면 가장 오래 안 쓴 날짜부터 삭제 (LRU)
+        total = conn.execute("SELECT COALESCE(SUM(rows), 0) FROM sessions").fetchone()[0]
+        if total <= self.max_rows:
+            return
+        dates = conn.execute(
+            "SELECT session_date, SUM(rows), MAX(last_access) FROM sessions "
+            "GROUP BY session_date ORDER BY MAX(last_access), session_date"
+        ).fetchall()
+        for session_date, rows, _ in dates:
+            if total <= self.max_rows:
+                break
+            conn.execute("DELETE FROM bars WHERE session_date = ?", (session_date,))
+            conn.execute("DELETE FROM sessions WHERE session_date = ?", (session_date,))
+            conn.execute("DELETE FROM changes WHERE session_date = ?", (session_date,))
+            total -= rows
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_bar_store():
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = BarStore()
+        return _default_store
+
+
+def set_bar_store(store):
+    # 벤치마크에서 단계마다 빈 저장소로 바꿔 끼움 (이전 단계가 저장한 봉을 읽지 않도록)
+    global _default_store
+    with _default_lock:
+        _default_store = store
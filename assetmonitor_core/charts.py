@@ -0,0 +1,292 @@
+import copy
+import os
+from datetime import timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
+
+from .market_calendar import DEFAULT_EXCHANGE, EXCHANGES, exchange_for
+from .ranges import downsample
+
+# --------------------------------------------------------------------------
+# [차트] 개별 종목 차트 / 섹터 묶음(small multiples) 차트
+# --------------------------------------------------------------------------
+# 두 화면 모두 같은 규칙을 씁니다.
+#   - Y축: 최저~최고 구간을 1.5배로 넓힘 (변동이 없으면 ±1%)
+#   - 색: 시작가 이상이면 빨강, 아니면 파랑
+#   - X축: 세션 달력의 개장~폐장. 세션 전반부만 지났으면 개장~중간(정시로 올림)까지
+#          (미국 주식이면 09:30~13:00 / 09:30~16:00)
+#          여러 날 기간이면 밤/주말 빈 구간이 없도록 X 를 봉 순서로 두고 날짜 눈금을 붙임
+#   - 선: LTTB 로 차트당 POINT_BUDGET 개 점까지만 (거래량은 건너뛴 봉까지 합침)
+#
+# 압축 figure (기본 켜짐, ASSETMONITOR_COMPACT_FIGURES=0 으로 끔)
+#   - 종가/거래량은 float32 typed array (plotly 가 base64 로 보냄)
+#   - X 는 간격이 일정하면 x0/dx 두 값만, 아니면 현지 시각 ms 숫자 배열
+#     (날짜 문자열을 가격/거래량 trace 에 두 번씩 싣지 않음)
+#   - 레이아웃의 template 은 Streamlit 화면 테마가 색을 바꿀 때 쓰므로 그대로 둠
+
+COMPACT_FIGURES = os.environ.get("ASSETMONITOR_COMPACT_FIGURES", "1") != "0"
+
+UP_COLOR = '#ef5350'
+DOWN_COLOR = '#42a5f5'
+CHART_HEIGHT = 240
+
+
+def price_range(closes):
+    min_val = closes.min()
+    max_val = closes.max()
+    diff = max_val - min_val
+
+    if diff == 0:
+        padding = min_val * 0.01
+        return min_val - padding, max_val + padding
+
+    center = (max_val + min_val) / 2
+    expanded_half_range = (diff / 2) * 1.5
+    return center - expanded_half_range, center + expanded_half_range
+
+
+def line_color(closes):
+    return UP_COLOR if closes.iloc[-1] >= closes.iloc[0] else DOWN_COLOR
+
+
+def fill_color(color):
+    return f"rgba{tuple(int(color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4)) + (0.05,)}"
+
+
+def market_x_range(df, ticker=None):
+    if df.empty:
+        return None
+    exchange = exchange_for(ticker) if ticker else EXCHANGES[DEFAULT_EXCHANGE]
+    last_data_time = df.index[-1]
+    bounds = exchange.session_bounds(exchange.session_date(last_data_time))
+    if bounds is None:
+        # 달력상 휴장일인데 봉이 있으면 받은 구간 그대로
+        return [df.index[0], last_data_time]
+
+    tz = last_data_time.tzinfo
+    market_open, market_close = (b.astimezone(tz) if tz else b.replace(tzinfo=None) for b in bounds)
+    market_mid = market_open + (market_close - market_open) / 2
+    if market_mid.minute or market_mid.second:
+        market_mid = market_mid.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+    if last_data_time < market_mid:
+        return [market_open, market_mid]
+    return [market_open, market_close]
+
+
+def chart_series(df, ticker, multi_day=False):
+    # 그릴 (X, 종가, 거래량) 과 X축 범위
+    positions, closes, volume = downsample(df)
+    if multi_day:
+        return positions, closes, volume, [0, len(df) - 1]
+    return df.index[positions], closes, volume, market_x_range(df, ticker)
+
+
+def encode_series(x, closes, volume, compact=None):
+    # trace 에 넣을 X / 종가 / 거래량 필드 {"x" 또는 "x0","dx"}, y, volume
+    if not (COMPACT_FIGURES if compact is None else compact):
+        return {"x": x}, closes, volume
+
+    if isinstance(x, pd.DatetimeIndex):
+        # plotly 는 시간대를 무시하고 벽시계 시각으로 그리므로 현지 시각 그대로 ms 로
+        wall = x.tz_localize(None) if x.tz is not None else x
+        values = wall.as_unit("ms").asi8
+        start = wall[0].isoformat() if len(wall) else None
+    else:
+        values = np.asarray(x, dtype=np.int64)
+        start = int(values[0]) if len(values) else None
+
+    steps = np.diff(values)
+    if len(values) > 1 and (steps == steps[0]).all():
+        x_fields = {"x0": start, "dx": int(steps[0])}
+    elif isinstance(x, pd.DatetimeIndex):
+        # 간격이 고르지 않으면(점심 휴장, 선물 휴식 시간, 빠진 봉, LTTB) epoch ms 숫자 배열.
+        # 숫자만으로는 plotly.js 가 선형 축으로 보므로 X축 type='date' 를 꼭 같이 지정 (x_axis_type)
+        x_fields = {"x": values.astype(np.float64)}
+    else:
+        x_fields = {"x": values}
+    return (
+        x_fields,
+        np.asarray(closes, dtype=np.float32),
+        np.asarray(volume, dtype=np.float32),
+    )
+
+
+def x_axis_type(multi_day):
+    # 하루 차트의 X축은 시각(date), 여러 날 차트는 봉 위치(linear). 숫자로 보낸 시각도 날짜로 읽히도록 명시
+    return 'linear' if multi_day else 'date'
+
+
+def figure_bytes(fig):
+    # 화면으로 보내는 spec 크기 (Streamlit 과 같은 방식으로 직렬화)
+    return len(pio.to_json(fig, validate=False))
+
+
+def day_ticks(df, max_ticks=6):
+    # 여러 날 차트의 날짜 눈금: 날짜가 바뀌는 봉 위치 (많으면 듬성듬성)
+    if df.index.tz is not None:
+        days = df.index.tz_localize(None).values.astype('datetime64[D]')
+    else:
+        days = df.index.values.astype('datetime64[D]')
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    starts = starts[::-(-len(starts) // max_ticks)]
+    return dict(
+        tickmode='array', tickvals=starts.tolist(),
+        ticktext=[df.index[i].strftime('%m/%d') for i in starts],
+    )
+
+
+# --------------------------------------------------------------------------
+# [개별 차트] 종목 하나 = 가격(위) + 거래량(아래) 2행 figure
+# --------------------------------------------------------------------------
+def create_chart(ticker, df, multi_day=False, compact=None):
+    closes = df['Close']
+    y_min, y_max = price_range(closes)
+    color = line_color(closes)
+    x, points, volume, x_range = chart_series(df, ticker, multi_day)
+    x_fields, points, volume = encode_series(x, points, volume, compact)
+
+    fig = make_subplots(
+        rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.08,
+        row_heights=[0.75, 0.25], specs=[[{"secondary_y": False}], [{"secondary_y": False}]]
+    )
+
+    fig.add_trace(go.Scatter(
+        **x_fields, y=points, mode='lines', line=dict(color=color, width=2),
+        fill='tozeroy', fillcolor=fill_color(color)
+    ), row=1, col=1)
+
+    fig.add_trace(go.Bar(
+        **x_fields, y=volume, marker_color='lightgray', opacity=0.3
+    ), row=2, col=1)
+
+    fig.update_layout(
+        margin=dict(l=40, r=10, t=10, b=0), height=CHART_HEIGHT, showlegend=False,
+        plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+    )
+    fig.update_yaxes(
+        range=[y_min, y_max], visible=True, showgrid=True, gridcolor='rgba(200,200,200,0.2)',
+        tickfont=dict(size=10, color='gray'), row=1, col=1
+    )
+    fig.update_yaxes(visible=False, row=2, col=1)
+    fig.update_xaxes(
+        visible=True, row=2, col=1, tickformat="%H:%M",
+        dtick=7200000, showgrid=False, tickfont=dict(size=9, color='gray'),
+        range=x_range, type=x_axis_type(multi_day)
+    )
+    fig.update_xaxes(visible=False, row=1, col=1, range=x_range, type=x_axis_type(multi_day))
+    if multi_day:
+        fig.update_xaxes(row=2, col=1, **day_ticks(df))
+    return fig
+
+
+# --------------------------------------------------------------------------
+# [섹터 차트] 섹터 전체를 figure 하나의 격자로 (종목마다 가격/거래량 2행)
+# --------------------------------------------------------------------------
+# 종목마다 make_subplots 를 새로 만들고 차트 컴포넌트를 따로 보내는 대신,
+# 격자 모양(행 x 열)별로 한 번만 만든 레이아웃 틀을 복사해서 축 범위만 채웁니다.
+
+@lru_cache(maxsize=32)
+def _grid_layout(grid_rows, cols):
+    row_heights = [0.75, 0.25] * grid_rows
+    fig = make_subplots(
+        rows=grid_rows * 2, cols=cols, row_heights=row_heights,
+        vertical_spacing=0.08 / grid_rows, horizontal_spacing=0.04,
+    )
+    fig.update_layout(
+        margin=dict(l=40, r=10, t=10, b=0), height=CHART_HEIGHT * grid_rows, showlegend=False,
+        plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+    )
+    fig.update_yaxes(
+        visible=True, showgrid=True, gridcolor='rgba(200,200,200,0.2)',
+        tickfont=dict(size=10, color='gray'),
+    )
+    fig.update_xaxes(visible=False)
+    for grid_row in range(grid_rows):
+        fig.update_yaxes(visible=False, row=grid_row * 2 + 2)
+        fig.update_xaxes(
+            visible=True, row=grid_row * 2 + 2, tickformat="%H:%M",
+            dtick=7200000, showgrid=False, tickfont=dict(size=9, color='gray'),
+        )
+    return fig.layout.to_plotly_json()
+
+
+def _axis_suffix(subplot_row, col, cols):
+    # make_subplots 는 축 번호를 행 우선으로 매김 (1번은 접미사 없음)
+    number = (subplot_row - 1) * cols + col
+    return "" if number == 1 else str(number)
+
+
+def create_sector_chart(tickers, frames, cols=5, multi_day=False, compact=None):
+    # frames: {종목: 분봉 DataFrame}. 데이터가 없는 종목 칸은 비워 둠
+    grid_rows = max(1, -(-len(tickers) // cols))
+    layout = copy.deepcopy(_grid_layout(grid_rows, cols))
+    traces = []
+
+    for idx in range(grid_rows * cols):
+        grid_row, col = divmod(idx, cols)
+        price_axis = _axis_suffix(grid_row * 2 + 1, col + 1, cols)
+        volume_axis = _axis_suffix(grid_row * 2 + 2, col + 1, cols)
+
+        ticker = tickers[idx] if idx < len(tickers) else None
+        df = frames.get(ticker) if ticker is not None else None
+        if df is None or df.empty:
+            # 빈 칸은 축도 숨김
+            for axis in (f"xaxis{price_axis}", f"yaxis{price_axis}", f"xaxis{volume_axis}", f"yaxis{volume_axis}"):
+                layout[axis]["visible"] = False
+            continue
+
+        closes = df['Close']
+        color = line_color(closes)
+        x, points, volume, x_range = chart_series(df, ticker, multi_day)
+        x_fields, points, volume = encode_series(x, points, volume, compact)
+        traces.append(dict(
+            type='scatter', **x_fields, y=points, mode='lines', name=ticker,
+            line=dict(color=color, width=2), fill='tozeroy', fillcolor=fill_color(color),
+            xaxis=f"x{price_axis}", yaxis=f"y{price_axis}",
+        ))
+        traces.append(dict(
+            type='bar', **x_fields, y=volume, name=ticker,
+            marker_color='lightgray', opacity=0.3,
+            xaxis=f"x{volume_axis}", yaxis=f"y{volume_axis}",
+        ))
+
+        layout[f"yaxis{price_axis}"]["range"] = list(price_range(closes))
+        for axis in (f"xaxis{price_axis}", f"xaxis{volume_axis}"):
+            layout[axis].update(range=x_range, type=x_axis_type(multi_day))
+        if multi_day:
+            layout[f"xaxis{volume_axis}"].update(day_ticks(df))
+
+    return go.Figure(data=traces, layout=layout)
+
+
+# --------------------------------------------------------------------------
+# [트리맵] 카테고리 > 섹터 > 종목, 색 = 등락률(하루 ±3%, 기간이 길면 더 넓게)
+# --------------------------------------------------------------------------
+def create_treemap(df_tree, color_limit=3.0):
+    # plotly.express 는 트리맵에만 쓰이고 불러오는 데만 0.2초 가까이 걸리므로 처음 그릴 때 불러옴
+    import plotly.express as px
+
+    fig = px.treemap(
+        df_tree,
+        path=[px.Constant("운동회장"), 'Category', 'Sector', 'Ticker'],
+        values='Size',
+        color='Change',
+        color_continuous_scale=[DOWN_COLOR, '#eeeeee', UP_COLOR],
+        color_continuous_midpoint=0,
+        range_color=[-color_limit, color_limit],
+        custom_data=['Change']
+    )
+    fig.update_traces(
+        textinfo="label+text",
+        texttemplate="%{label}<br>%{customdata[0]:.2f}%",
+        textfont=dict(size=14),
+        hovertemplate='<b>%{label}</b><br>등락률: %{customdata[0]:.2f}%'
+    )
+    fig.update_layout(margin=dict(t=10, l=10, r=10, b=10), height=700)
+    return fig
@@ -0,0 +1,231 @@
+import os
+from datetime import date, datetime
+
+import streamlit as st
+from streamlit_autorefresh import st_autorefresh
+
+from .fetch_scheduler import CircuitBreaker, get_fetch_scheduler
+from .instrumentation import finish_trace, get_registry, phase, start_metrics_server, start_trace
+from .market_hub import MarketDataHub
+from .portfolio import PORTFOLIO_DIR, get_portfolio_file
+from .prefetch import PREFETCH_INTERVAL, PrefetchScheduler
+from .quote_stream import LIVE_PREFETCH_INTERVAL, LIVE_REFRESH_SECONDS, get_quote_stream, start_quote_stream
+from .ranges import DEFAULT_RANGE, RANGES
+from .snapshot_store import SNAPSHOT_DIR, SnapshotReader
+
+# --------------------------------------------------------------------------
+# [화면 공용 조각] 두 화면이 똑같이 쓰는 페이지 설정 / 공용 자원 / 상단 바 / 진단 패널
+# --------------------------------------------------------------------------
+# 화면 스크립트는 리런마다 처음부터 다시 실행되므로 여기 함수들을 차례로 부르기만 합니다.
+
+AUTO_REFRESH_SECONDS = 180
+
+PAGE_CSS = """
+<style>
+    .stPlotlyChart { margin-bottom: -20px; }
+    div[data-testid="stMetricValue"] { font-size: 1.0rem; }
+    div[data-testid="column"] { align-items: end; }
+
+    div[data-testid="stButton"] > button {
+        background-color: transparent !important;
+        border: none !important;
+        font-size: 26px !important;
+        color: #555555 !important;
+        padding: 0px !important;
+        margin-bottom: 3px !important;
+        transition: all 0.2s ease;
+    }
+    div[data-testid="stButton"] > button:hover {
+        color: #ff4b4b !important;
+    }
+
+    h2 {
+        color: #424242;
+        border-bottom: 2px solid #f0f2f6;
+        padding-bottom: 10px;
+        margin-top: 30px;
+    }
+</style>
+"""
+
+
+def setup_page(page_title):
+    # 페이지 설정 + 자동 새로고침 + 제목 + CSS. (실시간 모드 여부, 자동 갱신 횟수)
+    st.set_page_config(layout="wide", page_title=page_title)
+
+    # 자동 새로고침 (3분, interval 은 밀리초 / key 는 이 타이머의 고유 이름)
+    # 실시간 모드면 스트리밍 체결가로 만든 봉을 메모리에서 LIVE_REFRESH_SECONDS 마다 다시 그림
+    live_mode = st.sidebar.toggle("⚡ 실시간 시세", key="live_mode")
+    count = st_autorefresh(
+        interval=(LIVE_REFRESH_SECONDS if live_mode else AUTO_REFRESH_SECONDS) * 1000, key="datarefresh"
+    )
+
+    st.title("운동회장")
+    st.markdown(PAGE_CSS, unsafe_allow_html=True)
+    return live_mode, count
+
+
+def load_portfolio(filename):
+    # portfolios/<filename> 에서 읽음 (ASSETMONITOR_PORTFOLIO 로 다른 파일 지정 가능)
+    # 파일을 고쳐 저장하면 서버 재시작 없이 다음 리런부터 반영됩니다.
+    path = os.environ.get("ASSETMONITOR_PORTFOLIO", os.path.join(PORTFOLIO_DIR, filename))
+    portfolio_file = get_portfolio_file(path)
+    index = portfolio_file.get()
+    if portfolio_file.error:
+        st.warning(f"⚠️ 포트폴리오 파일을 읽지 못해 이전 내용을 사용합니다: {portfolio_file.error}")
+    return index
+
+
+# --------------------------------------------------------------------------
+# [공용 시세 허브] 서버 프로세스당 하나, 모든 세션이 공유
+# --------------------------------------------------------------------------
+# 분봉은 마지막 봉 이후만 증분으로, 기준가(전일 종가)는 일봉 묶음 요청으로 받아
+# 같은 (종목, 날짜) 요청은 탭/사용자 수와 상관없이 한 번만 upstream 으로 나갑니다.
+@st.cache_resource
+def get_market_hub():
+    return MarketDataHub()
+
+
+@st.cache_resource
+def get_prefetcher(_tickers=()):
+    # 서버당 한 번만 시작되는 백그라운드 수집 스레드 (종목은 캐시 키에 넣지 않고 set_tickers 로 바꿈)
+    scheduler = PrefetchScheduler(_tickers)
+    scheduler.start()
+    return scheduler
+
+
+@st.cache_resource
+def get_snapshot_reader():
+    # ASSETMONITOR_SNAPSHOT_DIR 가 있으면 수집 워커(ingest_worker.py)가 발행한 파일을 읽기만 함
+    return SnapshotReader(SNAPSHOT_DIR)
+
+
+def get_live_snapshot(index, live_mode=False):
+    # 오늘 날짜용 최신 스냅샷 (서버가 막 떴을 때만 첫 수집을 기다림)
+    if SNAPSHOT_DIR:
+        # 워커가 아직 발행 전이거나 멈춰 날짜가 지났으면 허브에서 직접 받음
+        snapshot = get_snapshot_reader().latest()
+    else:
+        prefetcher = get_prefetcher(index.tickers)
+        # 포트폴리오 파일이 바뀌었으면 수집 대상도 바꿈 (같으면 아무 일 없음)
+        prefetcher.set_tickers(index.tickers)
+        snapshot = prefetcher.wait_for_snapshot(timeout=60)
+    if snapshot is None or snapshot.session_date != date.today():
+        return None
+    # 실시간 스트림이 떠 있으면 (어느 세션이 켰든) 받아 둔 봉 뒤에 실시간 봉을 이어 붙임
+    stream = start_quote_stream(index.tickers) if live_mode else get_quote_stream()
+    if stream is None:
+        return snapshot
+    stream.set_tickers(index.tickers)
+    if not SNAPSHOT_DIR:
+        # 스트림이 붙어 있는 동안 백그라운드 수집은 공식 봉을 맞춰 보는 정도로만
+        get_prefetcher().set_interval(LIVE_PREFETCH_INTERVAL if stream.connected else PREFETCH_INTERVAL)
+    return stream.overlay(snapshot)
+
+
+def refresh_live_data(target_date, tickers=None):
+    # 수동 새로고침: 보고 있는 날짜의 바뀔 수 있는 데이터만 비움 (끝난 과거 세션은 유지)
+    hub = get_market_hub()
+    if tickers is None:
+        hub.invalidate_live(target_date)
+    else:
+        hub.invalidate_tickers(tickers, target_date)
+    if target_date == date.today() and not SNAPSHOT_DIR:
+        get_prefetcher().refresh()
+
+
+# --------------------------------------------------------------------------
+# [계측] 이번 리런의 단계별 시간 기록 (맨 아래 진단 패널 / 지표 내보내기)
+# --------------------------------------------------------------------------
+def start_page_trace(page):
+    start_metrics_server()
+    # 진단 패널이 켜져 있을 때만 (내보내기가 꺼져 있으면) 차트 전송 크기를 잼
+    return start_trace(
+        page, caches={"hub": get_market_hub().stats}, measure_payload=st.session_state.get("diagnostics", False),
+    )
+
+
+# --------------------------------------------------------------------------
+# [상단 컨트롤 바] 조회 날짜 / 기간 / 새로고침 / 기준 시각. (날짜, 기간, 오늘 스냅샷 또는 None)
+# --------------------------------------------------------------------------
+def control_bar(index, live_mode, count, rerun_on_refresh=False):
+    col_date, col_range, col_btn, col_space, col_time = st.columns(
+        [1.2, 1.6, 0.15, 4.2, 2.5], vertical_alignment="bottom"
+    )
+
+    with col_date:
+        selected_date = st.date_input("📅 조회 날짜", date.today())
+
+    with col_range:
+        # 조회 날짜로 끝나는 하루 / 주 / 월 / 분기 (여러 날이면 서버에서 묶고 점 수를 줄여 보냄)
+        view_range = RANGES[st.radio(
+            "기간", list(RANGES), index=list(RANGES).index(DEFAULT_RANGE.key),
+            format_func=lambda key: RANGES[key].label, horizontal=True, key="view_range",
+        )]
+
+    with col_btn:
+        if st.button('🔄'):
+            refresh_live_data(selected_date)
+            if rerun_on_refresh:
+                st.rerun()
+
+    with col_space:
+        st.empty()
+
+    with col_time:
+        now_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with phase("snapshot_wait"):
+            # 백그라운드 스냅샷은 오늘 하루치만 담고 있음
+            live_snapshot = (
+                get_live_snapshot(index, live_mode)
+                if selected_date == date.today() and not view_range.multi_day else None
+            )
+        age_str = f" · 데이터 {live_snapshot.age:.0f}초 전" if live_snapshot is not None else ""
+        # 자동 갱신 카운트를 작게 표시해서 작동 중임을 알려줌
+        st.markdown(f"<div style='text-align: right; font-weight: bold; margin-bottom: 5px; font-size: 0.9rem;'>🕒 기준: {now_str}{age_str} <span style='font-size:0.7em; color:gray;'>(Auto {count})</span></div>", unsafe_allow_html=True)
+
+    # 시세 서버가 요청을 막고 있으면(서킷 브레이커 열림) 마지막으로 받은 데이터를 보여 주는 중임을 알림
+    if get_fetch_scheduler().breaker.state != CircuitBreaker.CLOSED:
+        st.warning("⚠️ 시세 서버 응답이 원활하지 않아 마지막으로 받은 데이터를 표시하고 있습니다.")
+
+    return selected_date, view_range, live_snapshot
+
+
+# --------------------------------------------------------------------------
+# [진단 패널] 이번 리런의 단계별 시간 / upstream 요청 / 캐시 적중률
+# --------------------------------------------------------------------------
+def diagnostics_panel(trace):
+    scheduler_status = get_fetch_scheduler().status()
+    hub_stats = get_market_hub().stats()
+    finish_trace(trace, gauges={
+        "hub_cache_hit_ratio": hub_stats["hit_rate"],
+        "hub_cache_entries": hub_stats["entries"],
+        "circuit_open": int(scheduler_status["state"] != CircuitBreaker.CLOSED),
+        "fetch_retries": scheduler_status["retries"],
+        "fetch_stale_served": scheduler_status["stale_served"],
+        "fetch_throttled_seconds": scheduler_status["throttled_seconds"],
+    })
+
+    if not st.sidebar.toggle("🩺 진단", key="diagnostics"):
+        return
+    hit_rate = trace.cache["hub"]["hit_rate"]
+    st.sidebar.caption(
+        f"리런 {trace.seconds:.2f}초 · upstream {trace.upstream_requests}회 "
+        f"({trace.upstream_tickers}종목, {trace.upstream_bytes / 1024:,.0f} KB, {trace.upstream_seconds:.2f}초) · "
+        f"허브 캐시 적중 {'-' if hit_rate is None else f'{hit_rate:.0%}'} (누적 {hub_stats['hit_rate']:.0%}) · "
+        f"요청 예산 대기 누적 {scheduler_status['throttled_seconds']:.1f}초 · "
+        f"차트 전송 {trace.payload_elements}개 {trace.payload_bytes / 1024:,.0f} KB"
+    )
+    st.sidebar.dataframe(
+        [{"단계": name, "초": round(seconds, 3), "비율": f"{seconds / trace.seconds:.0%}"}
+         for name, seconds in trace.phases.items()],
+        hide_index=True,
+    )
+    if trace.tickers:
+        st.sidebar.dataframe(
+            [{"종목": ticker, "초": round(seconds, 3)} for ticker, seconds in trace.slowest_tickers()],
+            hide_index=True,
+        )
+    registry = get_registry()
+    st.sidebar.download_button("JSONL 로그", registry.recent_jsonl(), "assetmonitor-metrics.jsonl", key="metrics_jsonl")
+    st.sidebar.download_button("Prometheus", registry.render_prometheus(), "assetmonitor.prom", key="metrics_prom")
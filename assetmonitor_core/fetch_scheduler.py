@@ -0,0 +1,237 @@
+import os
+import random
+import threading
+import time as _time
+from collections import OrderedDict
+
+# --------------------------------------------------------------------------
+# [요청 조절] 모든 upstream 호출이 거쳐 가는 스케줄러
+# --------------------------------------------------------------------------
+#   - 토큰 버킷: 허용된 요청 예산(초당 N회, 순간 최대 M회) 안에서만 요청
+#   - 재시도: 일시적인 실패(429, 타임아웃, 연결 오류)는 지터를 섞은 지수 백오프로 다시 시도
+#   - 서킷 브레이커: 연속으로 실패하면 잠시 upstream 을 부르지 않고
+#     마지막으로 성공했던 결과(last-known-good)를 대신 돌려줌
+# 시간/대기/난수 함수를 주입할 수 있어서 가짜 upstream 으로 동작을 확인할 수 있습니다.
+
+# 요청 예산 (환경 변수로 조절). yf.download 는 종목마다 HTTP 요청을 하나씩 보내므로
+# 예산은 "종목 요청 수" 기준이며, 포트폴리오 전체 갱신 한 번은 버스트 안에 들어가게 둡니다.
+REQUESTS_PER_SECOND = float(os.environ.get("ASSETMONITOR_REQUESTS_PER_SECOND", "10"))
+BURST = int(os.environ.get("ASSETMONITOR_REQUEST_BURST", "200"))
+# 토큰 수 비교에서 무시할 부동소수 오차
+TOKEN_EPSILON = 1e-9
+
+MAX_RETRIES = 3
+BASE_DELAY = 1.0
+MAX_DELAY = 30.0
+
+# 재시도를 다 써도 실패한 호출이 이만큼 이어지면 회로를 열고, 이 시간 뒤에 한 번 시험해 봄
+FAILURE_THRESHOLD = 3
+RESET_TIMEOUT = 120.0
+
+# 마지막 성공 결과를 보관할 요청 종류 수
+LAST_GOOD_ENTRIES = 512
+
+
+class UpstreamError(Exception):
+    pass
+
+
+class RateLimited(UpstreamError):
+    pass
+
+
+class UpstreamTimeout(UpstreamError):
+    pass
+
+
+class CircuitOpen(UpstreamError):
+    pass
+
+
+# 재시도할 가치가 있는 실패
+# 연결 거부(ConnectionRefusedError)는 주소 / 설정 문제일 수 있어 재시도 / 회로 대상에서 뺌
+TRANSIENT_ERRORS = (RateLimited, UpstreamTimeout, TimeoutError, ConnectionResetError, ConnectionAbortedError)
+
+
+class TokenBucket:
+    def __init__(self, rate=REQUESTS_PER_SECOND, capacity=BURST, clock=_time.monotonic, sleep=_time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        # 토큰이 모일 때까지 기다렸다가 사용 (버킷 크기보다 큰 요청은 버킷 크기만큼만)
+        # 기다린 시간(초)을 돌려줌
+        tokens = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                # 부동소수 오차로 아주 조금 모자란 경우는 채워진 것으로 (기다릴 시간이 시계 해상도보다 작으면
+                # 시각이 그대로라 끝없이 돌게 됨)
+                if self._tokens >= tokens - TOKEN_EPSILON:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+            waited += wait
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT, clock=_time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+        self.trips = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        # 열린 동안은 막고, 대기 시간이 지나면 시험 호출 하나만 통과
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.trips += 1
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+
+class FetchScheduler:
+    def __init__(self, bucket=None, breaker=None, max_retries=MAX_RETRIES,
+                 base_delay=BASE_DELAY, max_delay=MAX_DELAY,
+                 sleep=_time.sleep, rng=random.random):
+        self.bucket = bucket or TokenBucket(sleep=sleep)
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._rng = rng
+        self._last_good = OrderedDict()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.stale_served = 0
+        self.throttled_seconds = 0.0
+
+    def backoff(self, attempt):
+        # 지수 백오프에 50~100% 지터를 곱해 동시에 재시도가 몰리지 않게 함
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay * (0.5 + self._rng() / 2)
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._last_good[key] = result
+            self._last_good.move_to_end(key)
+            while len(self._last_good) > LAST_GOOD_ENTRIES:
+                self._last_good.popitem(last=False)
+
+    def _fallback(self, key, error):
+        with self._lock:
+            if key in self._last_good:
+                self.stale_served += 1
+                return self._last_good[key]
+        raise error
+
+    def call(self, key, fn, *args, cost=1, **kwargs):
+        # key 는 같은 요청인지 구분하는 값 (마지막 성공 결과를 찾을 때 사용)
+        # cost 는 이 호출이 실제로 보내는 요청 수 (토큰 버킷에서 차감)
+        if not self.breaker.allow():
+            return self._fallback(key, CircuitOpen("upstream circuit is open"))
+
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            throttled = self.bucket.acquire(cost)
+            self._count(throttled=throttled, calls=1)
+            try:
+                result = fn(*args, **kwargs)
+            except TRANSIENT_ERRORS as e:
+                last_error = e
+                if attempt < self.max_retries:
+                    self._count(retries=1)
+                    self._sleep(self.backoff(attempt))
+                continue
+            except Exception:
+                # 재시도 대상이 아닌 오류는 upstream 이 응답은 한 것이므로 회로는 닫아 둠
+                self.breaker.record_success()
+                raise
+            self.breaker.record_success()
+            self._remember(key, result)
+            return result
+
+        self.breaker.record_failure()
+        return self._fallback(key, last_error)
+
+    def _count(self, throttled=0.0, calls=0, retries=0):
+        # 수집 스레드 풀과 백그라운드 수집 스레드가 같은 스케줄러를 쓰므로 잠금 안에서 더함
+        with self._lock:
+            self.throttled_seconds += throttled
+            self.calls += calls
+            self.retries += retries
+
+    def status(self):
+        with self._lock:
+            counts = {
+                "calls": self.calls,
+                "retries": self.retries,
+                "stale_served": self.stale_served,
+                "throttled_seconds": self.throttled_seconds,
+            }
+        return {"state": self.breaker.state, "trips": self.breaker.trips, **counts}
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def get_fetch_scheduler():
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = FetchScheduler()
+        return _default_scheduler
+
+
+def set_fetch_scheduler(scheduler):
+    # 벤치마크/재현 때 요청 예산이 다른 스케줄러로 바꿔 끼움
+    global _default_scheduler
+    with _default_lock:
+        _default_scheduler = scheduler
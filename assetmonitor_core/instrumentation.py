@@ -0,0 +1,373 @@
+import json
+import os
+import tempfile
+import threading
+import time as _time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --------------------------------------------------------------------------
+# [계측] 리런마다 단계별 / 종목별 시간, upstream 요청, 캐시 적중률 기록
+# --------------------------------------------------------------------------
+# 리런 하나 = Trace 하나. 스크립트 맨 위에서 start_trace, 맨 아래에서 finish_trace.
+# 그 사이에 phase("...") / ticker_timer(종목) 으로 감싼 구간의 시간이 쌓이고
+# record_payload 로 화면에 보낸 차트 spec 크기가 쌓입니다.
+# 현재 Trace 는 스레드별로 두므로 백그라운드 수집 스레드의 요청은
+# 리런 기록에는 안 들어가고 프로세스 전체 누적치(Registry)에만 들어갑니다.
+# (리런이 직접 맡긴 수집 스레드는 bind_trace 로 그 리런의 Trace 에 기록)
+#
+# 내보내기 (환경 변수로 켬)
+#   ASSETMONITOR_METRICS_LOG  : 리런마다 한 줄씩 JSON 을 덧붙일 파일
+#   ASSETMONITOR_METRICS_PROM : Prometheus 텍스트 형식으로 덮어쓸 파일 (textfile collector 용)
+#   ASSETMONITOR_METRICS_PORT : 이 포트에서 /metrics 를 Prometheus 텍스트로 응답
+
+METRICS_LOG = os.environ.get("ASSETMONITOR_METRICS_LOG")
+METRICS_PROM = os.environ.get("ASSETMONITOR_METRICS_PROM")
+METRICS_PORT = os.environ.get("ASSETMONITOR_METRICS_PORT")
+# 차트 spec 크기는 figure 를 한 번 더 직렬화해야 잴 수 있으므로
+# 내보내기가 켜져 있거나 진단 패널을 보는 리런에서만 잼 (Trace.measure_payload)
+EXPORT_CONFIGURED = bool(METRICS_LOG or METRICS_PROM or METRICS_PORT)
+
+# 사이드바/다운로드용으로 메모리에 남겨 둘 최근 리런 수
+RECENT_TRACES = 200
+PREFIX = "assetmonitor"
+
+
+class Trace:
+    def __init__(self, name, caches=None):
+        self.name = name
+        self.started_at = _time.time()
+        self._start = _time.perf_counter()
+        self.seconds = None
+        self.phases = OrderedDict()
+        self.tickers = {}
+        self.upstream_requests = 0
+        self.upstream_tickers = 0
+        self.upstream_bytes = 0
+        self.upstream_seconds = 0.0
+        self.upstream_errors = 0
+        self.payload_elements = 0
+        self.payload_bytes = 0
+        self.measure_payload = EXPORT_CONFIGURED
+        # 캐시 이름 -> stats() 함수. 시작/끝 차이로 이번 리런의 적중률을 계산
+        self._caches = caches or {}
+        self._cache_start = {name: stats() for name, stats in self._caches.items()}
+        self.cache = {}
+        # 점진 표시의 수집 스레드들도 같은 Trace 에 기록하므로
+        self._lock = threading.Lock()
+
+    def add_phase(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_ticker(self, ticker, seconds):
+        with self._lock:
+            self.tickers[ticker] = self.tickers.get(ticker, 0.0) + seconds
+
+    def add_upstream(self, tickers, nbytes, seconds, error=False):
+        with self._lock:
+            self.upstream_requests += 1
+            self.upstream_tickers += tickers
+            self.upstream_bytes += nbytes
+            self.upstream_seconds += seconds
+            self.upstream_errors += int(error)
+
+    def add_payload(self, nbytes):
+        with self._lock:
+            self.payload_elements += 1
+            self.payload_bytes += nbytes
+
+    def finish(self):
+        self.seconds = _time.perf_counter() - self._start
+        for name, stats in self._caches.items():
+            before, after = self._cache_start[name], stats()
+            hits = after["hits"] - before["hits"]
+            misses = after["misses"] - before["misses"]
+            self.cache[name] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else None,
+            }
+
+    def slowest_tickers(self, n=10):
+        return sorted(self.tickers.items(), key=lambda item: item[1], reverse=True)[:n]
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "seconds": self.seconds,
+            "phases": dict(self.phases),
+            "tickers": self.tickers,
+            "upstream": {
+                "requests": self.upstream_requests,
+                "tickers": self.upstream_tickers,
+                "bytes": self.upstream_bytes,
+                "seconds": self.upstream_seconds,
+                "errors": self.upstream_errors,
+            },
+            "payload": {
+                "elements": self.payload_elements,
+                "bytes": self.payload_bytes,
+            },
+            "cache": self.cache,
+        }
+
+
+# --------------------------------------------------------------------------
+# [누적치] 프로세스 전체 카운터 / 요약(합계, 횟수) / 게이지
+# --------------------------------------------------------------------------
+class Registry:
+    def __init__(self, recent=RECENT_TRACES):
+        self._counters = OrderedDict()
+        self._summaries = OrderedDict()
+        self._gauges = OrderedDict()
+        self._help = {}
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=recent)
+
+    def _key(self, name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, help=None, **labels):
+        with self._lock:
+            key = self._key(name, labels)
+            self._counters[key] = self._counters.get(key, 0) + value
+            if help:
+                self._help.setdefault(name, help)
+
+    def observe(self, name, value, help=None, **labels):
+        with self._lock:
+            key = self._key(name, labels)
+            total, count = self._summaries.get(key, (0.0, 0))
+            self._summaries[key] = (total + value, count + 1)
+            if help:
+                self._help.setdefault(name, help)
+
+    def set(self, name, value, help=None, **labels):
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+            if help:
+                self._help.setdefault(name, help)
+
+    def record_trace(self, trace):
+        self.observe("rerun_seconds", trace.seconds, help="Script rerun wall time", script=trace.name)
+        self.set("rerun_last_seconds", trace.seconds, help="Wall time of the latest rerun", script=trace.name)
+        self.observe("rerun_payload_bytes", trace.payload_bytes,
+                     help="Chart spec bytes sent to the browser per rerun", script=trace.name)
+        for phase_name, seconds in trace.phases.items():
+            self.observe("phase_seconds", seconds, help="Time spent per rerun phase", phase=phase_name)
+            self.set("phase_last_seconds", seconds, help="Phase time of the latest rerun", phase=phase_name)
+        for cache_name, stats in trace.cache.items():
+            if stats["hit_rate"] is not None:
+                self.set("rerun_cache_hit_ratio", stats["hit_rate"],
+                         help="Cache hit ratio of the latest rerun", cache=cache_name)
+        with self._lock:
+            self.recent.append(trace.to_dict())
+
+    def render_prometheus(self):
+        lines = []
+        with self._lock:
+            typed = set()
+
+            def header(name, kind):
+                full = f"{PREFIX}_{name}"
+                if full not in typed:
+                    typed.add(full)
+                    if name in self._help:
+                        lines.append(f"# HELP {full} {self._help[name]}")
+                    lines.append(f"# TYPE {full} {kind}")
+                return full
+
+            # 같은 이름의 줄은 붙어 있어야 하므로 이름순으로 (같은 이름 안에서는 들어온 순서)
+            for (name, labels), value in sorted(self._counters.items(), key=_by_name):
+                full = header(name, "counter")
+                lines.append(f"{full}{_labels(labels)} {value}")
+            for (name, labels), (total, count) in sorted(self._summaries.items(), key=_by_name):
+                full = header(name, "summary")
+                lines.append(f"{full}_sum{_labels(labels)} {total}")
+                lines.append(f"{full}_count{_labels(labels)} {count}")
+            for (name, labels), value in sorted(self._gauges.items(), key=_by_name):
+                full = header(name, "gauge")
+                lines.append(f"{full}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def recent_jsonl(self):
+        with self._lock:
+            return "".join(json.dumps(trace, ensure_ascii=False) + "\n" for trace in self.recent)
+
+
+def _by_name(item):
+    return item[0][0]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+_registry = Registry()
+_local = threading.local()
+
+
+def get_registry():
+    return _registry
+
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+
+def start_trace(name, caches=None, measure_payload=False):
+    # measure_payload: 내보내기가 꺼져 있어도 이번 리런의 차트 spec 크기를 잼 (진단 패널을 볼 때)
+    trace = Trace(name, caches)
+    trace.measure_payload = trace.measure_payload or measure_payload
+    _local.trace = trace
+    return trace
+
+
+@contextmanager
+def bind_trace(trace):
+    # 다른 스레드에서 하는 일을 리런의 Trace 에 넣기 (점진 표시의 수집 스레드)
+    previous = current_trace()
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+
+def finish_trace(trace, gauges=None):
+    # gauges: 리런 끝 시점의 상태값 (허브 캐시 적중률, 서킷 상태 등) {이름: 값}
+    trace.finish()
+    if current_trace() is trace:
+        _local.trace = None
+    _registry.record_trace(trace)
+    for name, value in (gauges or {}).items():
+        _registry.set(name, value)
+
+    try:
+        _export(trace)
+    except OSError:
+        # 계측 내보내기 실패(디스크, 권한 등)가 화면을 깨뜨리지 않도록 세기만 함
+        _registry.inc("metrics_export_errors_total", help="Failed metrics log / textfile writes")
+    return trace
+
+
+# 여러 세션이 동시에 리런을 끝내도 줄이 섞이거나 같은 파일을 서로 교체하지 않도록
+_export_lock = threading.Lock()
+
+
+def _export(trace):
+    if not (METRICS_LOG or METRICS_PROM):
+        return
+    with _export_lock:
+        if METRICS_LOG:
+            with open(METRICS_LOG, "a", encoding="utf-8") as f:
+                f.write(json.dumps(trace.to_dict(), ensure_ascii=False) + "\n")
+        if METRICS_PROM:
+            # 읽는 쪽이 반쯤 쓴 파일을 보지 않도록 같은 폴더의 임시 파일(이름이 겹치지 않게)에 쓰고 교체
+            directory, name = os.path.split(os.path.abspath(METRICS_PROM))
+            fd, tmp = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(_registry.render_prometheus())
+                os.replace(tmp, METRICS_PROM)
+            except BaseException:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+                raise
+
+
+@contextmanager
+def phase(name):
+    start = _time.perf_counter()
+    try:
+        yield
+    finally:
+        trace = current_trace()
+        if trace is not None:
+            trace.add_phase(name, _time.perf_counter() - start)
+
+
+@contextmanager
+def ticker_timer(ticker):
+    start = _time.perf_counter()
+    try:
+        yield
+    finally:
+        trace = current_trace()
+        if trace is not None:
+            trace.add_ticker(ticker, _time.perf_counter() - start)
+
+
+def record_upstream(tickers, nbytes, seconds, error=False):
+    # upstream 요청 한 번 (어느 스레드에서든). 받은 바이트는 받아 온 표의 크기로 셈
+    _registry.inc("upstream_requests_total", help="Upstream download requests")
+    _registry.inc("upstream_tickers_total", tickers, help="Tickers requested upstream")
+    _registry.inc("upstream_bytes_total", nbytes, help="Bytes of bar data received")
+    _registry.observe("upstream_seconds", seconds, help="Upstream request latency")
+    if error:
+        _registry.inc("upstream_errors_total", help="Failed upstream requests")
+    trace = current_trace()
+    if trace is not None:
+        trace.add_upstream(tickers, nbytes, seconds, error)
+
+
+def payload_measured():
+    # 이번 리런이 차트 spec 크기를 재는지. 화면 코드는 이것이 참일 때만 figure_bytes 를 부름
+    trace = current_trace()
+    return trace.measure_payload if trace is not None else EXPORT_CONFIGURED
+
+
+def record_payload(nbytes, element="plotly_chart"):
+    # 화면으로 보낸 요소 하나의 spec 크기 (리런 합계는 rerun_payload_bytes 로)
+    _registry.inc("payload_bytes_total", nbytes, help="Bytes of element specs sent to the browser",
+                  element=element)
+    trace = current_trace()
+    if trace is not None:
+        trace.add_payload(nbytes)
+
+
+# --------------------------------------------------------------------------
+# [엔드포인트] /metrics 를 Prometheus 텍스트로 응답하는 작은 HTTP 서버
+# --------------------------------------------------------------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = _registry.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=None):
+    # 프로세스당 한 번만 띄움 (포트가 설정되지 않았으면 아무것도 안 함)
+    global _server
+    port = port or METRICS_PORT
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
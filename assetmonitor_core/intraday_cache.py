@@ -0,0 +1,99 @@
+import threading
+
+from .bar_buffer import BarBuffer, session_bars
+from .market_calendar import RefreshPlanner, exchange_for
+from .market_data import download_bars, fetch_intraday, last_session
+
+# --------------------------------------------------------------------------
+# [증분 갱신] 마지막 봉 이후만 받아서 이어 붙이는 당일 분봉 캐시
+# --------------------------------------------------------------------------
+# 자동 새로고침마다 하루치 5분봉 전체를 다시 받지 않고,
+# 종목별 마지막 봉 시각부터의 꼬리(tail)만 요청해서 합칩니다.
+# 마지막 봉은 아직 만들어지는 중일 수 있으므로 새로 받은 값으로 덮어씁니다.
+# 장이 닫혀 있는 거래소의 종목은 꼬리도 요청하지 않고 받아 둔 봉을 그대로 씁니다.
+
+
+class IntradayCache:
+    def __init__(self, interval="5m"):
+        self.interval = interval
+        # 봉은 종목별 DataFrame 대신 버퍼 하나에 (돌려주는 것도 버퍼를 가리키는 뷰)
+        self._bars = BarBuffer(session_bars)
+        self._planner = RefreshPlanner()
+        self._lock = threading.Lock()
+
+    def get(self, ticker):
+        return self._bars.get(ticker)
+
+    def refresh(self, tickers):
+        tickers = list(dict.fromkeys(tickers))
+        with self._lock:
+            known = [t for t in tickers if t in self._bars]
+            unknown = [t for t in tickers if t not in self._bars]
+
+            # 처음 보는 종목은 당일 전체를 한 번 받아 둠
+            if unknown:
+                fetched = fetch_intraday(unknown, None, True)
+                for ticker, df in fetched.items():
+                    self._bars.write(ticker, df, replace=True)
+                self._planner.mark(fetched)
+
+            # 장중이거나 막 닫힌 종목만, 같은 거래소/같은 세션끼리 묶어 가장 이른 마지막 봉부터 한 번에 요청
+            last = {t: self._bars.last_timestamp(t) for t in self._planner.due(known)}
+            groups = {}
+            for ticker, last_ts in last.items():
+                exchange = exchange_for(ticker)
+                key = (exchange.code, exchange.session_date(last_ts))
+                groups.setdefault(key, []).append(ticker)
+
+            for group in groups.values():
+                since = min(last[t] for t in group)
+                failed = []
+                tails = download_bars(group, failed=failed, start=since, interval=self.interval)
+                for ticker, tail in tails.items():
+                    merge_tail(self._bars, ticker, tail, last[ticker])
+                # 요청 자체가 실패한 종목은 표시하지 않아 다음 갱신 때 다시 시도
+                self._planner.mark([t for t in group if t not in failed])
+
+            return self._bars.frames(tickers)
+
+    def invalidate(self, tickers):
+        # 다음 갱신 때 해당 종목만 하루치 전체를 다시 받음
+        with self._lock:
+            self._bars.drop(tickers)
+            self._planner.forget(tickers)
+
+    def clear(self):
+        with self._lock:
+            self._bars.clear()
+            self._planner.clear()
+
+
+def merge_tail(bars, ticker, tail, last_ts):
+    # tail 의 첫 봉 이후 구간은 새 값으로 교체하고, 세션이 넘어갔으면 새 세션만 (새 구간에) 남김
+    # 세션은 거래소 세션 날짜로 (선물의 저녁 개장 / 자정을 넘기는 봉도 한 세션)
+    if tail.empty:
+        return
+    tail = tail[~tail.index.duplicated(keep='last')].sort_index()
+    session = last_session(tail, ticker)
+    exchange = exchange_for(ticker)
+    new_session = exchange.session_dates(session.index[-1:])[0] != exchange.session_date(last_ts)
+    bars.write(ticker, session, replace=new_session)
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_intraday_cache():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = IntradayCache()
+        return _default_cache
+
+
+def load_intraday(tickers, target_date, is_today):
+    # 오늘은 증분 캐시로, 과거 날짜는 (로컬 저장소를 거치는) 일반 조회로
+    if is_today:
+        return get_intraday_cache().refresh(tickers)
+    return fetch_intraday(tickers, target_date, is_today)
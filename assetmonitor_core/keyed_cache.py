@@ -0,0 +1,93 @@
+import threading
+import time as _time
+from collections import OrderedDict
+
+# --------------------------------------------------------------------------
+# [키 캐시] 범위(scope)를 지정해서 필요한 것만 비우는 캐시
+# --------------------------------------------------------------------------
+# st.cache_data.clear() 는 모든 사용자의 모든 캐시(바뀔 일 없는 과거 날짜까지)를
+# 한꺼번에 날리므로, 항목마다 태그를 붙여 두고 태그로 골라서 지웁니다.
+#   ("date", 날짜)     : 그 날짜의 데이터
+#   ("live", 날짜)     : 아직 끝나지 않은(바뀔 수 있는) 세션의 데이터
+#   ("ticker", 종목)   : 그 종목이 들어 있는 데이터
+# 섹터 단위 무효화는 섹터에 속한 종목 태그로 풀어서 처리합니다.
+
+# 보관할 최대 항목 수 (넘치면 가장 오래 안 쓴 항목부터 제거)
+MAX_ENTRIES = 256
+
+
+class KeyedCache:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key, ttl, count=True):
+        # (찾았는지, 값) 을 돌려줌. 만료된 항목은 여기서 제거
+        # count=False: 이미 한 번 센 조회를 다시 확인할 때 (적중 / 놓침 수를 늘리지 않음)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += count
+                return False, None
+            stored_at, value, _ = entry
+            if _time.monotonic() - stored_at > ttl:
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += count
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += count
+            return True, value
+
+    def set(self, key, value, tags=()):
+        with self._lock:
+            self._entries[key] = (_time.monotonic(), value, frozenset(tags))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, date=None, live=None, tickers=None):
+        # 주어진 조건에 모두 해당하는 항목만 제거하고 제거한 개수를 돌려줌
+        # live=날짜 : 그 날짜의 아직 안 끝난 세션 데이터
+        # tickers   : 이 중 하나라도 포함한 데이터
+        wanted = []
+        if date is not None:
+            wanted.append(lambda tags: ("date", date) in tags)
+        if live is not None:
+            wanted.append(lambda tags: ("live", live) in tags)
+        if tickers is not None:
+            ticker_tags = {("ticker", t) for t in tickers}
+            wanted.append(lambda tags: not ticker_tags.isdisjoint(tags))
+
+        with self._lock:
+            doomed = [
+                key for key, (_, _, tags) in self._entries.items()
+                if all(match(tags) for match in wanted)
+            ]
+            for key in doomed:
+                del self._entries[key]
+            self.invalidations += len(doomed)
+            return len(doomed)
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
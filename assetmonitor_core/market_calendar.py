@@ -0,0 +1,202 @@
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from .instrumentation import get_registry
+
+# --------------------------------------------------------------------------
+# [세션 달력] 종목 -> 거래소 -> 정규장 시간 / 휴장일
+# --------------------------------------------------------------------------
+# 갱신 계획과 차트 X축이 같은 달력을 씁니다.
+#   - 장이 열려 있거나 막 닫힌 종목만 upstream 에서 다시 받고
+#     나머지는 이미 받아 둔(확정된) 봉을 그대로 씀
+#   - 차트 X축은 그 거래소의 실제 개장~폐장 시각
+# 시각은 모두 거래소 현지 시각입니다. 휴장일은 해마다 거래소 공지를 보고 채웁니다.
+# (목록에 없는 해는 평일을 모두 거래일로 보므로 갱신이 조금 늘 뿐 틀리지는 않음)
+
+US_HOLIDAYS = {
+    # 2025
+    date(2025, 1, 1), date(2025, 1, 9), date(2025, 1, 20), date(2025, 2, 17), date(2025, 4, 18),
+    date(2025, 5, 26), date(2025, 6, 19), date(2025, 7, 4), date(2025, 9, 1), date(2025, 11, 27),
+    date(2025, 12, 25),
+    # 2026
+    date(2026, 1, 1), date(2026, 1, 19), date(2026, 2, 16), date(2026, 4, 3), date(2026, 5, 25),
+    date(2026, 6, 19), date(2026, 7, 3), date(2026, 9, 7), date(2026, 11, 26), date(2026, 12, 25),
+}
+
+KRX_HOLIDAYS = {
+    # 2025
+    date(2025, 1, 1), date(2025, 1, 27), date(2025, 1, 28), date(2025, 1, 29), date(2025, 1, 30),
+    date(2025, 3, 3), date(2025, 5, 1), date(2025, 5, 5), date(2025, 5, 6), date(2025, 6, 3),
+    date(2025, 6, 6), date(2025, 8, 15), date(2025, 10, 3), date(2025, 10, 6), date(2025, 10, 7),
+    date(2025, 10, 8), date(2025, 10, 9), date(2025, 12, 25), date(2025, 12, 31),
+    # 2026
+    date(2026, 1, 1), date(2026, 2, 16), date(2026, 2, 17), date(2026, 2, 18), date(2026, 3, 2),
+    date(2026, 5, 1), date(2026, 5, 5), date(2026, 5, 25), date(2026, 6, 3), date(2026, 8, 17),
+    date(2026, 9, 24), date(2026, 9, 25), date(2026, 10, 5), date(2026, 10, 9), date(2026, 12, 25),
+    date(2026, 12, 31),
+}
+
+JPX_HOLIDAYS = {
+    # 2025
+    date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 3), date(2025, 1, 13), date(2025, 2, 11),
+    date(2025, 2, 24), date(2025, 3, 20), date(2025, 4, 29), date(2025, 5, 5), date(2025, 5, 6),
+    date(2025, 7, 21), date(2025, 8, 11), date(2025, 9, 15), date(2025, 9, 23), date(2025, 10, 13),
+    date(2025, 11, 3), date(2025, 11, 24), date(2025, 12, 31),
+    # 2026
+    date(2026, 1, 1), date(2026, 1, 2), date(2026, 1, 12), date(2026, 2, 11), date(2026, 2, 23),
+    date(2026, 3, 20), date(2026, 4, 29), date(2026, 5, 4), date(2026, 5, 5), date(2026, 5, 6),
+    date(2026, 7, 20), date(2026, 8, 11), date(2026, 9, 21), date(2026, 9, 22), date(2026, 9, 23),
+    date(2026, 10, 12), date(2026, 11, 3), date(2026, 11, 23), date(2026, 12, 31),
+}
+
+# CME 선물은 미국 공휴일 대부분에 단축 거래를 하므로 완전히 쉬는 날만
+CME_HOLIDAYS = {
+    date(2025, 1, 1), date(2025, 4, 18), date(2025, 12, 25),
+    date(2026, 1, 1), date(2026, 4, 3), date(2026, 12, 25),
+}
+
+
+class Exchange:
+    def __init__(self, code, timezone_name, sessions, holidays=(), overnight=False):
+        # sessions: 거래일 하루의 거래 구간 ((열림, 닫힘), ...). 점심 휴장이 있으면 구간이 둘
+        # overnight: 첫 구간이 전날 저녁에 열림 (선물처럼 18:00 에 다음 거래일이 시작)
+        self.code = code
+        self.timezone = timezone_name
+        self.tz = ZoneInfo(timezone_name)
+        self.sessions = tuple(sessions)
+        self.holidays = frozenset(holidays)
+        self.overnight = overnight
+
+    def __repr__(self):
+        return f"Exchange({self.code})"
+
+    def is_trading_day(self, day):
+        return day.weekday() < 5 and day not in self.holidays
+
+    def segments(self, day):
+        # 거래일 day 의 거래 구간 [(열림, 닫힘), ...] (시간대가 붙은 datetime, 휴장이면 빈 목록)
+        if not self.is_trading_day(day):
+            return []
+        segments = []
+        for i, (open_time, close_time) in enumerate(self.sessions):
+            open_day = day - timedelta(days=1) if self.overnight and i == 0 else day
+            segments.append((
+                datetime.combine(open_day, open_time, self.tz),
+                datetime.combine(day, close_time, self.tz),
+            ))
+        return segments
+
+    def session_bounds(self, day):
+        # (개장, 폐장) 또는 휴장이면 None
+        segments = self.segments(day)
+        if not segments:
+            return None
+        return segments[0][0], segments[-1][1]
+
+    def session_date(self, ts):
+        # 이 시각이 속한 거래일 (overnight 거래소는 저녁 개장 이후를 다음 날 세션으로)
+        local = ts.astimezone(self.tz)
+        day = local.date()
+        if self.overnight and local.time() >= self.sessions[0][0]:
+            day += timedelta(days=1)
+        return day
+
+    def session_dates(self, index):
+        # 봉 시각 인덱스 -> 봉마다 session_date (datetime64[D] 배열). 시간대가 없는 인덱스는 거래소 현지 시각으로
+        if index.tz is not None:
+            index = index.tz_convert(self.tz).tz_localize(None)
+        days = index.values.astype('datetime64[D]')
+        if self.overnight:
+            open_time = self.sessions[0][0]
+            evening = (index.hour * 60 + index.minute >= open_time.hour * 60 + open_time.minute).astype('int64')
+            days = days + evening.astype('timedelta64[D]')
+        return days
+
+    def is_open(self, now):
+        return any(open_at <= now < close_at for open_at, close_at in self.segments(self.session_date(now)))
+
+    def last_close(self, now):
+        # now 이전에 마지막으로 닫힌 거래 구간의 닫힘 시각 (연휴를 넘어 최대 2주 전까지)
+        day = self.session_date(now)
+        for _ in range(14):
+            closes = [close_at for _, close_at in self.segments(day) if close_at <= now]
+            if closes:
+                return max(closes)
+            day -= timedelta(days=1)
+        return None
+
+
+EXCHANGES = {
+    "NYSE": Exchange("NYSE", "America/New_York", [(time(9, 30), time(16, 0))], US_HOLIDAYS),
+    "KRX": Exchange("KRX", "Asia/Seoul", [(time(9, 0), time(15, 30))], KRX_HOLIDAYS),
+    "JPX": Exchange("JPX", "Asia/Tokyo", [(time(9, 0), time(11, 30)), (time(12, 30), time(15, 30))],
+                    JPX_HOLIDAYS),
+    # Globex: 전날 18:00 ~ 17:00 (뉴욕 시각, Yahoo 가 선물 봉을 주는 시간대)
+    "CME": Exchange("CME", "America/New_York", [(time(18, 0), time(17, 0))], CME_HOLIDAYS, overnight=True),
+}
+
+# 지수는 접미사가 없으므로 이름으로, 나머지는 접미사로 (둘 다 아니면 미국 시장)
+INDEX_EXCHANGES = {"^KS11": "KRX", "^KQ11": "KRX", "^N225": "JPX"}
+SUFFIX_EXCHANGES = {".KS": "KRX", ".KQ": "KRX", ".T": "JPX", "=F": "CME"}
+DEFAULT_EXCHANGE = "NYSE"
+
+
+def exchange_for(ticker):
+    code = INDEX_EXCHANGES.get(ticker)
+    if code is None:
+        code = next((c for suffix, c in SUFFIX_EXCHANGES.items() if ticker.endswith(suffix)), DEFAULT_EXCHANGE)
+    return EXCHANGES[code]
+
+
+# --------------------------------------------------------------------------
+# [갱신 계획] 장이 열려 있거나 막 닫힌 종목만 다시 받기
+# --------------------------------------------------------------------------
+# 종목별 마지막으로 받은 시각을 기억해 두고,
+#   - 처음 보는 종목 / 장중인 종목          -> 받음
+#   - 장이 닫혔고, 마감 + SETTLE 이후에 한 번 받았음 -> 확정된 봉이 있으므로 건너뜀
+# 마감 직후 몇 분은 마지막 봉이 아직 바뀌므로 SETTLE 동안은 계속 받습니다.
+
+SETTLE = timedelta(minutes=15)
+
+
+class RefreshPlanner:
+    def __init__(self, settle=SETTLE):
+        self.settle = settle
+        self._fetched_at = {}
+        self._lock = threading.Lock()
+
+    def _is_due(self, ticker, now):
+        fetched_at = self._fetched_at.get(ticker)
+        if fetched_at is None:
+            return True
+        exchange = exchange_for(ticker)
+        if exchange.is_open(now):
+            return True
+        last_close = exchange.last_close(now)
+        return last_close is not None and fetched_at < last_close + self.settle
+
+    def due(self, tickers, now=None):
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            due = [t for t in tickers if self._is_due(t, now)]
+        skipped = len(tickers) - len(due)
+        if skipped:
+            get_registry().inc("refresh_skipped_tickers_total", skipped,
+                               help="Tickers not refreshed because their market is closed")
+        return due
+
+    def mark(self, tickers, now=None):
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            for ticker in tickers:
+                self._fetched_at[ticker] = now
+
+    def forget(self, tickers):
+        with self._lock:
+            for ticker in tickers:
+                self._fetched_at.pop(ticker, None)
+
+    def clear(self):
+        with self._lock:
+            self._fetched_at.clear()
@@ -0,0 +1,328 @@
+import time as _time
+
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from .bar_buffer import BarView
+from .bar_store import get_bar_store
+from .fetch_scheduler import get_fetch_scheduler
+from .instrumentation import record_upstream
+from .market_calendar import exchange_for
+from .providers import get_provider
+from .ranges import resample_bars
+
+# --------------------------------------------------------------------------
+# [데이터 레이어] 포트폴리오 시세를 묶음(batch) 요청으로 가져오기
+# --------------------------------------------------------------------------
+# 종목마다 yf.Ticker(...).history 를 부르면 150여 번의 HTTP 왕복이 생기므로,
+# 중복을 제거한 종목 목록을 CHUNK_SIZE 개씩 나눠 yf.download 로 한 번에 받고
+# 각 차트 칸은 그 결과에서 자기 종목만 잘라 씁니다.
+
+# 한 번의 yf.download 요청에 담을 최대 종목 수
+CHUNK_SIZE = 50
+
+# 포트폴리오에서 가장 늦게 끝나는 시장(미국)의 시간대.
+# 이 시간대로도 날짜가 넘어갔다면 그 날짜의 모든 세션은 끝난 것으로 봅니다.
+LAST_CLOSING_TIMEZONE = "America/New_York"
+
+
+def exchange_timezone(ticker):
+    # 여러 거래소 종목을 한 번에 받으면 인덱스가 UTC 로 합쳐지므로
+    # 세션 달력의 거래소 시간대로 되돌려 줍니다.
+    return exchange_for(ticker).timezone
+
+
+def chunked(items, size=CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def split_by_ticker(data, tickers):
+    # yf.download(group_by='ticker') 결과를 {종목: DataFrame} 으로 나눔
+    frames = {}
+    if data is None or data.empty:
+        return frames
+
+    if isinstance(data.columns, pd.MultiIndex):
+        available = set(data.columns.get_level_values(0))
+        for ticker in tickers:
+            if ticker not in available:
+                continue
+            df = data[ticker].dropna(how='all')
+            if df.empty or df['Close'].isna().all():
+                continue
+            frames[ticker] = df
+    elif len(tickers) == 1:
+        # 종목이 하나면 컬럼이 평평하게 오는 버전도 있음
+        df = data.dropna(how='all')
+        if not df.empty and not df['Close'].isna().all():
+            frames[tickers[0]] = df
+
+    for ticker, df in frames.items():
+        if isinstance(df.index, pd.DatetimeIndex) and df.index.tz is not None:
+            frames[ticker] = df.tz_convert(exchange_timezone(ticker))
+    return frames
+
+
+def _download_chunk(chunk, **kwargs):
+    # 실제 요청은 현재 시세 공급자(기본 Yahoo, 벤치마크에서는 재생 공급자)가 보냄
+    # 요청 수 / 걸린 시간 / 받은 표 크기는 계측 모듈에 기록
+    start = _time.perf_counter()
+    try:
+        data = get_provider().download(chunk, **kwargs)
+    except Exception:
+        record_upstream(len(chunk), 0, _time.perf_counter() - start, error=True)
+        raise
+    nbytes = int(data.memory_usage(index=True).sum()) if data is not None else 0
+    record_upstream(len(chunk), nbytes, _time.perf_counter() - start)
+    return data
+
+
+def download_bars(tickers, chunk_size=CHUNK_SIZE, failed=None, **kwargs):
+    # 청크마다 한 번씩만 요청하고, 실패한 청크의 종목은 결과에서 빠짐(N/A 처리)
+    # failed 리스트를 넘기면 요청 자체가 실패한 종목을 담아 줌 (빈 데이터와 구분용)
+    # 모든 요청은 요청 조절 스케줄러(토큰 버킷/재시도/서킷 브레이커)를 거칩니다.
+    scheduler = get_fetch_scheduler()
+    frames = {}
+    for chunk in chunked(list(tickers), chunk_size):
+        key = (tuple(chunk), tuple(sorted((k, str(v)) for k, v in kwargs.items())))
+        try:
+            data = scheduler.call(key, _download_chunk, chunk, cost=len(chunk), **kwargs)
+        except Exception:
+            if failed is not None:
+                failed.extend(chunk)
+            continue
+        frames.update(split_by_ticker(data, chunk))
+    return frames
+
+
+def is_final_session(target_date):
+    # 가장 늦게 끝나는 시장 기준으로도 날짜가 지났으면 더 이상 바뀌지 않는 세션
+    return datetime.now(ZoneInfo(LAST_CLOSING_TIMEZONE)).date() > target_date
+
+
+def download_final_bars(tickers, session_date, interval, store=None, store_key=None, **kwargs):
+    # 끝난 세션은 디스크 저장소에서 먼저 찾고, 없는 종목만 받아서 저장
+    # store_key: 같은 날짜/간격이라도 받는 구간이 다르면(기간 조회) 따로 저장할 키
+    store = store or get_bar_store()
+    store_key = store_key or interval
+    frames, missing = store.load(tickers, session_date, store_key)
+    if missing:
+        failed = []
+        fetched = download_bars(missing, failed=failed, interval=interval, **kwargs)
+        frames.update(fetched)
+        store.save(fetched, [t for t in missing if t not in failed], session_date, store_key)
+    return frames
+
+
+def last_session(df, ticker):
+    # 여러 세션이 섞인 분봉에서 마지막 세션만 남김
+    # 세션은 거래소 세션 날짜로 (선물은 저녁 개장부터가 다음 거래일 세션이라 자정에 끊지 않음)
+    if df.empty:
+        return df
+    days = exchange_for(ticker).session_dates(df.index)
+    return df[days == days[-1]]
+
+
+def fetch_intraday(tickers, target_date, is_today):
+    tickers = list(dict.fromkeys(tickers))
+
+    if is_today:
+        frames = download_bars(tickers, period="1d", interval="5m")
+        # 장 시작 전이거나 데이터가 없는 종목만 모아서 5일치로 한 번 더
+        missing = [t for t in tickers if t not in frames]
+        if missing:
+            recent = download_bars(missing, period="5d", interval="5m")
+            for ticker, df in recent.items():
+                frames[ticker] = last_session(df, ticker)
+    else:
+        start_dt = datetime.combine(target_date, datetime.min.time())
+        end_dt = start_dt + timedelta(days=1)
+        days_diff = (datetime.now() - start_dt).days
+        interval = "5m" if days_diff < 59 else "60m"
+        if is_final_session(target_date):
+            frames = download_final_bars(tickers, target_date, interval, start=start_dt, end=end_dt)
+        else:
+            frames = download_bars(tickers, start=start_dt, end=end_dt, interval=interval)
+
+    return {t: frames[t] for t in tickers if t in frames and not frames[t].empty}
+
+
+def fetch_range_bars(tickers, end_date, is_today, view_range):
+    # 여러 날 기간의 봉: 기간에 맞는 간격으로 받아 view_range.bar_rule 로 묶음
+    # (Yahoo 보관 한도를 넘는 오래된 기간은 더 굵은 봉으로 받음)
+    tickers = list(dict.fromkeys(tickers))
+    interval = view_range.interval_for(end_date)
+    start_dt = datetime.combine(view_range.start(end_date), datetime.min.time()) + timedelta(days=1)
+    end_dt = datetime.combine(end_date, datetime.min.time()) + timedelta(days=1)
+    if is_final_session(end_date):
+        frames = download_final_bars(
+            tickers, end_date, interval, store_key=f"{interval}:{view_range.key}", start=start_dt, end=end_dt
+        )
+    else:
+        frames = download_bars(tickers, start=start_dt, end=end_dt, interval=interval)
+    return {
+        t: resample_bars(frames[t], view_range.bar_rule)
+        for t in tickers if t in frames and not frames[t].empty
+    }
+
+
+# --------------------------------------------------------------------------
+# [기준가] 일봉 묶음 요청으로 전일 종가 / 당일 시가 구하기
+# --------------------------------------------------------------------------
+# 종목마다 Ticker.info 를 긁어오는 대신, 일봉 한 번으로 전 종목의 기준가를 계산합니다.
+# 전일 종가는 "세션 날짜보다 앞선 마지막 일봉 종가"로 정의하므로
+# 장 시작 전에 받아 둔 일봉으로도 장중 세션의 전일 종가를 그대로 구할 수 있습니다.
+
+class ReferencePrices:
+    def __init__(self, frames):
+        # {종목: Open/Close 가 있는 일봉} (날짜 인덱스, 거래소 시간대 인덱스, 봉 버퍼 뷰 모두 가능)
+        self.frames = frames
+        # 종목별 (날짜, 시가, 종가) 배열 (이어 붙인 배열의 재료)
+        self._arrays = {}
+        # 전 종목을 이어 붙인 배열. 트리맵(전 종목)과 차트 칸(한 종목)이 같은 lookup 으로 물어봄
+        self._stack = None
+        self._parts = ()
+
+    @classmethod
+    def from_daily(cls, frames):
+        # fetch_daily_window 결과(일봉)에서 바로 만들기. 날짜 배열은 처음 물어볼 때 종목별로 만듦
+        return cls(dict(frames))
+
+    @classmethod
+    def combine(cls, parts):
+        # 묶음별로 받은 기준가를 하나로. 이어 붙인 배열은 묶음마다 만들어 둔 것을 다시 씀
+        parts = list(parts)
+        frames = {}
+        for part in parts:
+            frames.update(part.frames)
+        combined = cls(frames)
+        combined._parts = parts
+        return combined
+
+    def _daily(self, ticker):
+        arrays = self._arrays.get(ticker)
+        if arrays is None and ticker not in self._arrays:
+            df = self.frames.get(ticker)
+            if isinstance(df, BarView) and not df.empty:
+                arrays = (
+                    _view_days(df),
+                    df.array('Open').astype(float),
+                    df.array('Close').astype(float),
+                )
+            elif df is not None and not df.empty:
+                arrays = (
+                    _index_days(df.index),
+                    df['Open'].to_numpy(dtype=float, na_value=np.nan),
+                    df['Close'].to_numpy(dtype=float, na_value=np.nan),
+                )
+            self._arrays[ticker] = arrays
+        return arrays
+
+    def _stacked(self):
+        # (종목 -> 번호, 정렬 키, 날짜, 시가, 종가): 종가가 있는 일봉만 (종목 번호, 날짜) 순으로
+        # 키 = 번호 * DAY_SPAN + 날짜(일) 이므로 searchsorted 한 번으로 종목마다 "그날까지의 마지막 봉"을 찾음
+        if self._stack is None:
+            if self._parts:
+                self._stack = _concat_stacks([part._stacked() for part in self._parts])
+            else:
+                self._stack = _build_stack({t: self._daily(t) for t in self.frames})
+        return self._stack
+
+    def lookup(self, tickers, days, inclusive=True):
+        # 종목마다 days(같은 길이, datetime64[D]) 이전의 마지막 종가 봉 -> (날짜, 시가, 종가) 배열
+        # inclusive 면 그날 봉까지 포함. 없으면 NaT / NaN
+        codes_by_ticker, keys, stack_days, opens, closes = self._stacked()
+        codes = np.array([codes_by_ticker.get(t, -1) for t in tickers], dtype=np.int64)
+        query = codes * DAY_SPAN + np.asarray(days, dtype='datetime64[D]').astype(np.int64)
+        pos = np.searchsorted(keys, query, side='right' if inclusive else 'left') - 1
+        found = (codes >= 0) & (pos >= 0)
+        pos = np.where(found, pos, 0)
+        if len(keys):
+            found &= keys[pos] // DAY_SPAN == codes
+        else:
+            # 일봉이 하나도 없으면 가리킬 자리가 없으므로 빈 값 한 칸을 붙여 둠
+            stack_days, opens, closes = np.array(['NaT'], dtype='datetime64[D]'), np.full(1, np.nan), np.full(1, np.nan)
+        return (
+            np.where(found, stack_days[pos], np.datetime64('NaT', 'D')),
+            np.where(found, opens[pos], np.nan),
+            np.where(found, closes[pos], np.nan),
+        )
+
+
+def _index_days(index):
+    # 일봉 인덱스 -> 거래소 현지 날짜 (시간대를 떼면 현지 시각이 남음, date 객체 인덱스도 그대로)
+    if isinstance(index, pd.DatetimeIndex):
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return index.values.astype('datetime64[D]')
+    return np.asarray(index, dtype='datetime64[D]')
+
+
+def _view_days(view):
+    # 봉 버퍼 뷰는 뷰의 인덱스(종목별 캐시)를 남기지 않고 시각 배열에서 바로
+    index = pd.DatetimeIndex(view.array('ts').view('datetime64[ns]'))
+    if view.tz:
+        index = index.tz_localize("UTC").tz_convert(view.tz)
+    return _index_days(index)
+
+
+# 이어 붙인 기준가 배열의 키에서 종목 번호 한 칸의 크기 (1970 년 이후 날짜 수보다 크게)
+DAY_SPAN = 1 << 32
+
+
+def _build_stack(arrays):
+    codes_by_ticker, codes, days, opens, closes = {}, [], [], [], []
+    for ticker, daily in arrays.items():
+        if daily is None:
+            continue
+        day, open_, close = daily
+        valid = ~np.isnan(close)
+        code = codes_by_ticker[ticker] = len(codes_by_ticker)
+        codes.append(np.full(int(valid.sum()), code, dtype=np.int64))
+        days.append(day[valid])
+        opens.append(open_[valid])
+        closes.append(close[valid])
+    if not codes:
+        empty = np.array([], dtype=np.int64)
+        return codes_by_ticker, empty, empty.astype('datetime64[D]'), empty.astype(float), empty.astype(float)
+    days = np.concatenate(days)
+    keys = np.concatenate(codes) * DAY_SPAN + days.astype(np.int64)
+    order = np.argsort(keys, kind='stable')
+    return codes_by_ticker, keys[order], days[order], np.concatenate(opens)[order], np.concatenate(closes)[order]
+
+
+def _concat_stacks(stacks):
+    # 묶음별 배열을 종목 번호만 밀어서 이어 붙임 (각 묶음이 정렬돼 있으므로 이어 붙여도 정렬됨)
+    codes_by_ticker, keys, offset = {}, [], 0
+    for part_codes, part_keys, *_ in stacks:
+        codes_by_ticker.update({t: code + offset for t, code in part_codes.items()})
+        keys.append(part_keys + offset * DAY_SPAN)
+        offset += len(part_codes)
+    if not stacks:
+        return _build_stack({})
+    columns = [np.concatenate([stack[i] for stack in stacks]) for i in (2, 3, 4)]
+    return (codes_by_ticker, np.concatenate(keys), *columns)
+
+
+def fetch_daily_window(tickers, target_date, is_today, view_range=None):
+    # 기준일까지의 최근 일봉. 배당 조정된 종가는 시세판의 전일 종가와 달라지므로 auto_adjust=False
+    # 여러 날 기간이면 기간 시작일 종가가 들어가도록 그만큼 앞에서부터
+    tickers = list(dict.fromkeys(tickers))
+    multi_day = view_range is not None and view_range.multi_day
+
+    if is_today and not multi_day:
+        return download_bars(tickers, period="5d", interval="1d", auto_adjust=False)
+
+    # 주말/연휴를 넘어 직전 거래일까지 닿도록 열흘 앞부터
+    first_date = view_range.start(target_date) if multi_day else target_date
+    start_dt = datetime.combine(first_date, datetime.min.time()) - timedelta(days=10)
+    end_dt = datetime.combine(target_date, datetime.min.time()) + timedelta(days=1)
+    if is_final_session(target_date):
+        store_key = f"1d:{view_range.key}" if multi_day else "1d"
+        return download_final_bars(
+            tickers, target_date, "1d", store_key=store_key, start=start_dt, end=end_dt, auto_adjust=False
+        )
+    return download_bars(tickers, start=start_dt, end=end_dt, interval="1d", auto_adjust=False)
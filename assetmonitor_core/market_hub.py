@@ -0,0 +1,187 @@
+import threading
+from collections import ChainMap
+from datetime import date
+
+from .intraday_cache import get_intraday_cache, load_intraday
+from .keyed_cache import KeyedCache
+from .market_data import ReferencePrices, fetch_daily_window, fetch_range_bars, is_final_session
+
+# --------------------------------------------------------------------------
+# [공용 허브] 모든 세션이 같이 쓰는 프로세스 단위 시세 캐시
+# --------------------------------------------------------------------------
+# 브라우저 탭마다 따로 새로고침이 돌면 보는 사람 수만큼 요청이 늘어나므로,
+# (종목 묶음, 날짜, 간격)이 같은 요청은 허브 한 곳에서 받아 모두가 나눠 씁니다.
+# 동시에 같은 요청이 들어오면 먼저 온 한 명만 실제로 받고 나머지는 그 결과를 기다립니다.
+# 돌려주는 데이터는 여러 세션이 공유하므로 읽기 전용으로 다뤄야 합니다.
+#
+# 트리맵과 차트는 snapshot() 한 벌(분봉 + 그 일봉에서 만든 기준가)만 읽습니다.
+# 같은 포트폴리오 묶음(progressive.ticker_groups)으로 부르므로 한 화면에서 받은 것을
+# 다른 화면이 그대로 쓰고, 같은 종목에는 같은 봉 / 같은 기준가로 계산한 숫자가 나옵니다.
+
+# 당일 데이터의 유효 시간 (자동 새로고침 주기와 같게)
+LIVE_TTL = 180
+# 기준가(전일 종가)는 거래일 안에서 거의 바뀌지 않음
+REFERENCE_TTL = 3600
+# 끝난 세션은 바뀌지 않지만 디스크 저장소에 있으므로 메모리에는 이 정도만 둠
+HISTORY_TTL = 3600
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    # 같은 key 로 동시에 들어온 호출을 하나로 합침
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+def _daily_key(view_range):
+    # 일봉은 기간마다 받는 구간이 달라 캐시 키의 간격 자리에 기간을 붙임
+    if view_range is None or not view_range.multi_day:
+        return "1d"
+    return f"1d:{view_range.key}"
+
+
+class MarketDataHub:
+    def __init__(self, live_ttl=LIVE_TTL, reference_ttl=REFERENCE_TTL, history_ttl=HISTORY_TTL):
+        self.live_ttl = live_ttl
+        self.reference_ttl = reference_ttl
+        self.history_ttl = history_ttl
+        self.cache = KeyedCache()
+        self._flight = SingleFlight()
+
+    def get(self, key, loader, ttl, tags=(), keep=None):
+        # keep(값) 이 거짓이면 돌려주기만 하고 저장하지 않음 (일부 묶음을 못 받은 결과 등)
+        found, value = self.cache.get(key, ttl)
+        if found:
+            return value
+
+        def load():
+            # 기다리는 사이 다른 호출이 이미 채워 두었으면 그대로 사용 (위에서 놓침으로 셌으므로 다시 세지 않음)
+            found, value = self.cache.get(key, ttl, count=False)
+            if found:
+                return value
+            value = loader()
+            if keep is not None and not keep(value):
+                return value
+            # 태그는 실제로 저장할 때만 만들도록 함수로 받아도 됨
+            self.cache.set(key, value, tags() if callable(tags) else tags)
+            return value
+
+        return self._flight.do(key, load)
+
+    def _is_live(self, target_date, is_today):
+        return is_today or not is_final_session(target_date)
+
+    def _tags(self, tickers, target_date, is_today):
+        tags = {("date", target_date)}
+        if self._is_live(target_date, is_today):
+            tags.add(("live", target_date))
+        tags.update(("ticker", t) for t in tickers)
+        return tags
+
+    def _fetch(self, kind, tickers, target_date, is_today, interval, loader, live_ttl):
+        tickers = tuple(dict.fromkeys(tickers))
+        ttl = live_ttl if self._is_live(target_date, is_today) else self.history_ttl
+        return self.get(
+            (kind, tickers, target_date, interval), lambda: loader(tickers, target_date, is_today),
+            ttl, self._tags(tickers, target_date, is_today),
+        )
+
+    def intraday(self, tickers, target_date, is_today, view_range=None):
+        # 여러 날 기간이면 기간용 봉(리샘플된 것)을 기간별로 따로 보관
+        if view_range is not None and view_range.multi_day:
+            return self._fetch(
+                "range", tickers, target_date, is_today, view_range.key,
+                lambda t, d, today: fetch_range_bars(t, d, today, view_range), self.live_ttl,
+            )
+        return self._fetch("intraday", tickers, target_date, is_today, "5m", load_intraday, self.live_ttl)
+
+    def daily_window(self, tickers, target_date, is_today, view_range=None):
+        return self._fetch(
+            "daily", tickers, target_date, is_today, _daily_key(view_range),
+            lambda t, d, today: fetch_daily_window(t, d, today, view_range), self.live_ttl,
+        )
+
+    def reference_prices(self, tickers, target_date, is_today, view_range=None):
+        # 같은 묶음의 일봉 항목에서 만듦 (기준가용 일봉을 따로 한 번 더 받지 않음)
+        return self._fetch(
+            "reference", tickers, target_date, is_today, _daily_key(view_range),
+            lambda t, d, today: ReferencePrices.from_daily(self.daily_window(t, d, today, view_range)),
+            self.reference_ttl,
+        )
+
+    def snapshot(self, tickers, target_date, is_today, view_range=None):
+        # 트리맵 등락률과 차트 칸 지표 / 그림이 같이 쓰는 한 벌: (분봉 또는 기간용 봉, 기준가)
+        return (
+            self.intraday(tickers, target_date, is_today, view_range),
+            self.reference_prices(tickers, target_date, is_today, view_range),
+        )
+
+    def derived(self, kind, tickers, target_date, is_today, loader, version=None, keep=None):
+        # 시세에서 계산한 결과(트리맵 표 등)도 같은 태그/유효 시간으로 보관
+        # version 을 주면 종목 묶음 대신 그 값(포트폴리오 내용 해시 등)으로 키를 만듦
+        ttl = self.live_ttl if self._is_live(target_date, is_today) else self.history_ttl
+        if version is not None:
+            key = (kind, target_date, version)
+        else:
+            tickers = tuple(dict.fromkeys(tickers))
+            key = (kind, tickers, target_date)
+        return self.get(key, loader, ttl, lambda: self._tags(tickers, target_date, is_today), keep)
+
+    # ----------------------------------------------------------------------
+    # 무효화 범위
+    # ----------------------------------------------------------------------
+    def invalidate_live(self, target_date):
+        # 해당 날짜의 아직 안 끝난 세션 데이터만 (끝난 세션은 바뀔 일이 없음)
+        return self.cache.invalidate(live=target_date)
+
+    def invalidate_tickers(self, tickers, target_date=None):
+        # 특정 종목(또는 섹터의 종목들)이 들어 있는 데이터만 비움.
+        # 증분 캐시는 오늘 분봉만 들고 있으므로 오늘(또는 날짜 없이 전체)을 비울 때만 그 종목을 다시 받음
+        tickers = list(tickers)
+        if target_date is None or target_date == date.today():
+            get_intraday_cache().invalidate(tickers)
+        return self.cache.invalidate(date=target_date, tickers=tickers)
+
+    def stats(self):
+        return self.cache.stats()
+
+    def clear(self):
+        self.cache.clear()
+
+
+def combine_snapshots(parts):
+    # 묶음별 snapshot() 결과를 (종목 -> 봉 매핑, 기준가) 하나로. 봉은 복사하지 않고 묶음 순서대로 찾아봄
+    parts = list(parts)
+    return ChainMap(*[bars for bars, _ in parts]), ReferencePrices.combine(ref for _, ref in parts)
@@ -0,0 +1,259 @@
+from collections import ChainMap
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from .bar_buffer import BarFrames, BarView
+from .bar_store import get_bar_store
+from .market_calendar import exchange_for
+
+# --------------------------------------------------------------------------
+# [계산 파이프라인] Streamlit 밖에서도 돌릴 수 있는 트리맵 / 차트 지표 계산
+# --------------------------------------------------------------------------
+# 화면 스크립트는 데이터를 받아 여기 함수에 넘기고 결과를 그리기만 합니다.
+# 같은 함수를 벤치마크가 재생 공급자 위에서 그대로 호출합니다.
+
+
+# 등락률을 못 구해 트리맵에서 빠지는 종목의 이유
+DROP_REASONS = {
+    "no_data": "데이터 없음",
+    "no_close": "종가 없음",
+    "no_open": "시가 없음",
+    "zero_price": "기준가 0",
+}
+
+
+def _last_bar(ticker, hist):
+    # (마지막 종가, 마지막 봉의 거래소 세션 날짜, 첫 시가)
+    # 봉 버퍼 뷰는 인덱스 / Series 를 만들지 않고 배열 끝값만 읽음
+    if isinstance(hist, BarView):
+        last = pd.DatetimeIndex(hist.array('ts')[-1:].view('datetime64[ns]'))
+        if hist.tz:
+            last = last.tz_localize("UTC")
+        close, first_open = float(hist.array('Close')[-1]), float(hist.array('Open')[0])
+    else:
+        last = hist.index[-1:]
+        close, first_open = float(hist['Close'].iloc[-1]), float(hist['Open'].iloc[0])
+    return close, pd.Timestamp(exchange_for(ticker).session_dates(last)[0]).date(), first_open
+
+
+def _past_sessions(tickers, sessions, now=None):
+    # 봉의 세션이 그 거래소의 지금 세션보다 앞선(이미 지난) 종목. 서버 날짜가 아니라 거래소 세션 날짜로 비교
+    now = now or datetime.now(timezone.utc)
+    current = {}
+    for ticker in tickers:
+        exchange = exchange_for(ticker)
+        if exchange not in current:
+            current[exchange] = exchange.session_date(now)
+    current = np.array([current[exchange_for(t)] for t in tickers], dtype='datetime64[D]')
+    return np.asarray(sessions, dtype='datetime64[D]') < current
+
+
+def change_baseline(reference, tickers, sessions, first_opens, range_start=None, now=None):
+    # 등락률 기준가. 트리맵(treemap_changes)과 차트 칸 지표(ticker_metric)가 같이 쓰는 하나의 규칙
+    # tickers / sessions(마지막 봉의 거래소 세션 날짜) / first_opens(첫 봉 시가)는 같은 길이의 배열
+    #   여러 날 기간            : 기간 시작일(range_start)까지의 마지막 종가
+    #   하루 기간, 지금 세션     : 그 세션 전 마지막 종가 (전일 종가)
+    #   하루 기간, 이미 지난 세션 : 그 세션 시가 (과거 날짜 / 장 시작 전에 보는 지난 세션은 시가 -> 종가)
+    # 기준가가 없으면 첫 봉 시가 (상장 직후 등)
+    if range_start is not None:
+        _, _, ref = reference.lookup(tickers, np.full(len(tickers), np.datetime64(range_start, 'D')))
+    else:
+        sessions = np.asarray(sessions, dtype='datetime64[D]')
+        _, _, previous_close = reference.lookup(tickers, sessions, inclusive=False)
+        days, opens, _ = reference.lookup(tickers, sessions, inclusive=True)
+        session_open = np.where(days == sessions, opens, np.nan)
+        ref = np.where(_past_sessions(tickers, sessions, now), session_open, previous_close)
+    return np.where(np.isnan(ref), first_opens, ref)
+
+
+_NS_PER_UNIT = {'s': 10**9, 'ms': 10**6, 'us': 10**3, 'ns': 1}
+
+
+def _frame_last_bars(frames, tickers):
+    # 종목별 DataFrame / BarView 에서 _last_bars 와 같은 모양으로 (봉이 없는 종목은 빠짐)
+    names, stamps, zones, closes, opens = [], [], [], [], []
+    for ticker in tickers:
+        hist = frames[ticker]
+        if hist is None or hist.empty:
+            continue
+        if isinstance(hist, BarView):
+            stamps.append(int(hist.array('ts')[-1]))
+            zones.append(hist.tz)
+            closes.append(float(hist.array('Close')[-1]))
+            opens.append(float(hist.array('Open')[0]))
+        else:
+            # 시간대가 붙은 인덱스의 정수 값은 UTC, 없는 인덱스는 현지 시각 그대로 (Timestamp 를 만들지 않고 ns 로)
+            stamps.append(int(hist.index.asi8[-1]) * _NS_PER_UNIT[hist.index.unit])
+            zones.append(str(hist.index.tz) if hist.index.tz is not None else None)
+            closes.append(float(hist['Close'].to_numpy()[-1]))
+            opens.append(float(hist['Open'].to_numpy()[0]))
+        names.append(ticker)
+    return names, np.array(stamps, dtype=np.int64), zones, np.array(closes, dtype=float), np.array(opens, dtype=float)
+
+
+def _session_days(tickers, stamps, zones):
+    # (종목, 봉 시각 ns, 시간대) -> 그 봉이 속한 거래소 세션 날짜. (거래소, 시간대)별로 한 번씩만 변환
+    # 시간대가 붙은 값은 UTC, 없는 값은 현지 시각. 선물은 저녁 개장 이후가 다음 거래일 세션
+    days = np.empty(len(stamps), dtype='datetime64[D]')
+    groups = {}
+    for i, (ticker, zone) in enumerate(zip(tickers, zones)):
+        groups.setdefault((exchange_for(ticker), zone), []).append(i)
+    for (exchange, zone), rows in groups.items():
+        index = pd.DatetimeIndex(stamps[rows].view('datetime64[ns]'))
+        if zone is not None:
+            index = index.tz_localize("UTC")
+        days[rows] = exchange.session_dates(index)
+    return days
+
+
+def _last_bars(intraday, tickers):
+    # 전 종목의 (종목, 마지막 봉의 세션 날짜, 마지막 종가, 첫 시가) 배열. 봉이 없는 종목은 빠짐
+    # 봉 버퍼에 든 묶음(BarFrames)은 버퍼 배열에서 한 번에, 나머지는 종목별로 끝값만 읽음
+    # 여러 묶음을 합친 ChainMap 은 앞 묶음부터 (ChainMap 의 찾기 순서와 같게)
+    sources = intraday.maps if isinstance(intraday, ChainMap) else [intraday]
+    names, stamps, zones, closes, opens = [], [], [], [], []
+    rest = list(tickers)
+    for source in sources:
+        if not rest:
+            break
+        found = [t for t in rest if t in source]
+        if isinstance(source, BarFrames):
+            part = (found, *source.last_bars(found))
+        else:
+            part = _frame_last_bars(source, found)
+        names += part[0]
+        stamps.append(part[1])
+        zones += part[2]
+        closes.append(part[3])
+        opens.append(part[4])
+        found = set(found)
+        rest = [t for t in rest if t not in found]
+    if not names:
+        return [], np.array([], dtype='datetime64[D]'), np.array([]), np.array([])
+    return names, _session_days(names, np.concatenate(stamps), zones), np.concatenate(closes), np.concatenate(opens)
+
+
+def treemap_changes(intraday, reference, tickers, target_date, view_range=None, now=None):
+    # 종목마다 한 번씩만 등락률(%)을 계산해 (Ticker, Change) 표와 빠진 종목 {종목: 이유} 를 돌려줌
+    # 차트 화면과 같은 한 벌(봉 + 기준가)에서 종목별 반복 없이 배열로 계산
+    #   현재가 : 마지막 분봉(또는 기간용 봉) 종가. 봉이 없으면 target_date 까지의 마지막 일봉 종가
+    #   기준가 : change_baseline (차트 칸 지표와 같은 규칙)
+    # 세션 날짜는 봉의 거래소 세션 날짜라서 서버 날짜와 상관없이 같은 규칙
+    tickers = list(dict.fromkeys(tickers))
+    names, shown, curr, first_open = _last_bars(intraday, tickers)
+
+    # 분봉이 없는 종목은 일봉만으로 (일봉도 없으면 데이터 없음)
+    with_bars = set(names)
+    no_bars = [t for t in tickers if t not in with_bars]
+    end = np.datetime64(target_date, 'D')
+    daily_days, daily_opens, daily_closes = reference.lookup(no_bars, np.full(len(no_bars), end))
+    has_daily = ~np.isnat(daily_days)
+    dropped = {t: "no_data" for t, ok in zip(no_bars, has_daily) if not ok}
+    names = np.array(names + [t for t, ok in zip(no_bars, has_daily) if ok], dtype=object)
+    shown = np.concatenate([shown, daily_days[has_daily]])
+    curr = np.concatenate([curr, daily_closes[has_daily]])
+    first_open = np.concatenate([first_open, daily_opens[has_daily]])
+
+    range_start = view_range.start(target_date) if view_range is not None and view_range.multi_day else None
+    ref = change_baseline(reference, names, shown, first_open, range_start, now)
+
+    no_close = np.isnan(curr)
+    no_open = ~no_close & np.isnan(ref)
+    zero = ~no_close & ~no_open & (ref == 0)
+    for reason, mask in (("no_close", no_close), ("no_open", no_open), ("zero_price", zero)):
+        dropped.update(dict.fromkeys(names[mask].tolist(), reason))
+
+    ok = ~(no_close | no_open | zero)
+    changes = pd.DataFrame({
+        'Ticker': pd.Series(names[ok], dtype=object),
+        'Change': (curr[ok] - ref[ok]) / ref[ok] * 100,
+    })
+    return changes, dropped
+
+
+def build_treemap_rows(index, intraday, reference, target_date, view_range=None, stored=None):
+    # index: PortfolioIndex, intraday / reference: 차트 화면과 같은 한 벌 (MarketDataHub.snapshot 또는 스냅샷)
+    # 등락률은 중복 없는 종목 단위로 한 번 계산해서 카테고리/섹터 행에 붙임
+    # stored: 저장소에서 읽은 (changes, dropped). 거기 있는 종목은 다시 계산하지 않음
+    tickers = index.tickers
+    if stored is not None:
+        known = set(stored[0]['Ticker']) | set(stored[1])
+        tickers = [t for t in tickers if t not in known]
+    changes, dropped = treemap_changes(intraday, reference, tickers, target_date, view_range)
+    if stored is not None:
+        changes = pd.concat([stored[0], changes], ignore_index=True)
+        dropped = {**stored[1], **dropped}
+
+    df_tree = index.rows.merge(changes, on='Ticker', how='inner')
+    df_tree['Label'] = df_tree['Ticker'] + "<br>" + df_tree['Change'].map("{:.2f}%".format).astype(str)
+    # 빠진 종목은 이유와 함께 남겨 화면에서 알려 줌
+    df_tree.attrs['dropped'] = dropped
+    return df_tree
+
+
+# --------------------------------------------------------------------------
+# [저장된 등락률] 끝난 세션의 트리맵 등락률은 로컬 저장소에 두고 다시 쓰기
+# --------------------------------------------------------------------------
+def changes_key(view_range=None):
+    # change_baseline 규칙(지난 세션은 시가 -> 종가)으로 계산한 값. 예전 규칙으로 저장된 값과 섞이지 않도록 접두어
+    return f"bars3:{view_range.key if view_range is not None else '1d'}"
+
+
+def load_final_changes(tickers, target_date, view_range=None, store=None):
+    # (changes, dropped, 저장 안 된 종목)
+    store = store or get_bar_store()
+    return store.load_changes(tickers, target_date, changes_key(view_range))
+
+
+def save_final_changes(changes, dropped, target_date, view_range=None, store=None):
+    # changes: Ticker / Change 열이 있는 표 (트리맵 행이면 종목이 여러 번 나올 수 있음)
+    # 데이터가 없어 빠진 종목은 받기 실패일 수 있으므로 기록하지 않음 (다음에 다시 받아 봄)
+    store = store or get_bar_store()
+    changes = changes[['Ticker', 'Change']].drop_duplicates('Ticker')
+    dropped = {t: reason for t, reason in dropped.items() if reason != "no_data"}
+    store.save_changes(changes, dropped, target_date, changes_key(view_range))
+
+
+class TickerMetric:
+    def __init__(self, ticker, current, diff, pct, label_suffix):
+        self.ticker = ticker
+        self.current = current
+        self.diff = diff
+        self.pct = pct
+        self.label_suffix = label_suffix
+
+    @property
+    def label(self):
+        return f"{self.ticker} {self.label_suffix}"
+
+    @property
+    def value(self):
+        return f"${self.current:,.2f}"
+
+    @property
+    def delta(self):
+        return f"{self.diff:.2f} ({self.pct:.2f}%)"
+
+
+def ticker_metric(ticker, hist, ref_prices, view_range=None, end_date=None, now=None):
+    # 차트 칸 위의 현재가 / 등락 (분봉이 없으면 None)
+    # 현재가는 트리맵과 같은 마지막 봉 종가, 기준점도 트리맵과 같은 change_baseline
+    if hist is None or hist.empty:
+        return None
+    curr, shown_date, first_open = _last_bar(ticker, hist)
+    sessions = np.array([shown_date], dtype='datetime64[D]')
+    multi_day = view_range is not None and view_range.multi_day
+    range_start = view_range.start(end_date or shown_date) if multi_day else None
+    ref_price = float(change_baseline(ref_prices, [ticker], sessions, np.array([first_open]), range_start, now)[0])
+    if multi_day:
+        label_suffix = f"({view_range.label})"
+    elif _past_sessions([ticker], sessions, now)[0]:
+        label_suffix = f"({shown_date.strftime('%m/%d')})"
+    else:
+        label_suffix = ""
+
+    diff = curr - ref_price
+    pct = (diff / ref_price) * 100 if ref_price != 0 else 0
+    return TickerMetric(ticker, curr, diff, pct, label_suffix)
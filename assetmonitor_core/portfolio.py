@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import tomllib
+
+import pandas as pd
+
+# --------------------------------------------------------------------------
+# [포트폴리오] 파일에서 읽어 한 번만 정리해 두는 종목 목록
+# --------------------------------------------------------------------------
+# 카테고리 > 섹터 > 종목 구조를 TOML 파일로 두고, 읽을 때 한 번만
+#   - 중복 없는 종목 목록 (처음 나온 순서)
+#   - 종목 -> (카테고리, 섹터) 소속
+#   - 트리맵 행 표
+#   - 내용 해시(version)
+# 를 만들어 둡니다. 캐시 키는 큰 dict 대신 version 을 씁니다.
+# 파일의 수정 시각이 바뀌면 서버 재시작 없이 다음 리런에서 다시 읽습니다.
+
+# 저장소 최상위의 portfolios/ (패키지 폴더 바깥)
+PORTFOLIO_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "portfolios")
+
+
+class PortfolioError(ValueError):
+    pass
+
+
+class PortfolioIndex:
+    def __init__(self, portfolio):
+        self.portfolio = portfolio
+
+        memberships = {}
+        rows = []
+        for category, sectors in portfolio.items():
+            for sector, tickers in sectors.items():
+                for ticker in tickers:
+                    memberships.setdefault(ticker, []).append((category, sector))
+                    rows.append((category, sector, ticker, 1))
+
+        self.tickers = tuple(memberships)
+        self.memberships = {ticker: tuple(places) for ticker, places in memberships.items()}
+        self.rows = pd.DataFrame(rows, columns=['Category', 'Sector', 'Ticker', 'Size'])
+        # 순서도 화면에 드러나므로 정렬하지 않은 그대로 해시
+        canonical = json.dumps(portfolio, ensure_ascii=False, separators=(",", ":"))
+        self.version = hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def subset(self, category, sectors):
+        # 화면에 펼친 섹터만 남긴 같은 구조의 dict
+        return {category: {
+            sector: tickers for sector, tickers in self.portfolio.get(category, {}).items() if sector in sectors
+        }}
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "rb") as f:
+            try:
+                raw = tomllib.load(f)
+            except tomllib.TOMLDecodeError as e:
+                raise PortfolioError(f"{os.path.basename(path)}: {e}") from e
+        return cls(validate(raw, os.path.basename(path)))
+
+
+def validate(raw, source="portfolio"):
+    # {카테고리: {섹터: [종목, ...]}} 모양인지 확인
+    if not raw:
+        raise PortfolioError(f"{source}: 카테고리가 없습니다")
+    for category, sectors in raw.items():
+        if not isinstance(sectors, dict):
+            raise PortfolioError(f"{source}: [{category}] 는 섹터 표여야 합니다")
+        for sector, tickers in sectors.items():
+            if not isinstance(tickers, list) or not all(isinstance(t, str) and t for t in tickers):
+                raise PortfolioError(f"{source}: {category} / {sector} 는 종목 문자열 목록이어야 합니다")
+    return raw
+
+
+class PortfolioFile:
+    # 수정 시각이 바뀌었을 때만 다시 읽음. 고치다 만 파일이면 마지막으로 읽힌 내용을 계속 씀
+    def __init__(self, path):
+        self.path = path
+        self.error = None
+        self._index = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            if self._index is None:
+                raise PortfolioError(f"포트폴리오 파일을 찾을 수 없습니다: {self.path}") from e
+            self.error = str(e)
+            return self._index
+
+        if mtime == self._mtime:
+            return self._index
+
+        with self._lock:
+            if mtime != self._mtime:
+                try:
+                    self._index = PortfolioIndex.from_file(self.path)
+                    self.error = None
+                except (OSError, PortfolioError) as e:
+                    if self._index is None:
+                        raise
+                    self.error = str(e)
+                self._mtime = mtime
+        return self._index
+
+
+_files = {}
+_files_lock = threading.Lock()
+
+
+def get_portfolio_file(path):
+    path = os.path.abspath(path)
+    with _files_lock:
+        if path not in _files:
+            _files[path] = PortfolioFile(path)
+        return _files[path]
+
+
+def portfolio_tickers(paths):
+    # 여러 포트폴리오 파일의 종목 (중복 없이, 처음 나온 순서). 고치다 만 파일은 마지막으로 읽힌 내용으로
+    tickers = []
+    for path in paths:
+        try:
+            tickers.extend(get_portfolio_file(path).get().tickers)
+        except PortfolioError as e:
+            print(f"skip {path}: {e}", file=sys.stderr, flush=True)
+    return list(dict.fromkeys(tickers))
@@ -0,0 +1,126 @@
+import threading
+import time as _time
+from dataclasses import dataclass, field
+from datetime import date
+
+from .bar_buffer import BarBuffer
+from .instrumentation import get_registry
+from .intraday_cache import get_intraday_cache
+from .market_calendar import RefreshPlanner
+from .market_hub import SingleFlight
+from .market_data import ReferencePrices, fetch_daily_window
+
+# --------------------------------------------------------------------------
+# [백그라운드 수집] 페이지 리런과 상관없이 주기적으로 시세를 미리 받아 두기
+# --------------------------------------------------------------------------
+# 서버당 스레드 하나가 정해진 주기로 포트폴리오의 당일 분봉/일봉을 갱신하고
+# 완성된 스냅샷을 통째로 바꿔 끼웁니다. 화면 쪽은 최신 스냅샷을 읽기만 하므로
+# 리런이 네트워크를 기다리지 않습니다.
+# 장이 닫힌 거래소의 종목은 이전 스냅샷의 봉을 그대로 옮겨 담습니다 (세션 달력 기준).
+
+# 갱신 주기 (분봉은 꼬리만 받으므로 자동 새로고침보다 짧게 둬도 부담이 적음)
+PREFETCH_INTERVAL = 60
+# 종목당 일봉 칸 수 (5일치 일봉 + 여유). 일봉도 분봉처럼 봉 버퍼에 담아 스냅샷은 뷰만 들고 있음
+DAILY_BARS = 8
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: int
+    created_at: float
+    session_date: date
+    intraday: dict = field(repr=False)
+    daily: dict = field(repr=False)
+    reference: ReferencePrices = field(repr=False)
+
+    @property
+    def age(self):
+        return _time.time() - self.created_at
+
+
+class PrefetchScheduler(threading.Thread):
+    def __init__(self, tickers, interval=PREFETCH_INTERVAL):
+        super().__init__(name="market-prefetch", daemon=True)
+        self.tickers = list(dict.fromkeys(tickers))
+        self.interval = interval
+        self._snapshot = None
+        self._version = 0
+        self._ready = threading.Event()
+        self._stop_event = threading.Event()
+        self._wake = threading.Event()
+        self._flight = SingleFlight()
+        self._daily_planner = RefreshPlanner()
+        self._daily = BarBuffer(DAILY_BARS)
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    def wait_for_snapshot(self, timeout=None):
+        # 서버가 막 떴을 때만 첫 스냅샷을 기다림 (이후에는 바로 반환)
+        self._ready.wait(timeout)
+        return self._snapshot
+
+    def set_tickers(self, tickers):
+        # 포트폴리오가 바뀌면 기다리지 않고 바로 새 목록으로 한 번 수집
+        tickers = list(dict.fromkeys(tickers))
+        if tickers != self.tickers:
+            self.tickers = tickers
+            self._wake.set()
+
+    def set_interval(self, interval):
+        # 주기를 줄이면 지금 기다리는 중인 대기도 바로 끝냄
+        shorter = interval < self.interval
+        self.interval = interval
+        if shorter:
+            self._wake.set()
+
+    def refresh(self):
+        # 수동 새로고침과 주기 갱신이 겹치면 진행 중인 갱신 하나로 합침
+        return self._flight.do("refresh", self._refresh)
+
+    def _refresh(self):
+        today = date.today()
+        tickers = self.tickers
+        intraday = get_intraday_cache().refresh(tickers)
+
+        # 일봉은 날짜가 바뀌면 전부, 같은 날이면 장중/막 닫힌 종목과 아직 없는 종목만
+        # (받은 종목은 새 구간에 통째로 쓰므로 이전 스냅샷의 뷰는 그대로)
+        previous = self._snapshot
+        if previous is None or previous.session_date != today:
+            self._daily.clear()
+        due = set(self._daily_planner.due(tickers))
+        stale = [t for t in tickers if t in due or t not in self._daily]
+        fetched = fetch_daily_window(stale, today, True) if stale else {}
+        self._daily_planner.mark(fetched)
+        for ticker, df in fetched.items():
+            self._daily.write(ticker, df, replace=True)
+        daily = self._daily.frames(tickers)
+
+        self._version += 1
+        # 참조 교체 한 번으로 발행하므로 읽는 쪽은 항상 완성된 스냅샷만 봄
+        self._snapshot = Snapshot(
+            version=self._version,
+            created_at=_time.time(),
+            session_date=today,
+            intraday=intraday,
+            daily=daily,
+            reference=ReferencePrices.from_daily(daily),
+        )
+        self._ready.set()
+        return self._snapshot
+
+    def run(self):
+        registry = get_registry()
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                # 이번 주기는 건너뛰고 이전 스냅샷을 계속 사용 (스냅샷이 낡아 가는 것을 지표로 알 수 있게 셈)
+                registry.inc("prefetch_errors_total", help="Failed background prefetch refreshes")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
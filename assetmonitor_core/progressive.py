@@ -0,0 +1,118 @@
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .instrumentation import bind_trace, current_trace, get_registry
+from .market_data import chunked
+
+# --------------------------------------------------------------------------
+# [점진 표시] 묶음마다 동시에 받고 도착하는 대로 화면을 채우기
+# --------------------------------------------------------------------------
+# 전 종목을 한 번에 받은 뒤 그리면 느린 종목 하나가 화면 전체를 붙잡으므로,
+# 화면 스크립트는 섹터/칸 자리를 먼저 다 만들어 두고
+#   - 차트 화면: 펼친 섹터의 종목이 든 묶음을 동시에 받아 섹터가 다 모이는 대로 그 자리를 채움
+#   - 트리맵   : 전 종목 묶음을 동시에 받아 TREEMAP_DEADLINE 초가 되면
+#                그때까지 모인 종목으로 먼저 그리고, 다 모이면 전체로 바꿔 그림
+# 두 화면 모두 포트폴리오 전체를 TREEMAP_GROUP_SIZE 개씩 나눈 같은 묶음(ticker_groups)으로 받으므로
+# 허브에서 같은 항목을 읽고, 한 화면에서 받은 묶음은 다른 화면에서 다시 받지 않습니다.
+# 실제 요청은 그대로 허브 / 요청 조절 스케줄러를 거치므로 동시에 받아도 요청 예산은 같습니다.
+# 수집 스레드에서는 Streamlit 함수를 부르지 않고, 그리기는 항상 스크립트 스레드가 합니다.
+
+# 동시에 받는 묶음 수 (서버 프로세스 전체에서 공유)
+PROGRESSIVE_WORKERS = int(os.environ.get("ASSETMONITOR_PROGRESSIVE_WORKERS", "6"))
+# 트리맵을 일부 종목으로라도 먼저 그릴 시각(초, 0 이면 다 모일 때까지 기다림)
+TREEMAP_DEADLINE = float(os.environ.get("ASSETMONITOR_TREEMAP_DEADLINE", "3"))
+TREEMAP_GROUP_SIZE = 25
+
+# fetch_groups 가 마감 시각에 한 번 끼워 넣는 표시
+DEADLINE = "deadline"
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_fetch_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, PROGRESSIVE_WORKERS), thread_name_prefix="progressive-fetch")
+        return _pool
+
+
+def _traced(fn, trace):
+    def run(*args):
+        with bind_trace(trace):
+            return fn(*args)
+    return run
+
+
+def _load(loader, tickers):
+    try:
+        return loader(tickers)
+    except Exception:
+        # 한 묶음이 실패해도 나머지는 그대로 그림 (그 묶음 종목은 N/A)
+        get_registry().inc("progressive_group_errors_total", help="Progressive fetch groups that raised")
+        return None
+
+
+def fetch_groups(groups, loader, deadline=None, concurrent=True):
+    # groups: {키: 종목 목록}. loader(종목 목록) 결과를 끝나는 순서대로 (키, 결과) 로 돌려줌 (실패하면 None)
+    # deadline(초)이 지나도 남은 묶음이 있으면 그 시점에 (DEADLINE, 남은 묶음 수) 를 한 번 끼워 넣음
+    # concurrent=False 면 이 스레드에서 차례로 (데이터가 이미 메모리에 있을 때)
+    if not concurrent:
+        for key, tickers in groups.items():
+            yield key, _load(loader, tickers)
+        return
+
+    run = _traced(_load, current_trace())
+    pending = {get_fetch_pool().submit(run, loader, tickers): key for key, tickers in groups.items()}
+    timeout = deadline or None
+    while pending:
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            timeout = None
+            yield DEADLINE, len(pending)
+            continue
+        for future in done:
+            yield pending.pop(future), future.result()
+
+
+def ticker_groups(tickers, size=TREEMAP_GROUP_SIZE, wanted=None):
+    # wanted 를 주면 그 종목이 하나라도 든 묶음만 (나누는 방식은 그대로라 키 / 종목이 같은 묶음)
+    groups = dict(enumerate(chunked(list(dict.fromkeys(tickers)), size)))
+    if wanted is not None:
+        wanted = set(wanted)
+        groups = {key: group for key, group in groups.items() if wanted.intersection(group)}
+    return groups
+
+
+def owner_groups(groups, portfolio):
+    # 주어진 묶음 중 portfolio 종목이 든 것만, owner 는 종목 -> 그 종목이 든 묶음의 키
+    owner = {}
+    for key, tickers in groups.items():
+        for ticker in tickers:
+            owner.setdefault(ticker, key)
+    shown = {t for sectors in portfolio.values() for tickers in sectors.values() for t in tickers}
+    owner = {t: key for t, key in owner.items() if t in shown}
+    used = set(owner.values())
+    return {key: tickers for key, tickers in groups.items() if key in used}, owner
+
+
+def fetch_sectors(portfolio, groups, loader, concurrent=True):
+    # 섹터에 필요한 묶음이 다 도착하는 대로 ((카테고리, 섹터), {종목: 그 종목 묶음의 결과}) 를 돌려줌
+    # groups: 포트폴리오 전체를 나눈 묶음(ticker_groups). 그중 portfolio 종목이 든 것만 받음
+    groups, owner = owner_groups(groups, portfolio)
+    waiting = {
+        (category, sector): tickers
+        for category, sectors in portfolio.items() for sector, tickers in sectors.items()
+    }
+    results = {}
+    for key, result in fetch_groups(groups, loader, concurrent=concurrent):
+        results[key] = result
+        for sector_key, tickers in list(waiting.items()):
+            if all(owner[t] in results for t in tickers):
+                del waiting[sector_key]
+                yield sector_key, {t: results[owner[t]] for t in tickers}
+    # 종목이 없는 섹터 (묶음이 하나도 없을 때 포함)
+    for sector_key in waiting:
+        yield sector_key, {}
@@ -0,0 +1,292 @@
+import logging
+import os
+import threading
+import time as _time
+import zlib
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from .fetch_scheduler import RateLimited, UpstreamTimeout
+
+# --------------------------------------------------------------------------
+# [시세 공급자] upstream 을 갈아 끼울 수 있게 하는 인터페이스
+# --------------------------------------------------------------------------
+# download() 는 yf.download(group_by='ticker') 와 같은 모양
+# (컬럼 = (종목, 필드) MultiIndex)의 DataFrame 을 돌려줍니다.
+#   - YahooProvider : 실제 yfinance
+#   - ReplayProvider: 녹화해 둔(또는 합성한) 봉 파일을 지연 시간을 흉내 내며 재생
+#     네트워크 없이 벤치마크/재현용으로 씁니다.
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class MarketDataProvider:
+    name = "base"
+
+    def __init__(self):
+        self.calls = 0
+        self.tickers_requested = 0
+        self._lock = threading.Lock()
+
+    def _count(self, tickers):
+        with self._lock:
+            self.calls += 1
+            self.tickers_requested += len(tickers)
+
+    def download(self, tickers, **kwargs):
+        raise NotImplementedError
+
+
+# --------------------------------------------------------------------------
+# [Yahoo] yf.download 는 종목별 오류를 삼키고 로그로만 남기므로
+# 호출한 스레드의 yfinance 오류 로그를 모아 429 / 타임아웃을 예외로 바꿉니다.
+# --------------------------------------------------------------------------
+RATE_LIMIT_MARKERS = ("Too Many Requests", "Rate limited", "429")
+# 일시 오류로 볼 것만: 시간 초과(curl 28)와 맺어진 연결이 끊긴 경우(curl 52 / 56, reset / aborted)
+# 연결 거부 / 주소를 못 찾는 경우는 설정 문제일 수 있으므로 재시도 / 회로 대상이 아님 (일반 오류로 실패)
+TIMEOUT_MARKERS = (
+    "timed out", "Timeout", "curl: (28)",
+    "curl: (52)", "curl: (56)", "Connection reset", "Connection aborted", "RemoteDisconnected",
+)
+
+
+class _YFinanceErrorLog(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self._local = threading.local()
+
+    def start(self):
+        self._local.messages = []
+
+    def stop(self):
+        messages = getattr(self._local, 'messages', None) or []
+        self._local.messages = None
+        return messages
+
+    def emit(self, record):
+        messages = getattr(self._local, 'messages', None)
+        if messages is not None:
+            messages.append(record.getMessage())
+
+
+_error_log = _YFinanceErrorLog()
+logging.getLogger("yfinance").addHandler(_error_log)
+
+
+class YahooProvider(MarketDataProvider):
+    name = "yahoo"
+
+    def download(self, tickers, **kwargs):
+        import yfinance as yf
+
+        self._count(tickers)
+        _error_log.start()
+        try:
+            data = yf.download(tickers, group_by='ticker', threads=True, progress=False, **kwargs)
+        except yf.exceptions.YFRateLimitError as e:
+            raise RateLimited(str(e)) from e
+        finally:
+            messages = " ".join(_error_log.stop())
+
+        if any(marker in messages for marker in RATE_LIMIT_MARKERS):
+            raise RateLimited(messages[:200])
+        if any(marker in messages for marker in TIMEOUT_MARKERS):
+            raise UpstreamTimeout(messages[:200])
+        return data
+
+
+# --------------------------------------------------------------------------
+# [재생] 녹화된 봉 파일을 재생하는 공급자
+# --------------------------------------------------------------------------
+# 파일 구성: <fixture_dir>/<interval>/<종목>.csv  (Datetime, Open, High, Low, Close, Volume)
+# 분봉의 Datetime 은 거래소 시간대가 붙은 시각, 일봉은 날짜만 저장합니다.
+
+PERIOD_SESSIONS = {"1d": 1, "5d": 5, "1mo": 21, "3mo": 63}
+
+
+def _fixture_name(ticker):
+    # 파일 이름에 쓰기 곤란한 문자(^, =)는 바꿔서 저장
+    return ticker.replace("^", "_caret_").replace("=", "_eq_") + ".csv"
+
+
+class ReplayProvider(MarketDataProvider):
+    name = "replay"
+
+    def __init__(self, fixture_dir, latency=0.0, latency_per_ticker=0.0):
+        super().__init__()
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self.latency_per_ticker = latency_per_ticker
+        self._frames = {}
+
+    def load(self, ticker, interval):
+        key = (ticker, interval)
+        if key not in self._frames:
+            path = os.path.join(self.fixture_dir, interval, _fixture_name(ticker))
+            if not os.path.exists(path):
+                self._frames[key] = None
+            else:
+                df = pd.read_csv(path, index_col=0)
+                if interval.endswith("d"):
+                    df.index = pd.DatetimeIndex(pd.to_datetime(df.index), name='Date')
+                else:
+                    # 저장된 시각은 UTC 오프셋이 붙어 있으므로 UTC 로 읽은 뒤 거래소 시간대로
+                    from .market_data import exchange_timezone
+                    index = pd.DatetimeIndex(pd.to_datetime(df.index, utc=True), name='Datetime')
+                    df.index = index.tz_convert(exchange_timezone(ticker))
+                self._frames[key] = df
+        return self._frames[key]
+
+    def preload(self, tickers, intervals=("5m", "60m", "1d")):
+        for ticker in tickers:
+            for interval in intervals:
+                self.load(ticker, interval)
+
+    def _select(self, df, interval, period, start, end):
+        if period is not None:
+            sessions = PERIOD_SESSIONS.get(period, 1)
+            dates = pd.Index(df.index.date).unique()
+            keep = set(dates[-sessions:])
+            return df[[d in keep for d in df.index.date]]
+
+        index = df.index
+        if start is not None:
+            start = pd.Timestamp(start)
+            if index.tz is not None and start.tzinfo is None:
+                start = start.tz_localize(index.tz)
+            df = df[df.index >= start]
+        if end is not None:
+            end = pd.Timestamp(end)
+            if index.tz is not None and end.tzinfo is None:
+                end = end.tz_localize(index.tz)
+            df = df[df.index < end]
+        return df
+
+    def download(self, tickers, period=None, start=None, end=None, interval="1d", **kwargs):
+        self._count(tickers)
+        delay = self.latency + self.latency_per_ticker * len(tickers)
+        if delay:
+            _time.sleep(delay)
+
+        frames = {}
+        for ticker in tickers:
+            df = self.load(ticker, interval)
+            if df is None:
+                continue
+            frames[ticker] = self._select(df, interval, period, start, end)
+        return combine_frames(frames, tickers)
+
+
+def combine_frames(frames, tickers):
+    # {종목: DataFrame} -> yf.download(group_by='ticker') 모양
+    # 시간대가 섞이면 yfinance 처럼 UTC 로 맞춰서 합침
+    tzs = {str(df.index.tz) for df in frames.values() if not df.empty and df.index.tz is not None}
+    parts = {}
+    for ticker in tickers:
+        df = frames.get(ticker)
+        if df is None:
+            df = pd.DataFrame(columns=FIELDS, dtype='float64')
+        elif len(tzs) > 1 and df.index.tz is not None:
+            df = df.tz_convert('UTC')
+        parts[ticker] = df.reindex(columns=FIELDS)
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, axis=1, sort=True, names=['Ticker', 'Price'])
+
+
+# --------------------------------------------------------------------------
+# [녹화 / 합성] 재생용 봉 파일 만들기
+# --------------------------------------------------------------------------
+def write_fixture(fixture_dir, ticker, interval, df):
+    folder = os.path.join(fixture_dir, interval)
+    os.makedirs(folder, exist_ok=True)
+    out = df.reindex(columns=FIELDS)
+    if interval.endswith("d"):
+        out = out.copy()
+        out.index = pd.DatetimeIndex(out.index).tz_localize(None).normalize()
+    out.index.name = 'Date' if interval.endswith("d") else 'Datetime'
+    out.to_csv(os.path.join(folder, _fixture_name(ticker)))
+
+
+def record_fixtures(tickers, fixture_dir, provider=None, days=5, history="6mo"):
+    # 실제 upstream 에서 받아 파일로 저장 (run_benchmarks.py --record)
+    #   5m : 최근 days 일,  60m / 1d : 최근 history (분기 조회용)
+    from .market_data import split_by_ticker
+
+    provider = provider or YahooProvider()
+    tickers = list(dict.fromkeys(tickers))
+    recorded = set()
+    for interval, period, kwargs in (
+        ("5m", f"{days}d", {}),
+        ("60m", history, {}),
+        ("1d", history, {"auto_adjust": False}),
+    ):
+        frames = split_by_ticker(provider.download(tickers, period=period, interval=interval, **kwargs), tickers)
+        for ticker, df in frames.items():
+            write_fixture(fixture_dir, ticker, interval, df)
+        recorded.update(frames)
+    return sorted(recorded)
+
+
+def synthesize_fixtures(tickers, fixture_dir, sessions=5, end_date=None, seed=0, history=70):
+    # 녹화 없이 벤치마크를 돌릴 수 있도록 종목별로 재현 가능한 가짜 봉을 생성
+    # 봉은 세션 달력의 거래일 / 거래 구간(점심 휴장, 전날 저녁 개장 포함)에만 만듦
+    #   5m : 마지막 sessions 거래일,  60m / 1d : 마지막 history 거래일 (분기 조회용)
+    from .market_calendar import exchange_for
+
+    end_date = end_date or date.today()
+    candidates = pd.bdate_range(end=end_date, periods=history + 30)
+    for ticker in tickers:
+        rng = np.random.default_rng(zlib.crc32(ticker.encode()) + seed)
+        exchange = exchange_for(ticker)
+        days = [d.date() for d in candidates if exchange.is_trading_day(d.date())][-history:]
+        price = float(rng.uniform(20, 500))
+
+        daily_rows, minute, hourly = [], [], []
+        for i, day in enumerate(days):
+            ranges = [pd.date_range(open_at, close_at, freq="5min", inclusive="left")
+                      for open_at, close_at in exchange.segments(day)]
+            index = ranges[0].append(ranges[1:])
+            closes = price * np.exp(np.cumsum(rng.normal(0, 0.002, len(index))))
+            opens = np.concatenate([[price], closes[:-1]])
+            volume = rng.integers(1_000, 100_000, len(index))
+            highs, lows = np.maximum(opens, closes) * 1.001, np.minimum(opens, closes) * 0.999
+            daily_rows.append((day, opens[0], highs.max(), lows.min(), closes[-1], volume.sum()))
+            if i >= len(days) - sessions:
+                minute.append((index, opens, highs, lows, closes, volume))
+            # Yahoo 처럼 개장 시각부터 한 시간(5분봉 12개)씩, 봉 시각은 그 시간의 시작
+            starts = np.arange(0, len(index), 12)
+            ends = np.r_[starts[1:], len(index)] - 1
+            hourly.append((index[starts], opens[starts], np.maximum.reduceat(highs, starts),
+                           np.minimum.reduceat(lows, starts), closes[ends], np.add.reduceat(volume, starts)))
+            price = float(closes[-1])
+
+        for interval, parts in (("5m", minute), ("60m", hourly)):
+            index = parts[0][0].append([part[0] for part in parts[1:]])
+            columns = [np.concatenate([part[i] for part in parts]) for i in range(1, 6)]
+            write_fixture(fixture_dir, ticker, interval, pd.DataFrame(dict(zip(FIELDS, columns)), index=index))
+        daily = pd.DataFrame(daily_rows, columns=['Date'] + FIELDS).set_index('Date')
+        write_fixture(fixture_dir, ticker, "1d", daily)
+
+
+# --------------------------------------------------------------------------
+# [현재 공급자] 기본은 Yahoo, 벤치마크/재현 때 바꿔 끼움
+# --------------------------------------------------------------------------
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = YahooProvider()
+        return _provider
+
+
+def set_provider(provider):
+    global _provider
+    with _provider_lock:
+        _provider = provider
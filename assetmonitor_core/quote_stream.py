@@ -0,0 +1,347 @@
+import os
+import threading
+import time as _time
+from collections.abc import Mapping
+from dataclasses import replace
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from .instrumentation import get_registry
+from .market_calendar import exchange_for
+
+# --------------------------------------------------------------------------
+# [실시간 시세] 스트리밍 체결가를 받아 메모리에서 5분봉으로 묶기
+# --------------------------------------------------------------------------
+# 실시간 모드에서는 3분마다 전체를 다시 받는 대신 서버당 연결 하나로 포트폴리오 종목의
+# 체결가를 구독하고, 들어오는 대로 create_chart 가 쓰는 것과 같은 5분봉(OHLCV)으로 묶습니다.
+# 화면은 짧은 주기로 리런해도 메모리만 읽습니다.
+#
+#   QuoteFeed        : 구독/수신 인터페이스 (기본 yfinance WebSocket,
+#                      ASSETMONITOR_QUOTE_URL 로 로컬 대역 서버를 가리킬 수 있음)
+#   BarAggregator    : 체결가 -> 종목별 봉 (정규장 안의 체결만, 세션 달력 기준)
+#   QuoteStream      : 연결/재연결, 구독 종목 변경을 맡는 스레드
+#   overlay(snapshot): 받아 둔 스냅샷의 분봉 뒤에 실시간 봉을 이어 붙인 스냅샷
+#                      (일봉은 기준가 계산에만 쓰이고 기준가는 체결과 상관없으므로 그대로)
+#
+# 받아 둔 봉(공식 봉)이 기준이고, 실시간 봉은 그 마지막 봉부터만 덧붙입니다.
+# 마지막 봉은 진행 중일 수 있으므로 고가/저가/종가/거래량을 실시간 값으로 넓힙니다.
+
+QUOTE_URL = os.environ.get("ASSETMONITOR_QUOTE_URL", "wss://streamer.finance.yahoo.com/?version=2")
+# 실시간 모드의 화면 리런 주기(초)
+LIVE_REFRESH_SECONDS = int(os.environ.get("ASSETMONITOR_LIVE_REFRESH", "5"))
+# 스트림이 붙어 있는 동안의 백그라운드 수집 주기(초). 공식 봉과 맞춰 보는 용도라 길게
+LIVE_PREFETCH_INTERVAL = 600
+
+BAR_SECONDS = 300
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 60.0
+
+
+class QuoteFeed:
+    # 체결가 스트림 하나 (연결 하나). listen 은 연결이 끊기거나 close 될 때까지 돌아옴
+    def subscribe(self, symbols):
+        raise NotImplementedError
+
+    def unsubscribe(self, symbols):
+        raise NotImplementedError
+
+    def listen(self, handler):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+class YahooQuoteFeed(QuoteFeed):
+    def __init__(self, url=QUOTE_URL):
+        import yfinance as yf
+        self._ws = yf.WebSocket(url=url, verbose=False)
+
+    def subscribe(self, symbols):
+        self._ws.subscribe(list(symbols))
+
+    def unsubscribe(self, symbols):
+        self._ws.unsubscribe(list(symbols))
+
+    def listen(self, handler):
+        self._ws.listen(handler)
+
+    def close(self):
+        self._ws.close()
+
+
+# --------------------------------------------------------------------------
+# 봉 만들기
+# --------------------------------------------------------------------------
+def _minute_bucket(ticker, seconds):
+    # 5분봉 칸 (시간대 차이가 5분 단위라 UTC 로 잘라도 현지 경계와 같음)
+    return int(seconds) // BAR_SECONDS * BAR_SECONDS
+
+
+class BarAggregator:
+    def __init__(self, bucket=_minute_bucket):
+        self._bucket = bucket
+        self._bars = {}
+        self._day_volume = {}
+        # 종목별 지금 묶고 있는 거래일. 새 세션의 첫 체결이 오면 지난 세션 봉은 버림 (서버가 며칠 떠 있어도 하루치만)
+        self._sessions = {}
+        self._updated = {}
+        self._lock = threading.Lock()
+
+    def add(self, ticker, price, seconds, day_volume=None):
+        # 체결 하나. 거래량은 누적 거래량(day_volume)의 증가분
+        start = self._bucket(ticker, seconds)
+        session = exchange_for(ticker).session_date(datetime.fromtimestamp(seconds, timezone.utc))
+        with self._lock:
+            current = self._sessions.get(ticker)
+            if current is not None and session < current:
+                # 지난 세션의 늦게 온 체결
+                return
+            if session != current:
+                self._sessions[ticker] = session
+                self._bars.pop(ticker, None)
+                self._day_volume.pop(ticker, None)
+            volume = 0.0
+            if day_volume is not None:
+                previous = self._day_volume.get(ticker)
+                if previous is not None and day_volume >= previous:
+                    volume = day_volume - previous
+                self._day_volume[ticker] = day_volume
+
+            bars = self._bars.setdefault(ticker, {})
+            bar = bars.get(start)
+            if bar is None:
+                bars[start] = [price, price, price, price, volume]
+            else:
+                bar[1] = max(bar[1], price)
+                bar[2] = min(bar[2], price)
+                bar[3] = price
+                bar[4] += volume
+            self._updated[ticker] = self._updated.get(ticker, 0) + 1
+
+    def version(self, ticker):
+        return self._updated.get(ticker)
+
+    def tickers(self):
+        with self._lock:
+            return list(self._bars)
+
+    def frame(self, ticker):
+        # 실시간 봉 DataFrame (거래소 시간대 인덱스) 또는 None
+        with self._lock:
+            bars = self._bars.get(ticker)
+            if not bars:
+                return None
+            starts = np.fromiter(bars, dtype=np.int64, count=len(bars))
+            values = np.array(list(bars.values()), dtype=float)
+        order = np.argsort(starts)
+        index = pd.to_datetime(starts[order], unit="s", utc=True).tz_convert(exchange_for(ticker).timezone)
+        return pd.DataFrame(values[order], index=index, columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+
+
+def merge_live(base, live, ticker):
+    # 받아 둔 봉 뒤에 실시간 봉 잇기. 공식 봉보다 앞선 실시간 봉은 버림
+    if live is None or live.empty:
+        return base
+    if base is None or base.empty:
+        return live
+    live = _align_index(live, base.index.tz)
+    last = base.index[-1]
+    live = live[live.index >= last]
+    if live.empty:
+        return base
+    # 받아 둔 봉이 아직 지난 세션이면(장 시작 전에 받은 스냅샷, 백그라운드 수집 주기 사이) 새 세션 봉만
+    # 두 세션을 이으면 가격 범위 / 상승·하락 색이 지난 세션까지 걸쳐 계산됨
+    sessions = exchange_for(ticker).session_dates(base.index[-1:].append(live.index[:1]))
+    if sessions[1] > sessions[0]:
+        return live
+    base = base[['Open', 'High', 'Low', 'Close', 'Volume']]
+    if live.index[0] == last:
+        # 진행 중이던 마지막 봉: 시가는 공식 봉, 나머지는 둘을 합친 범위 (거래량은 겹칠 수 있어 큰 쪽)
+        head = base.iloc[-1]
+        tick = live.iloc[0]
+        merged = pd.DataFrame([[
+            head['Open'], max(head['High'], tick['High']), min(head['Low'], tick['Low']), tick['Close'],
+            max(head['Volume'], tick['Volume']),
+        ]], index=base.index[-1:], columns=base.columns)
+        return pd.concat([base.iloc[:-1], merged, live.iloc[1:]])
+    return pd.concat([base, live])
+
+
+def _align_index(live, tz):
+    # 실시간 봉(거래소 시간대)을 받아 둔 봉의 인덱스 모양에 맞춤
+    # 시간대 없는 인덱스(yfinance 일봉 등)는 거래소 현지 시각으로 보고 비교
+    if tz is None:
+        return live.set_axis(live.index.tz_localize(None))
+    return live.set_axis(live.index.tz_convert(tz))
+
+
+class LiveFrames(Mapping):
+    # {종목: 받아 둔 봉 + 실시간 봉}. 종목 DataFrame 은 그 종목에 새 체결이 있을 때만 다시 만듦
+    def __init__(self, base, aggregator):
+        self._base = base
+        self._aggregator = aggregator
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, ticker):
+        version = self._aggregator.version(ticker)
+        if version is None:
+            return self._base[ticker]
+        cached = self._frames.get(ticker)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        df = merge_live(self._base.get(ticker), self._aggregator.frame(ticker), ticker)
+        if df is None:
+            raise KeyError(ticker)
+        with self._lock:
+            self._frames[ticker] = (version, df)
+        return df
+
+    def __iter__(self):
+        return iter(dict.fromkeys([*self._base, *self._aggregator.tickers()]))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, ticker):
+        return ticker in self._base or self._aggregator.version(ticker) is not None
+
+
+# --------------------------------------------------------------------------
+# 연결 스레드
+# --------------------------------------------------------------------------
+# 서버당 하나. 실시간 모드를 처음 켠 세션이 start_quote_stream 으로 띄우고,
+# 떠 있는 동안은 모든 세션이 get_quote_stream 으로 같은 봉을 씀
+_stream = None
+_stream_lock = threading.Lock()
+_feed_factory = YahooQuoteFeed
+
+
+def start_quote_stream(tickers):
+    global _stream
+    with _stream_lock:
+        if _stream is None:
+            _stream = QuoteStream(tickers)
+            _stream.start()
+        return _stream
+
+
+def get_quote_stream():
+    return _stream
+
+
+def set_quote_feed_factory(factory):
+    # 테스트/로컬 대역용 QuoteFeed 로 바꾸기 (다음 연결부터)
+    global _feed_factory
+    _feed_factory = factory
+    if _stream is not None:
+        _stream.feed_factory = factory
+
+
+class QuoteStream(threading.Thread):
+    def __init__(self, tickers, feed_factory=None):
+        super().__init__(name="quote-stream", daemon=True)
+        self.tickers = list(dict.fromkeys(tickers))
+        self.feed_factory = feed_factory or _feed_factory
+        self.minutes = BarAggregator(_minute_bucket)
+        self.ticks = 0
+        self.last_tick_at = None
+        self.connected = False
+        self._feed = None
+        self._subscribed = set()
+        self._feed_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._overlays = {}
+        self._overlay_lock = threading.Lock()
+
+    def on_message(self, message):
+        # 디코딩된 체결 메시지 하나 ({'id', 'price', 'time'(ms), 'day_volume', ...})
+        ticker = message.get("id")
+        price = message.get("price")
+        if ticker not in self._subscribed or price is None or "time" not in message:
+            return
+        seconds = int(message["time"]) / 1000
+        # 정규장 밖 체결은 5분봉에 넣지 않음 (받아 둔 봉도 정규장만)
+        if not exchange_for(ticker).is_open(datetime.fromtimestamp(seconds, timezone.utc)):
+            return
+        day_volume = float(message["day_volume"]) if "day_volume" in message else None
+        self.minutes.add(ticker, float(price), seconds, day_volume)
+        self.ticks += 1
+        self.last_tick_at = _time.time()
+
+    def set_tickers(self, tickers):
+        # 포트폴리오가 바뀌면 붙어 있는 연결에서 구독만 바꿈
+        tickers = list(dict.fromkeys(tickers))
+        if tickers == self.tickers:
+            return
+        self.tickers = tickers
+        with self._feed_lock:
+            feed = self._feed
+            if feed is None:
+                return
+            added = [t for t in tickers if t not in self._subscribed]
+            removed = [t for t in self._subscribed if t not in tickers]
+            try:
+                if added:
+                    feed.subscribe(added)
+                if removed:
+                    feed.unsubscribe(removed)
+                self._subscribed = set(tickers)
+            except Exception:
+                # 구독이 실패하면 연결을 끊어 재연결 때 새 목록으로 구독
+                feed.close()
+
+    def run(self):
+        delay = RECONNECT_DELAY
+        registry = get_registry()
+        while not self._stop_event.is_set():
+            try:
+                feed = self.feed_factory()
+                with self._feed_lock:
+                    self._feed = feed
+                    self._subscribed = set(self.tickers)
+                    feed.subscribe(self.tickers)
+                self.connected = True
+                delay = RECONNECT_DELAY
+                feed.listen(self.on_message)
+            except Exception:
+                registry.inc("quote_stream_errors_total", help="Quote stream connection failures")
+            finally:
+                self.connected = False
+                with self._feed_lock:
+                    if self._feed is not None:
+                        try:
+                            self._feed.close()
+                        except Exception:
+                            pass
+                    self._feed = None
+            if self._stop_event.wait(delay):
+                break
+            registry.inc("quote_stream_reconnects_total", help="Quote stream reconnects")
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    def stop(self):
+        self._stop_event.set()
+        with self._feed_lock:
+            if self._feed is not None:
+                self._feed.close()
+
+    def overlay(self, snapshot):
+        # 받아 둔 스냅샷 + 실시간 봉. 같은 스냅샷이면 LiveFrames 를 재사용해 새 체결이 없는 종목은 다시 안 만듦
+        if snapshot is None or self.last_tick_at is None:
+            return snapshot
+        with self._overlay_lock:
+            frames = self._overlays.get(snapshot.version)
+            if frames is None:
+                frames = LiveFrames(snapshot.intraday, self.minutes)
+                self._overlays = {snapshot.version: frames}
+        # 일봉 / 기준가(전일 종가)는 실시간 체결과 상관없으므로 받아 둔 것을 그대로
+        return replace(
+            snapshot,
+            version=(snapshot.version, self.ticks),
+            created_at=max(snapshot.created_at, self.last_tick_at),
+            intraday=frames,
+        )
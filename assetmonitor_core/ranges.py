@@ -0,0 +1,129 @@
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------------------------------
+# [조회 기간] 하루 / 주 / 월 / 분기
+# --------------------------------------------------------------------------
+# 기간이 길어져도 화면으로 보내는 양이 늘지 않도록
+#   1) 기간에 맞는 간격으로 받아 서버에서 한 번 더 묶고 (리샘플)
+#   2) 차트 선은 LTTB 로 차트당 POINT_BUDGET 개 점만 남깁니다.
+# 기간은 (시작일, 끝일] 이고 등락률은 "시작일까지의 마지막 종가 -> 끝일까지의 마지막 종가" 입니다.
+
+# 차트 하나에 그리는 최대 점 수 (하루치 5분봉 78개는 그대로)
+POINT_BUDGET = 120
+
+# Yahoo 가 분봉을 주는 기간 한도 (일)
+MINUTE_HISTORY_DAYS = 59
+HOURLY_HISTORY_DAYS = 729
+MINUTE_INTERVALS = ("1m", "2m", "5m", "15m", "30m", "90m")
+
+
+@dataclass(frozen=True)
+class ViewRange:
+    key: str
+    label: str
+    weeks: int = 0
+    months: int = 0
+    # 받을 봉 간격 / 서버에서 묶을 간격 (None 이면 그대로)
+    fetch_interval: str = "5m"
+    bar_rule: str = None
+    # 트리맵 색이 끝까지 가는 등락률(±%). 기간이 길면 움직임도 커지므로 넓힘
+    color_limit: float = 3.0
+
+    @property
+    def multi_day(self):
+        return bool(self.weeks or self.months)
+
+    def start(self, end_date):
+        # 기간 시작일 (이날 종가가 등락률의 기준)
+        if not self.multi_day:
+            return end_date
+        return (pd.Timestamp(end_date) - pd.DateOffset(weeks=self.weeks, months=self.months)).date()
+
+    def interval_for(self, end_date, today=None):
+        # 기간이 Yahoo 분봉 보관 한도를 넘어가면 한 단계 굵은 봉으로
+        age = ((today or date.today()) - self.start(end_date)).days
+        if self.fetch_interval in MINUTE_INTERVALS and age >= MINUTE_HISTORY_DAYS:
+            return "60m" if age < HOURLY_HISTORY_DAYS else "1d"
+        if self.fetch_interval == "60m" and age >= HOURLY_HISTORY_DAYS:
+            return "1d"
+        return self.fetch_interval
+
+
+RANGES = {
+    "1d": ViewRange("1d", "일"),
+    "1w": ViewRange("1w", "주", weeks=1, fetch_interval="5m", bar_rule="15min", color_limit=6.0),
+    "1mo": ViewRange("1mo", "월", months=1, fetch_interval="60m", color_limit=10.0),
+    "3mo": ViewRange("3mo", "분기", months=3, fetch_interval="60m", bar_rule="2h", color_limit=20.0),
+}
+DEFAULT_RANGE = RANGES["1d"]
+
+
+# --------------------------------------------------------------------------
+# [리샘플] 거래소 현지 시각 기준으로 봉을 rule 간격으로 묶기
+# --------------------------------------------------------------------------
+# 종목마다 DataFrame.resample 을 부르면 수천 종목에서 느리므로 numpy 로 경계만 찾아 묶습니다.
+# 묶은 봉의 시각은 그 안의 마지막 실제 봉 시각이라 장 밖 시각이 생기지 않습니다.
+def resample_bars(df, rule):
+    if rule is None or df.empty:
+        return df
+    step = pd.Timedelta(rule).value
+    local = df.index.tz_localize(None) if df.index.tz is not None else df.index
+    bins = local.as_unit("ns").asi8 // step
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    if len(starts) == len(df):
+        return df
+
+    ends = np.r_[starts[1:], len(df)] - 1
+    values = {name: df[name].to_numpy(dtype=float, na_value=np.nan) for name in ('Open', 'High', 'Low', 'Close')}
+    volume = df['Volume'].to_numpy(dtype=float, na_value=np.nan) if 'Volume' in df else np.zeros(len(df))
+    return pd.DataFrame({
+        'Open': values['Open'][starts],
+        'High': np.fmax.reduceat(values['High'], starts),
+        'Low': np.fmin.reduceat(values['Low'], starts),
+        'Close': values['Close'][ends],
+        'Volume': np.add.reduceat(np.nan_to_num(volume), starts),
+    }, index=df.index[ends])
+
+
+# --------------------------------------------------------------------------
+# [LTTB] Largest-Triangle-Three-Buckets 로 선 모양을 살리면서 점 수 줄이기
+# --------------------------------------------------------------------------
+def lttb_indices(y, budget=POINT_BUDGET):
+    # 남길 점의 위치 (x 는 봉 순서). 처음/끝 점은 항상 남김
+    n = len(y)
+    if budget >= n or budget < 3:
+        return np.arange(n)
+
+    # 빈 종가는 앞뒤 값으로 메워 면적 계산에서 빠지지 않게
+    y = pd.Series(np.asarray(y, dtype=float)).ffill().bfill().fillna(0.0).to_numpy()
+    x = np.arange(n, dtype=float)
+    # 가운데 점들을 budget-2 개 구간으로 나눔
+    edges = np.linspace(1, n - 1, budget - 1).astype(int)
+    selected = np.empty(budget, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(budget - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # 다음 구간의 평균점 (마지막 구간 다음은 끝 점)
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(df, budget=POINT_BUDGET):
+    # 종가 선 기준으로 고른 위치와, 거래량은 건너뛴 봉까지 합친 값
+    # 돌려주는 위치(positions)는 여러 날 차트의 X 좌표로도 씀
+    positions = lttb_indices(df['Close'].to_numpy(dtype=float, na_value=np.nan), budget)
+    closes = df['Close'].iloc[positions]
+    volume = np.nan_to_num(df['Volume'].to_numpy(dtype=float, na_value=np.nan))
+    if len(positions) < len(df):
+        volume = np.add.reduceat(volume, positions)
+    return positions, closes, volume
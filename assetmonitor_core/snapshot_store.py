@@ -0,0 +1,232 @@
+import json
+import os
+import threading
+from collections.abc import Mapping
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from .market_data import ReferencePrices
+from .prefetch import Snapshot
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+# --------------------------------------------------------------------------
+# [스냅샷 파일] 수집 워커가 발행하고 화면 프로세스들이 메모리 매핑으로 읽는 Arrow 파일
+# --------------------------------------------------------------------------
+# 화면 서버를 여러 대 띄우면 서버마다 포트폴리오 전체를 따로 받게 되므로,
+# ASSETMONITOR_SNAPSHOT_DIR 를 주면 upstream 수집은 ingest_worker.py 하나만 하고
+# 화면 프로세스는 그 폴더의 최신 스냅샷을 읽기만 합니다.
+#
+#   {버전}.intraday.arrow / {버전}.daily.arrow
+#       모든 종목의 봉을 이어 붙인 긴 표 하나 (ts + FIELDS 열, 레코드 배치 하나)
+#       종목별 (시작 위치, 행 수, 시간대)는 스키마 메타데이터에
+#   CURRENT
+#       최신 버전의 목록 파일. 봉 파일을 다 쓴 뒤 임시 파일 -> os.replace 로 바꿔 끼우므로
+#       읽는 쪽은 항상 완성된 버전만 봄
+#
+# 읽는 쪽은 파일을 메모리 매핑하고 종목 DataFrame 을 처음 꺼낼 때 그 구간의 뷰로 만듭니다.
+# (복사 없음, 같은 서버의 여러 프로세스는 같은 페이지 캐시를 나눠 씀)
+# 지난 버전 파일은 KEEP_VERSIONS 개까지만 남깁니다. 이미 매핑한 프로세스는 파일이 지워져도
+# 매핑이 살아 있으므로 읽던 스냅샷을 끝까지 씁니다.
+# pyarrow 가 필요합니다 (없으면 이 기능만 쓸 수 없음).
+
+SNAPSHOT_DIR = os.environ.get("ASSETMONITOR_SNAPSHOT_DIR")
+MANIFEST = "CURRENT"
+KEEP_VERSIONS = 3
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("스냅샷 파일을 쓰려면 pyarrow 가 필요합니다: pip install pyarrow")
+
+
+# --------------------------------------------------------------------------
+# 쓰기
+# --------------------------------------------------------------------------
+def frames_to_table(frames):
+    # {종목: 봉 DataFrame} -> (ts, Open, ..., Volume) 긴 표. ts 는 UTC ns (시간대 없는 봉은 그대로)
+    frames = {t: df for t, df in frames.items() if df is not None and not df.empty}
+    tickers, offsets, timezones = [], [], []
+    offset = 0
+    for ticker, df in frames.items():
+        tickers.append(ticker)
+        offsets.append([offset, len(df)])
+        timezones.append(str(df.index.tz) if df.index.tz is not None else None)
+        offset += len(df)
+
+    def column(name):
+        parts = [df[name].to_numpy(dtype=float, na_value=np.nan) if name in df else np.full(len(df), np.nan)
+                 for df in frames.values()]
+        return np.concatenate(parts) if parts else np.empty(0)
+
+    ts = [pd.DatetimeIndex(df.index).as_unit("ns").asi8 for df in frames.values()]
+    table = pa.table({
+        'ts': np.concatenate(ts) if ts else np.empty(0, dtype=np.int64),
+        **{name: column(name) for name in FIELDS},
+    })
+    meta = {"tickers": tickers, "offsets": offsets, "tz": timezones}
+    return table.replace_schema_metadata({"frames": json.dumps(meta)})
+
+
+def _write_atomic(path, write):
+    tmp = f"{path}.tmp-{os.getpid()}"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+class SnapshotWriter:
+    def __init__(self, directory=None, keep=KEEP_VERSIONS):
+        _require_pyarrow()
+        self.directory = directory or SNAPSHOT_DIR
+        if not self.directory:
+            raise ValueError("스냅샷 폴더가 없습니다 (ASSETMONITOR_SNAPSHOT_DIR)")
+        self.keep = keep
+        os.makedirs(self.directory, exist_ok=True)
+        # 워커를 다시 띄워도 버전이 되돌아가지 않도록 마지막 발행 버전에서 이어감
+        manifest = read_manifest(self.directory)
+        self.version = manifest["version"] if manifest else 0
+
+    def _write_table(self, name, table):
+        path = os.path.join(self.directory, name)
+
+        def write(tmp):
+            with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+
+        _write_atomic(path, write)
+
+    def publish(self, snapshot):
+        # 봉 파일 두 개를 먼저 다 쓰고 CURRENT 를 마지막에 바꿔 끼움
+        self.version += 1
+        files = {kind: f"{self.version:010d}.{kind}.arrow" for kind in ("intraday", "daily")}
+        self._write_table(files["intraday"], frames_to_table(snapshot.intraday))
+        self._write_table(files["daily"], frames_to_table(snapshot.daily))
+
+        manifest = {
+            "version": self.version,
+            "created_at": snapshot.created_at,
+            "session_date": snapshot.session_date.isoformat(),
+            "files": files,
+        }
+
+        def write(tmp):
+            with open(tmp, "w") as f:
+                json.dump(manifest, f)
+
+        _write_atomic(os.path.join(self.directory, MANIFEST), write)
+        self._prune()
+        return self.version
+
+    def _prune(self):
+        for name in os.listdir(self.directory):
+            version = name.split(".", 1)[0]
+            if name.endswith(".arrow") and version.isdigit() and int(version) <= self.version - self.keep:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+# --------------------------------------------------------------------------
+# 읽기
+# --------------------------------------------------------------------------
+def read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class SnapshotFrames(Mapping):
+    # 메모리 매핑한 긴 표를 {종목: DataFrame} 처럼. 종목 DataFrame 은 처음 꺼낼 때 만든 뒤 재사용
+    def __init__(self, table):
+        meta = json.loads(table.schema.metadata[b"frames"])
+        self._places = {
+            ticker: (offset, rows, tz)
+            for ticker, (offset, rows), tz in zip(meta["tickers"], meta["offsets"], meta["tz"])
+        }
+        # 레코드 배치가 하나이고 빈 값(null)이 없으므로 numpy 배열은 매핑된 버퍼를 그대로 가리킴
+        self._columns = {
+            name: (table.column(name).chunk(0).to_numpy() if table.num_rows else np.empty(0))
+            for name in ['ts', *FIELDS]
+        }
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, ticker):
+        df = self._frames.get(ticker)
+        if df is not None:
+            return df
+        offset, rows, tz = self._places[ticker]
+        window = slice(offset, offset + rows)
+        index = pd.DatetimeIndex(self._columns['ts'][window].view("datetime64[ns]"))
+        if tz is not None:
+            index = index.tz_localize("UTC").tz_convert(tz)
+        df = pd.DataFrame({name: self._columns[name][window] for name in FIELDS}, index=index, copy=False)
+        with self._lock:
+            return self._frames.setdefault(ticker, df)
+
+    def __iter__(self):
+        return iter(self._places)
+
+    def __len__(self):
+        return len(self._places)
+
+    def __contains__(self, ticker):
+        return ticker in self._places
+
+
+def _map_table(path):
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+class SnapshotReader:
+    # 화면 프로세스 쪽. CURRENT 가 바뀌었을 때만 새 버전을 매핑함
+    def __init__(self, directory=None):
+        _require_pyarrow()
+        self.directory = directory or SNAPSHOT_DIR
+        self._snapshot = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def latest(self):
+        # 최신 스냅샷 (아직 발행된 게 없으면 None)
+        try:
+            mtime = os.stat(os.path.join(self.directory, MANIFEST)).st_mtime_ns
+        except OSError:
+            return self._snapshot
+        if mtime == self._mtime:
+            return self._snapshot
+
+        with self._lock:
+            if mtime != self._mtime:
+                manifest = read_manifest(self.directory)
+                if manifest is not None and (self._snapshot is None or manifest["version"] != self._snapshot.version):
+                    try:
+                        self._snapshot = self._load(manifest)
+                    except (OSError, pa.ArrowInvalid):
+                        # 읽는 사이 정리된 옛 버전이면 다음 호출에서 새 목록으로 다시
+                        return self._snapshot
+                self._mtime = mtime
+        return self._snapshot
+
+    def _load(self, manifest):
+        files = manifest["files"]
+        daily = SnapshotFrames(_map_table(os.path.join(self.directory, files["daily"])))
+        return Snapshot(
+            version=manifest["version"],
+            created_at=manifest["created_at"],
+            session_date=date.fromisoformat(manifest["session_date"]),
+            intraday=SnapshotFrames(_map_table(os.path.join(self.directory, files["intraday"]))),
+            daily=daily,
+            reference=ReferencePrices.from_daily(daily),
+        )
@@ -0,0 +1,266 @@
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+from .charts import create_chart, create_sector_chart, create_treemap, figure_bytes
+from .dashboard import get_market_hub, refresh_live_data
+from .instrumentation import payload_measured, phase, record_payload, ticker_timer
+from .market_data import ReferencePrices, is_final_session
+from .market_hub import combine_snapshots
+from .pipeline import DROP_REASONS, build_treemap_rows, load_final_changes, save_final_changes, ticker_metric
+from .progressive import DEADLINE, TREEMAP_DEADLINE, fetch_groups, fetch_sectors, ticker_groups
+
+# --------------------------------------------------------------------------
+# [차트 뷰] 카테고리 > 펼친 섹터의 종목 차트 격자
+# --------------------------------------------------------------------------
+# 종목마다 따로 부르지 않고 트리맵과 같은 포트폴리오 묶음으로 공용 허브에서 (봉, 기준가) 한 벌을 받습니다.
+# 허브가 ttl(180초) 동안 결과를 모든 세션 / 두 화면과 나눠 쓰므로 탭이 늘거나 화면을 바꿔도 요청은 늘지 않습니다.
+# 150여 개 차트를 매번 다 그리지 않고, 고른 카테고리의 펼친 섹터만 데이터를 받고 그립니다.
+def sector_charts(index, selected_date, view_range, live_snapshot, cols=4):
+    portfolio = index.portfolio
+    is_today = selected_date == date.today()
+
+    col_category, col_sectors, col_mode = st.columns([1, 2, 0.6], vertical_alignment="bottom")
+    with col_category:
+        chart_category = st.selectbox("카테고리", list(portfolio), key="chart_category")
+    category_sectors = portfolio[chart_category]
+    with col_sectors:
+        open_sectors = st.multiselect(
+            "섹터", list(category_sectors), default=list(category_sectors)[:1],
+            key=f"chart_sectors_{chart_category}"
+        )
+    with col_mode:
+        # 섹터마다 figure 하나(격자)로 그리기 / 끄면 종목마다 개별 차트
+        sector_figure = st.toggle("섹터 묶음 차트", value=True, key="sector_figure")
+    shown_portfolio = index.subset(chart_category, open_sectors)
+
+    if not shown_portfolio[chart_category]:
+        st.info("펼쳐 볼 섹터를 골라 주세요.")
+
+    # 자리부터 다 만들어 둠 (섹터 제목 + 칸마다 빈 자리). 데이터는 아래에서 섹터별로 동시에 받아
+    # 다 모인 섹터부터 채우므로 느린 종목 하나가 아래 섹터들을 붙잡지 않음
+    slots = {}
+    for category, sectors in shown_portfolio.items():
+        st.header(f"{category}")
+
+        for sector, tickers in sectors.items():
+            col_head, col_refresh = st.columns([20, 1], vertical_alignment="bottom")
+            with col_head:
+                st.subheader(f"{sector}")
+            with col_refresh:
+                # 이 섹터 종목만 다시 받기
+                if st.button('🔄', key=f"refresh_{category}_{sector}"):
+                    refresh_live_data(selected_date, tickers)
+                    st.rerun()
+            grid = st.columns(cols)
+            cells = [grid[idx % cols].empty() for idx in range(len(tickers))]
+            for cell, ticker in zip(cells, tickers):
+                cell.caption(f"{ticker} 불러오는 중…")
+            slots[(category, sector)] = (cells, st.empty() if sector_figure else None)
+            st.write("")
+        st.divider()
+
+    hub = get_market_hub()
+
+    def load_group(tickers):
+        # 수집 스레드에서 실행되므로 Streamlit 함수는 부르지 않음
+        if live_snapshot is not None:
+            # 오늘 데이터는 백그라운드 스냅샷에서 바로 읽음 (네트워크 대기 없음)
+            return live_snapshot.intraday, live_snapshot.reference
+        with phase("fetch_snapshot"):
+            return hub.snapshot(tickers, selected_date, is_today, view_range)
+
+    # 섹터마다 (그 섹터 종목이 든 묶음들이) 다 도착하는 대로 자리 채우기
+    arrivals = fetch_sectors(
+        shown_portfolio, ticker_groups(index.tickers), load_group, concurrent=live_snapshot is None
+    )
+    for (category, sector), loaded in arrivals:
+        tickers = shown_portfolio[category][sector]
+        cells, chart_slot = slots[(category, sector)]
+        # 묶음 요청이 실패한 종목은 빈 데이터로 (N/A)
+        loaded = {t: loaded.get(t) or ({}, ReferencePrices({})) for t in tickers}
+
+        for idx, (ticker, cell) in enumerate(zip(tickers, cells)):
+            # 칸마다 (지표 + 개별 차트) 걸린 시간을 종목별로 기록
+            with cell.container(), ticker_timer(ticker):
+                try:
+                    intraday, ref_prices = loaded[ticker]
+                    hist = intraday.get(ticker, pd.DataFrame())
+                    metric = ticker_metric(ticker, hist, ref_prices, view_range=view_range, end_date=selected_date)
+
+                    if metric is None:
+                        st.warning(f"{ticker}: N/A")
+                        continue
+
+                    st.metric(label=metric.label, value=metric.value, delta=metric.delta)
+
+                    if not sector_figure:
+                        with phase("create_chart"):
+                            chart = create_chart(ticker, hist, multi_day=view_range.multi_day)
+                        unique_key = f"chart_{category}_{sector}_{ticker}_{idx}"
+                        with phase("plotly_chart"):
+                            st.plotly_chart(chart, width="stretch", config={'staticPlot': True}, key=unique_key)
+                        if payload_measured():
+                            with phase("payload_size"):
+                                record_payload(figure_bytes(chart))
+
+                except Exception:
+                    st.error(f"Error: {ticker}")
+
+        if sector_figure:
+            frames = {t: loaded[t][0].get(t) for t in tickers}
+            with phase("create_chart"):
+                sector_chart = create_sector_chart(tickers, frames, cols=cols, multi_day=view_range.multi_day)
+            with phase("plotly_chart"):
+                chart_slot.plotly_chart(
+                    sector_chart, width="stretch",
+                    config={'staticPlot': True}, key=f"sector_chart_{category}_{sector}"
+                )
+            if payload_measured():
+                with phase("payload_size"):
+                    record_payload(figure_bytes(sector_chart))
+
+
+# --------------------------------------------------------------------------
+# [트리맵 뷰] 트리맵 데이터 / figure 준비
+# --------------------------------------------------------------------------
+# 허브 캐시에 (날짜, 포트폴리오 버전, 스냅샷 버전, 기간) 단위로 보관: 포트폴리오 파일이 바뀌거나
+# 새 스냅샷이 발행되면 다시 계산하고, 수동 새로고침 때는 해당 날짜의 진행 중 데이터만 비워짐
+# 받기에 실패한 묶음이 있는 표는 보관하지 않음 (빈 칸이 보관 시간 내내 남지 않고 다음 리런에서 다시 받음)
+def get_treemap_data(index, target_date, is_today, snapshot=None, view_range=None, on_partial=None):
+    snapshot_version = snapshot.version if snapshot is not None else None
+    return get_market_hub().derived(
+        "treemap", index.tickers, target_date, is_today,
+        lambda: build_treemap_data(index, target_date, is_today, snapshot, view_range, on_partial),
+        version=(index.version, snapshot_version, view_range.key if view_range else None),
+        keep=lambda df_tree: not df_tree.attrs.get('failed_groups'),
+    )
+
+
+# 만든 figure 도 같은 데이터 버전 + 표시 옵션(기간, 색 범위) 단위로 보관: 다른 위젯을 눌러 생긴
+# 리런이나 다른 세션은 px.treemap 경로 집계 / 색 매핑을 다시 하지 않고 그대로 씀
+# (데이터와 같은 태그로 저장되므로 새로고침 때 같이 비워짐, 공유 객체라 고치지 말 것)
+def get_treemap_figure(index, target_date, is_today, snapshot=None, view_range=None):
+    snapshot_version = snapshot.version if snapshot is not None else None
+    color_limit = view_range.color_limit if view_range else 3.0
+    return get_market_hub().derived(
+        "treemap_figure", index.tickers, target_date, is_today,
+        lambda: build_treemap_figure(index, target_date, is_today, snapshot, view_range, color_limit),
+        version=(index.version, snapshot_version, view_range.key if view_range else None, color_limit),
+    )
+
+
+def build_treemap_figure(index, target_date, is_today, snapshot, view_range, color_limit):
+    df_tree = get_treemap_data(index, target_date, is_today, snapshot, view_range)
+    if df_tree.empty:
+        return None
+    with phase("treemap_figure"):
+        return create_treemap(df_tree, color_limit=color_limit)
+
+
+def build_treemap_data(index, target_date, is_today, snapshot=None, view_range=None, on_partial=None):
+    if not index.tickers:
+        return pd.DataFrame()
+
+    # 받기 중 예외는 그대로 올려 보냄 (허브는 예외를 저장하지 않으므로 다음 리런에서 다시 받음)
+    # 끝난 세션은 저장해 둔 등락률을 먼저 쓰고 (backfill.py 가 미리 채워 둠) 없는 종목이 든 묶음만 받음
+    final = not is_today and is_final_session(target_date)
+    stored = None
+    tickers = index.tickers
+    if final:
+        with phase("stored_changes"):
+            changes, dropped, tickers = load_final_changes(index.tickers, target_date, view_range)
+        stored = (changes, dropped)
+
+    # 차트 화면과 같은 한 벌(봉 + 기준가)에서 등락률을 구함 (현재가는 차트 칸과 같은 마지막 봉 종가)
+    # 오늘 날짜면 백그라운드 스냅샷(상단 바에서 받아 둔 것)을 그대로 쓰고,
+    # 아니면 차트 화면과 같은 포트폴리오 묶음으로 허브에서 받음 (과거 날짜는 로컬 저장소에서)
+    with phase("fetch_snapshot"):
+        if snapshot is not None:
+            intraday, reference = snapshot.intraday, snapshot.reference
+        else:
+            # 묶음별로 동시에 받고, 마감 시각까지 다 안 모이면 on_partial(모인 종목의 표, 남은 묶음 수)
+            hub = get_market_hub()
+            parts, failed = [], 0
+            arrivals = fetch_groups(
+                ticker_groups(index.tickers, wanted=tickers),
+                lambda group: hub.snapshot(group, target_date, is_today, view_range),
+                deadline=TREEMAP_DEADLINE if on_partial is not None else None,
+            )
+            for key, loaded in arrivals:
+                if key == DEADLINE:
+                    partial = build_treemap_rows(
+                        index, *combine_snapshots(parts), target_date, view_range, stored
+                    )
+                    if not partial.empty:
+                        on_partial(partial, loaded)
+                    continue
+                if loaded is None:
+                    failed += 1
+                else:
+                    parts.append(loaded)
+            intraday, reference = combine_snapshots(parts)
+    with phase("treemap_rows"):
+        df_tree = build_treemap_rows(index, intraday, reference, target_date, view_range, stored)
+    df_tree.attrs['failed_groups'] = 0 if snapshot is not None else failed
+    if final and tickers:
+        save_final_changes(df_tree, df_tree.attrs['dropped'], target_date, view_range)
+    return df_tree
+
+
+def treemap_view(index, selected_date, view_range, live_snapshot):
+    is_today = selected_date == date.today()
+    st.subheader("운동회 전광판")
+    # 버튼 누르면 캐시 비우고 즉시 리런
+    if st.button("지도 데이터 새로고침", key="tree_refresh"):
+        refresh_live_data(selected_date)
+        st.rerun()
+
+    tree_slot = st.empty()
+
+    def show_partial_treemap(df_partial, pending):
+        # 마감 시각까지 모인 종목으로 먼저 그림 (다 모이면 같은 자리를 전체 트리맵으로 바꿈)
+        partial_fig = create_treemap(df_partial, color_limit=view_range.color_limit)
+        with tree_slot.container():
+            st.plotly_chart(partial_fig, width="stretch", key="treemap_partial")
+            st.caption(f"나머지 {pending}개 묶음을 받는 중…")
+        if payload_measured():
+            record_payload(figure_bytes(partial_fig))
+
+    with st.spinner("경기 데이터를 모으는 중..."):
+        try:
+            df_tree = get_treemap_data(
+                index, selected_date, is_today, live_snapshot, view_range, on_partial=show_partial_treemap,
+            )
+            failed_groups = df_tree.attrs.get('failed_groups', 0)
+            if failed_groups:
+                # 보관되지 않은 표이므로 figure 도 보관하지 않고 이번 리런에서만 그림
+                fig = create_treemap(df_tree, color_limit=view_range.color_limit) if not df_tree.empty else None
+            else:
+                fig = get_treemap_figure(index, selected_date, is_today, live_snapshot, view_range)
+        except Exception as e:
+            # 실패는 캐시되지 않으므로 이번 리런에만 알리고 다음 리런(새로고침)에서 다시 받음
+            st.error(f"데이터 다운로드 실패: {e}")
+            df_tree, fig, failed_groups = pd.DataFrame(), None, 0
+
+    if fig is not None:
+        with phase("plotly_chart"):
+            tree_slot.plotly_chart(fig, width="stretch")
+        if payload_measured():
+            with phase("payload_size"):
+                record_payload(figure_bytes(fig))
+    else:
+        tree_slot.info("데이터가 없습니다.")
+    if failed_groups:
+        st.warning(f"{failed_groups}개 묶음을 받지 못했습니다. 다음 새로고침 때 다시 받습니다.")
+
+    # 등락률을 못 구해 빠진 종목은 조용히 버리지 않고 이유별로 알려 줌
+    dropped = df_tree.attrs.get('dropped', {})
+    if dropped:
+        by_reason = {}
+        for ticker, reason in dropped.items():
+            by_reason.setdefault(reason, []).append(ticker)
+        st.caption("트리맵에서 빠진 종목 — " + " · ".join(
+            f"{DROP_REASONS.get(reason, reason)}: {', '.join(tickers)}" for reason, tickers in by_reason.items()
+        ))
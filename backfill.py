@@ -0,0 +1,129 @@
+"""끝난 거래일의 일봉/분봉과 트리맵 등락률을 미리 받아 로컬 저장소에 채우는 백필.
+
+화면을 처음 여는 사람(아침 첫 접속, 배포 직후, 지난 날짜로 돌아가 보기)이
+전 종목 다운로드를 기다리지 않도록, 화면과 같은 받기 경로(허브 -> 로컬 저장소)로
+기간의 거래일마다 아래를 채웁니다. 이미 저장된 것은 다시 받지 않습니다.
+
+  - 차트  : 분봉(여러 날 기간이면 기간용 봉) + 기준가 일봉 (MarketDataHub.snapshot, 트리맵과 같은 한 벌)
+  - 트리맵: 위의 한 벌에서 차트 칸 지표와 같은 규칙으로 -> 종목별 등락률 표 (화면은 표만 읽음)
+
+묶음(기본 25종목)마다 동시에 받고, 요청 예산은 화면과 같은 요청 조절 스케줄러를 따릅니다.
+아직 끝나지 않은 세션(오늘)은 건너뜁니다. 당일 데이터는 백그라운드 수집 / ingest_worker.py 몫입니다.
+
+    python backfill.py                                  # 마지막으로 끝난 거래일, 하루 기간
+    python backfill.py --start 2026-09-01 --end 2026-09-30 --ranges 1d,1w
+    python backfill.py --portfolio portfolios/app.toml --no-intraday --workers 12
+    # 크론: 평일 장 시작 전
+    # 0 8 * * 1-5 cd /srv/assetmonitor && python backfill.py
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from assetmonitor_core import progressive
+from assetmonitor_core.market_data import is_final_session
+from assetmonitor_core.market_hub import MarketDataHub, combine_snapshots
+from assetmonitor_core.pipeline import load_final_changes, save_final_changes, treemap_changes
+from assetmonitor_core.portfolio import PORTFOLIO_DIR, portfolio_tickers
+from assetmonitor_core.progressive import TREEMAP_GROUP_SIZE, fetch_groups, ticker_groups
+from assetmonitor_core.ranges import RANGES
+
+
+def last_final_session(today=None):
+    # 가장 늦게 끝나는 시장 기준으로도 끝난 마지막 평일
+    day = (today or date.today()) - timedelta(days=1)
+    while day.weekday() >= 5 or not is_final_session(day):
+        day -= timedelta(days=1)
+    return day
+
+
+def session_days(start, end):
+    return [d.date() for d in pd.bdate_range(start, end) if is_final_session(d.date())]
+
+
+def fetch_all(tickers, loader, group_size):
+    # 묶음별로 동시에 받아 (봉, 기준가) 한 벌로 합침. 실패한 묶음 수도 같이
+    parts, failed = [], 0
+    for _, loaded in fetch_groups(ticker_groups(tickers, group_size), loader):
+        if loaded is None:
+            failed += 1
+            continue
+        parts.append(loaded)
+    return combine_snapshots(parts), failed
+
+
+def backfill_day(hub, tickers, day, view_range, intraday=True, force=False, group_size=TREEMAP_GROUP_SIZE):
+    # 하루(기간 끝날) 치: 등락률 표를 채우고 차트용 봉을 받아 둠. (요약 문자열, 실패 묶음 수)
+    changes, dropped, missing = load_final_changes(tickers, day, view_range)
+    if force:
+        missing = list(tickers)
+    summary = f"changes stored={len(tickers) - len(missing)} computed={len(missing)}"
+
+    # 화면과 같은 경로 (허브 -> 로컬 저장소). 차트용 봉까지 받을 때는 전 종목, 아니면 등락률이 없는 종목만
+    wanted = tickers if intraday else missing
+    if not wanted:
+        return summary, 0
+    (bars, reference), failed = fetch_all(
+        wanted, lambda group: hub.snapshot(group, day, False, view_range), group_size
+    )
+    if missing:
+        computed, dropped = treemap_changes(bars, reference, missing, day, view_range)
+        save_final_changes(computed, dropped, day, view_range)
+    if intraday:
+        summary += f" bars={len(bars)} reference={len(reference.frames)}"
+    return summary, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--start", type=date.fromisoformat, help="첫 날짜 (기본: --end 와 같은 날)")
+    parser.add_argument("--end", type=date.fromisoformat, help="끝 날짜 (기본: 마지막으로 끝난 거래일)")
+    parser.add_argument("--portfolio", action="append", default=None,
+                        help="포트폴리오 TOML (여러 번 지정 가능, 기본 portfolios/*.toml)")
+    parser.add_argument("--ranges", default="1d", help=f"조회 기간 ({','.join(RANGES)} 중 쉼표로)")
+    parser.add_argument("--no-intraday", action="store_true", help="트리맵 등락률만 (등락률이 저장된 종목의 봉은 받지 않음)")
+    parser.add_argument("--force", action="store_true", help="저장된 등락률이 있어도 다시 계산")
+    parser.add_argument("--workers", type=int, default=progressive.PROGRESSIVE_WORKERS, help="동시에 받는 묶음 수")
+    parser.add_argument("--group-size", type=int, default=TREEMAP_GROUP_SIZE, help="묶음당 종목 수")
+    args = parser.parse_args()
+
+    end = args.end or last_final_session()
+    start = args.start or end
+    ranges = [RANGES[key] for key in args.ranges.split(",") if key]
+    days = session_days(start, end)
+    if not days:
+        parser.error(f"{start} ~ {end} 에 끝난 거래일이 없습니다")
+
+    paths = args.portfolio or sorted(glob.glob(os.path.join(PORTFOLIO_DIR, "*.toml")))
+    tickers = portfolio_tickers(paths)
+    # 서버 프로세스와 달리 이 실행만 쓰는 풀이므로 묶음 수를 바로 바꿈 (풀을 처음 만들기 전에)
+    progressive.PROGRESSIVE_WORKERS = args.workers
+    hub = MarketDataHub()
+
+    total_failed = 0
+    for day in days:
+        for view_range in ranges:
+            started = time.perf_counter()
+            summary, failed = backfill_day(
+                hub, tickers, day, view_range,
+                intraday=not args.no_intraday, force=args.force, group_size=args.group_size,
+            )
+            total_failed += failed
+            failed_note = f" failed_groups={failed}" if failed else ""
+            print(f"{day} {view_range.key} tickers={len(tickers)} {summary}{failed_note} "
+                  f"{time.perf_counter() - started:.2f}s", flush=True)
+        # 같은 날의 기간끼리만 메모리에서 나눠 쓰면 되므로 날짜가 바뀌면 비움 (저장소에는 남음)
+        hub.clear()
+
+    if total_failed:
+        print(f"{total_failed} groups failed; rerun to retry them", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
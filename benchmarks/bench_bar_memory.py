@@ -0,0 +1,125 @@
+"""종목별 DataFrame vs 봉 버퍼(bar_buffer.BarBuffer) 메모리 비교.
+
+가짜 당일 5분봉(78개)과 5일치 일봉을 종목 수만큼 만들어
+  - dataframes : 지금까지처럼 {종목: DataFrame} 로 들고 있을 때
+  - bar-buffer : 봉 버퍼 하나에 쓰고 {종목: BarView} 뷰를 꺼내 쓸 때
+남는 메모리(tracemalloc, stored)와 전 종목 차트 칸의 종가/인덱스를 한 번씩 꺼낸 뒤의 메모리(read),
+그 꺼내는 시간, 분봉 + 기준가로 트리맵 등락률(treemap_changes)을 계산하는 시간을 잽니다.
+
+    python benchmarks/bench_bar_memory.py
+    python benchmarks/bench_bar_memory.py --tickers 150 2000 5000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assetmonitor_core.bar_buffer import BarBuffer, session_bars  # noqa: E402
+from bench_sector_chart import make_frames  # noqa: E402
+from assetmonitor_core.market_data import ReferencePrices  # noqa: E402
+from assetmonitor_core.pipeline import treemap_changes  # noqa: E402
+
+DAILY_BARS = 5
+# 합성 분봉(bench_sector_chart.make_frames)의 세션 날짜. 기준가(전일 종가)는 그 앞 일봉에서
+SESSION_DATE = date(2025, 1, 2)
+
+
+def make_daily(n_tickers, seed=1, start="2025-01-06"):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=DAILY_BARS, freq="B", tz="America/New_York")
+    frames = {}
+    for i in range(n_tickers):
+        closes = 100 + np.cumsum(rng.normal(0, 1, DAILY_BARS))
+        frames[f"T{i:04d}"] = pd.DataFrame({
+            "Open": closes - 0.5, "High": closes + 1, "Low": closes - 1, "Close": closes,
+            "Adj Close": closes, "Volume": rng.integers(1_000_000, 9_000_000, DAILY_BARS),
+        }, index=index)
+    return frames
+
+
+def retained(build, use):
+    # build() 가 돌려준 객체가 붙잡고 있는 메모리, use(객체) 로 전 종목 차트를 읽은 뒤의 메모리 (바이트)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    gc.collect()
+    stored = tracemalloc.get_traced_memory()[0] - before
+    use(kept)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return stored, used, kept
+
+
+def copy_frames(frames):
+    return {t: df.copy() for t, df in frames.items()}
+
+
+def to_buffer(frames, capacity):
+    buffer = BarBuffer(capacity)
+    for ticker, df in frames.items():
+        buffer.write(ticker, df, replace=True)
+    return buffer.frames(list(frames))
+
+
+def touch_charts(frames):
+    # 차트 칸 하나가 읽는 것: 종가 Series, 인덱스 처음/끝
+    total = 0.0
+    for df in frames.values():
+        closes = df['Close']
+        total += float(closes.iloc[-1]) + df.index[-1].value * 0
+    return total
+
+
+def timed(fn, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, nargs="+", default=[150, 2000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'tickers':>8}  {'data':<9}{'mode':<12}{'stored KB':>10}{'B/ticker':>10}"
+          f"{'read KB':>10}{'charts s':>10}{'changes s':>11}")
+    for n_tickers in args.tickers:
+        tickers = [f"T{i:04d}" for i in range(n_tickers)]
+        reference = ReferencePrices.from_daily(make_daily(n_tickers, start="2024-12-26"))
+        cases = [
+            ("intraday", make_frames(n_tickers), session_bars),
+            ("daily", make_daily(n_tickers), DAILY_BARS + 3),
+        ]
+        for data_name, frames, capacity in cases:
+            # 받은 원본과 따로 들고 있는 상태를 재기 위해 복사본 / 버퍼를 새로 만듦
+            modes = [
+                ("dataframes", lambda: copy_frames(frames)),
+                ("bar-buffer", lambda: to_buffer(frames, capacity)),
+            ]
+            for mode, build in modes:
+                stored, used, data = retained(build, touch_charts)
+                charts_s = timed(touch_charts, data, repeat=args.repeat)
+                changes_s = (
+                    timed(treemap_changes, data, reference, tickers, SESSION_DATE, repeat=args.repeat)
+                    if data_name == "intraday" else float("nan")
+                )
+                print(f"{n_tickers:>8}  {data_name:<9}{mode:<12}{stored / 1024:>10,.0f}{stored / n_tickers:>10,.0f}"
+                      f"{used / 1024:>10,.0f}{charts_s:>10.3f}{changes_s:>11.3f}")
+                del data
+
+if __name__ == "__main__":
+    main()
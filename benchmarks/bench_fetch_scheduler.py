@@ -0,0 +1,138 @@
+"""가짜 upstream(429 / 타임아웃 주입)으로 요청 조절 스케줄러 동작 확인.
+
+실제 시간을 기다리지 않도록 가상 시계를 쓰며, 정해진 구간 동안 upstream 이
+완전히 막혔다가(장애) 회복되는 상황도 흉내 냅니다. 아래가 하나라도 틀리면 종료 코드 1.
+
+  - 어느 WINDOW 초 구간에서도 upstream 요청 수가 예산(burst + rps x WINDOW)을 넘지 않음
+  - 장애 구간 안에서 회로 차단기가 열림
+  - 회로가 열려 있는 동안 마지막으로 받은 데이터(stale)로 답한 요청이 있음
+
+    python benchmarks/bench_fetch_scheduler.py --requests 300 --rate-limit 0.2 --timeouts 0.05
+"""
+import argparse
+import bisect
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assetmonitor_core.fetch_scheduler import (  # noqa: E402
+    CircuitBreaker, CircuitOpen, FetchScheduler, RateLimited, TokenBucket, UpstreamTimeout,
+)
+
+
+# 요청 예산을 확인할 구간 길이(초)
+WINDOW = 10.0
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+
+class FlakyUpstream:
+    # 일정 확률로 429 / 타임아웃을 내고, outage 구간에서는 모든 요청이 429
+    def __init__(self, clock, rate_limit=0.1, timeouts=0.05, outage=(60.0, 180.0), latency=0.2, seed=0):
+        self.clock = clock
+        self.rate_limit = rate_limit
+        self.timeouts = timeouts
+        self.outage = outage
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.requests = 0
+        # 요청이 나간 시각 (예산 확인용)
+        self.sent_at = []
+
+    def fetch(self, key):
+        self.requests += 1
+        self.sent_at.append(self.clock.now)
+        self.clock.sleep(self.latency)
+        start, end = self.outage
+        if start <= self.clock.now < end:
+            raise RateLimited("429 Too Many Requests")
+        roll = self.rng.random()
+        if roll < self.rate_limit:
+            raise RateLimited("429 Too Many Requests")
+        if roll < self.rate_limit + self.timeouts:
+            raise UpstreamTimeout("read timed out")
+        return f"bars:{key}"
+
+
+def max_in_window(times, window):
+    # 길이 window 인 구간 하나에 들어간 최대 요청 수 (times 는 오름차순)
+    return max((bisect.bisect_left(times, t + window) - i for i, t in enumerate(times)), default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--keys", type=int, default=10, help="서로 다른 요청 종류 수")
+    parser.add_argument("--rate-limit", type=float, default=0.1, help="429 확률")
+    parser.add_argument("--timeouts", type=float, default=0.05, help="타임아웃 확률")
+    parser.add_argument("--rps", type=float, default=2.0, help="토큰 버킷 초당 요청 수")
+    parser.add_argument("--burst", type=int, default=5)
+    parser.add_argument("--interval", type=float, default=1.0, help="화면 쪽 요청 간격(초)")
+    args = parser.parse_args()
+
+    clock = VirtualClock()
+    upstream = FlakyUpstream(clock, args.rate_limit, args.timeouts)
+    scheduler = FetchScheduler(
+        bucket=TokenBucket(args.rps, args.burst, clock=clock.time, sleep=clock.sleep),
+        breaker=CircuitBreaker(clock=clock.time),
+        sleep=clock.sleep, rng=random.Random(1).random,
+    )
+
+    fresh = stale = missing = stale_while_open = 0
+    trip_times = []
+    for i in range(args.requests):
+        clock.sleep(args.interval)
+        key = i % args.keys
+        stale_before = scheduler.stale_served
+        trips_before = scheduler.breaker.trips
+        try:
+            scheduler.call(key, upstream.fetch, key)
+        except (RateLimited, UpstreamTimeout, CircuitOpen):
+            missing += 1
+            continue
+        finally:
+            if scheduler.breaker.trips > trips_before:
+                trip_times.append(clock.now)
+        if scheduler.stale_served > stale_before:
+            stale += 1
+            if scheduler.breaker.state != CircuitBreaker.CLOSED:
+                stale_while_open += 1
+        else:
+            fresh += 1
+
+    status = scheduler.status()
+    budget = args.burst + args.rps * WINDOW
+    busiest = max_in_window(upstream.sent_at, WINDOW)
+    print(f"simulated seconds : {clock.now:.1f}")
+    print(f"upstream requests : {upstream.requests} ({upstream.requests / clock.now:.2f}/s, budget {args.rps}/s)")
+    print(f"busiest {WINDOW:.0f}s      : {busiest} requests (budget {budget:.0f})")
+    print(f"answered          : fresh={fresh} stale={stale} missing={missing} of {args.requests}")
+    print(f"retries={status['retries']} breaker_trips={status['trips']} stale_served={status['stale_served']} "
+          f"stale_while_open={stale_while_open}")
+
+    failures = []
+    if busiest > budget:
+        failures.append(f"request budget exceeded: {busiest} requests in {WINDOW:.0f}s (budget {budget:.0f})")
+    start, end = upstream.outage
+    if not any(start <= t <= end for t in trip_times):
+        failures.append(f"breaker did not trip during the outage ({start:.0f}s ~ {end:.0f}s)")
+    if not stale_while_open:
+        failures.append("no last-known-good data served while the breaker was open")
+    print("checks:", "ok" if not failures else "; ".join(failures))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
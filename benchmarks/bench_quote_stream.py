@@ -0,0 +1,183 @@
+"""실시간 시세(quote_stream) 확인과 시간 측정.
+
+  merge : 합성 5분봉 뒤에 같은 세션의 실시간 봉을 이어 붙여
+          시간대가 붙은 분봉 / 시간대 없는 일봉(yfinance 일봉 모양) 어느 쪽에도 이어지는지,
+          진행 중이던 마지막 봉이 공식 봉의 시가를 지키는지,
+          받아 둔 봉이 지난 세션이면 새 세션 봉만 남는지 확인하고 전 종목 잇기 시간을 잼
+  feed  : set_quote_feed_factory 로 대역 피드(ReplayQuoteFeed)를 끼워 QuoteStream 을 실제로 띄우고
+          이틀치 체결을 흘려 초당 처리 체결 수를 잼. 끝나면 종목마다 마지막 세션 봉만 남았는지 확인
+확인이 틀리면 종료 코드 1.
+
+    python benchmarks/bench_quote_stream.py
+    python benchmarks/bench_quote_stream.py --tickers 150 2000
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assetmonitor_core.market_calendar import EXCHANGES  # noqa: E402
+from assetmonitor_core.quote_stream import (  # noqa: E402
+    BAR_SECONDS, BarAggregator, QuoteFeed, merge_live, set_quote_feed_factory, start_quote_stream,
+)
+from bench_sector_chart import make_frames  # noqa: E402
+
+TIMEZONE = "America/New_York"
+# 대역 피드가 흘려 보낼 두 거래일 (앞 세션 봉은 뒤 세션 첫 체결 때 버려져야 함)
+FEED_SESSIONS = (date(2026, 10, 15), date(2026, 10, 16))
+
+
+class ReplayQuoteFeed(QuoteFeed):
+    # 로컬 대역 피드: 구독한 종목마다 세션별로 정규장 동안 고르게 체결을 만들어 한 번 흘려 보내고,
+    # 다 보내면 close 될 때까지 연결을 붙잡고 있음 (재연결 때 다시 보내지 않도록)
+    def __init__(self, sessions=FEED_SESSIONS, ticks_per_session=390):
+        self.sessions = sessions
+        self.ticks_per_session = ticks_per_session
+        self.symbols = []
+        self.sent = 0
+        self.done = threading.Event()
+        self._closed = threading.Event()
+
+    def subscribe(self, symbols):
+        self.symbols.extend(s for s in symbols if s not in self.symbols)
+
+    def unsubscribe(self, symbols):
+        self.symbols = [s for s in self.symbols if s not in symbols]
+
+    def listen(self, handler):
+        if not self.done.is_set():
+            nyse = EXCHANGES["NYSE"]
+            for day in self.sessions:
+                open_at, close_at = nyse.session_bounds(day)
+                times = np.linspace(open_at.timestamp(), close_at.timestamp() - 1, self.ticks_per_session)
+                for i, seconds in enumerate(times):
+                    for symbol in self.symbols:
+                        handler({"id": symbol, "price": 100.0 + i * 0.01, "time": int(seconds * 1000),
+                                 "day_volume": 1000 * (i + 1)})
+                        self.sent += 1
+            self.done.set()
+        self._closed.wait()
+
+    def close(self):
+        self._closed.set()
+
+
+def live_bars(base, ticks=30, seed=0):
+    # base 의 마지막 봉부터 이어지는 체결들 (마지막 봉 안 체결 + 다음 봉들)
+    rng = np.random.default_rng(seed)
+    start = base.index[-1].timestamp()
+    aggregator = BarAggregator()
+    price = float(base['Close'].iloc[-1])
+    for i in range(ticks):
+        price += rng.normal(0, 0.1)
+        aggregator.add("T", price, start + i * BAR_SECONDS / 10, day_volume=1000.0 * (i + 1))
+    return aggregator.frame("T")
+
+
+def naive_daily(base):
+    # yfinance 일봉처럼 시간대 없는 현지 자정 인덱스
+    day = base.index[-1].tz_convert(TIMEZONE).normalize().tz_localize(None)
+    index = pd.DatetimeIndex([day - pd.Timedelta(days=1), day])
+    return pd.DataFrame({
+        "Open": [99.0, float(base['Open'].iloc[0])], "High": [101.0, float(base['High'].max())],
+        "Low": [98.0, float(base['Low'].min())], "Close": [100.0, float(base['Close'].iloc[-1])],
+        "Volume": [1e6, 1e6],
+    }, index=index)
+
+
+def check_merges():
+    failures = []
+    base = make_frames(1)["T0000"]
+    live = live_bars(base)
+
+    merged = merge_live(base, live, "T")
+    if merged.index[-1] != live.index[-1] or not merged.index.is_monotonic_increasing:
+        failures.append("intraday: live bars not appended in order")
+    if merged['Open'].iloc[len(base) - 1] != base['Open'].iloc[-1]:
+        failures.append("intraday: in-progress bar lost the official open")
+
+    # 스냅샷이 아직 지난 세션일 때 다음 세션의 실시간 봉
+    next_live = live.set_axis(live.index + pd.Timedelta(days=1))
+    merged_next = merge_live(base, next_live, "T")
+    if not merged_next.index.equals(next_live.index):
+        failures.append("next session: live bars glued onto the previous session")
+
+    # 일봉은 현지 날짜 단위이므로 실시간 봉을 하루 칸으로 묶어 이음
+    daily = naive_daily(base)
+    day_live = live.resample("1D").agg(
+        {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+    )
+    try:
+        merged_daily = merge_live(daily, day_live, "T")
+    except TypeError as e:
+        failures.append(f"naive daily: {e}")
+    else:
+        if merged_daily.index.tz is not None or len(merged_daily) != len(daily):
+            failures.append("naive daily: live day not merged into the last daily bar")
+        elif merged_daily['Close'].iloc[-1] != day_live['Close'].iloc[-1]:
+            failures.append("naive daily: last close is not the live close")
+    return failures
+
+
+def run_feed(n_tickers, ticks_per_session):
+    # (초당 처리 체결 수, 실패 목록)
+    feed = ReplayQuoteFeed(ticks_per_session=ticks_per_session)
+    set_quote_feed_factory(lambda: feed)
+    tickers = [f"T{i:04d}" for i in range(n_tickers)]
+    start = time.perf_counter()
+    stream = start_quote_stream(tickers)
+    stream.set_tickers(tickers)
+    feed.done.wait()
+    seconds = time.perf_counter() - start
+
+    failures = []
+    if stream.ticks != feed.sent:
+        failures.append(f"feed: {stream.ticks} of {feed.sent} ticks aggregated")
+    last_session = FEED_SESSIONS[-1]
+    session_bars = len(np.unique(np.linspace(0, 390 * 60 - 1, ticks_per_session) // BAR_SECONDS))
+    for ticker in tickers:
+        frame = stream.minutes.frame(ticker)
+        if frame is None or set(frame.index.date) != {last_session} or len(frame) != session_bars:
+            failures.append(f"feed: {ticker} kept bars outside {last_session}")
+            break
+    return feed.sent / seconds, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, nargs="+", default=[150, 2000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--ticks-per-session", type=int, default=390, help="대역 피드가 종목당 세션마다 보낼 체결 수")
+    args = parser.parse_args()
+
+    failures = check_merges()
+    print("merge checks:", "ok" if not failures else "; ".join(failures))
+    ticks_per_second, feed_failures = run_feed(max(args.tickers), args.ticks_per_session)
+    failures += feed_failures
+    print(f"feed: {ticks_per_second:,.0f} ticks/s", "ok" if not feed_failures else "; ".join(feed_failures))
+
+    print(f"{'tickers':>8}{'merge s':>10}")
+    for n_tickers in args.tickers:
+        frames = make_frames(n_tickers)
+        pairs = [(df, live_bars(df, seed=i)) for i, df in enumerate(frames.values())]
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for base, live in pairs:
+                merge_live(base, live, "T")
+            best = min(best, time.perf_counter() - start)
+        print(f"{n_tickers:>8}{best:>10.3f}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
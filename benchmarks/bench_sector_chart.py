@@ -0,0 +1,83 @@
+"""개별 차트(create_chart) vs 섹터 묶음 차트(create_sector_chart) 비교.
+
+150종목 포트폴리오(섹터당 5종목)를 가짜 5분봉으로 만들어 figure 생성과
+JSON 직렬화(st.plotly_chart 가 브라우저로 보내는 형태)에 걸리는 시간을 잽니다.
+
+    python benchmarks/bench_sector_chart.py --tickers 150 --repeat 3
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assetmonitor_core.charts import create_chart, create_sector_chart  # noqa: E402
+
+
+def make_frames(n_tickers, bars=78, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2025-01-02 09:30", periods=bars, freq="5min", tz="America/New_York")
+    frames = {}
+    for i in range(n_tickers):
+        closes = 100 + np.cumsum(rng.normal(0, 0.5, bars))
+        frames[f"T{i:04d}"] = pd.DataFrame({
+            "Open": closes, "High": closes + 0.2, "Low": closes - 0.2, "Close": closes,
+            "Volume": rng.integers(1_000, 100_000, bars),
+        }, index=index)
+    return frames
+
+
+def run_per_ticker(sectors, frames):
+    payload = 0
+    for tickers in sectors:
+        for ticker in tickers:
+            payload += len(create_chart(ticker, frames[ticker]).to_json())
+    return payload
+
+
+def run_per_sector(sectors, frames):
+    payload = 0
+    for tickers in sectors:
+        payload += len(create_sector_chart(tickers, frames, cols=5).to_json())
+    return payload
+
+
+def measure(fn, *args, repeat=3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=150)
+    parser.add_argument("--sector-size", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    frames = make_frames(args.tickers)
+    names = list(frames)
+    sectors = [names[i:i + args.sector_size] for i in range(0, len(names), args.sector_size)]
+
+    # 레이아웃 틀 캐시가 채워진 상태(서버가 돌고 있는 상태)를 기준으로 비교
+    run_per_sector(sectors[:1], frames)
+
+    per_ticker_s, per_ticker_bytes = measure(run_per_ticker, sectors, frames, repeat=args.repeat)
+    per_sector_s, per_sector_bytes = measure(run_per_sector, sectors, frames, repeat=args.repeat)
+
+    print(f"tickers={args.tickers} sectors={len(sectors)}")
+    print(f"{'mode':<12}{'figures':>9}{'seconds':>10}{'payload KB':>12}")
+    print(f"{'per-ticker':<12}{args.tickers:>9}{per_ticker_s:>10.3f}{per_ticker_bytes / 1024:>12.0f}")
+    print(f"{'per-sector':<12}{len(sectors):>9}{per_sector_s:>10.3f}{per_sector_bytes / 1024:>12.0f}")
+    print(f"speedup x{per_ticker_s / per_sector_s:.1f}")
+
+
+if __name__ == "__main__":
+    main()
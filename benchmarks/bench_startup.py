@@ -0,0 +1,187 @@
+"""화면 스크립트의 시작(불러오기) 시간과 리런 시간 측정.
+
+  import : 새 파이썬 프로세스에서 화면 스크립트가 불러오는 모듈(assetmonitor_core.dashboard / views)을
+           불러오는 데 걸린 시간. 무거운 모듈(plotly.express, yfinance)이 딸려 오지 않는지도 봄
+  rerun  : 화면마다 새 프로세스에서 Streamlit AppTest 로 스크립트를 실행
+             first : 첫 실행 (오늘 날짜, 빈 캐시)
+             cold  : 끝난 거래일로 바꾼 첫 리런 (일봉/분봉 받기 + 계산 + figure)
+             warm  : 바로 이어지는 리런들의 중앙값 (위젯을 눌렀을 때 매번 드는 스크립트 비용)
+
+데이터는 재생 공급자(ReplayProvider)가 합성한 봉 파일을 돌려주므로 네트워크 없이 돕니다.
+--import-budget / --rerun-budget 을 넘으면 종료 코드 1 (CI 에서 시작 시간 회귀 감시용).
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 5 --reruns 10
+    python benchmarks/bench_startup.py --import-budget 1.5 --rerun-budget 0.5
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FIXTURES = os.path.join(ROOT, ".cache", "fixtures")
+APP_TIMEOUT = 300
+
+# (이름, 불러올 모듈들)
+IMPORT_TARGETS = [
+    ("pages", "assetmonitor_core.dashboard, assetmonitor_core.views"),
+    ("streamlit", "streamlit"),
+    ("pandas", "pandas"),
+    ("plotly.express", "plotly.express"),
+    ("yfinance", "yfinance"),
+]
+# 화면 스크립트를 불러올 때 딸려 오면 안 되는 모듈
+LAZY_MODULES = ["plotly.express", "yfinance"]
+
+# (화면 스크립트, Assetmonitor 의 화면 라디오 값)
+PAGES = [
+    ("app.py", None),
+    ("Assetmonitor.py", "Treemap"),
+    ("Assetmonitor.py", "Charts"),
+]
+
+IMPORT_CODE = """
+import json, sys, time
+start = time.perf_counter()
+import {modules}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def run_json(args, env=None):
+    # 자식 프로세스의 마지막 줄(JSON)을 읽음
+    result = subprocess.run(args, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_import(modules, repeat):
+    # 새 프로세스마다 한 번씩 불러와 가장 빠른 값 (디스크 캐시가 데워진 뒤의 시작 시간)
+    code = IMPORT_CODE.format(modules=modules, lazy=LAZY_MODULES)
+    runs = [run_json([sys.executable, "-c", code]) for _ in range(repeat)]
+    return min(run["seconds"] for run in runs), runs[-1]["loaded"]
+
+
+def page_env():
+    # 화면마다 빈 로컬 저장소 / 빈 스냅샷 폴더 (백그라운드 수집 스레드를 띄우지 않고 허브에서 받음)
+    env = dict(os.environ)
+    env["ASSETMONITOR_CACHE_DIR"] = tempfile.mkdtemp(prefix="assetmonitor-startup-")
+    env["ASSETMONITOR_SNAPSHOT_DIR"] = tempfile.mkdtemp(prefix="assetmonitor-startup-snapshots-")
+    env.pop("ASSETMONITOR_PORTFOLIO", None)
+    env.pop("ASSETMONITOR_METRICS_PORT", None)
+    return env
+
+
+def prepare_fixtures(fixture_dir):
+    # 포트폴리오 전 종목의 봉 파일이 없으면 마지막으로 끝난 거래일까지 합성. 그 거래일을 돌려줌
+    sys.path.insert(0, ROOT)
+    from assetmonitor_core.portfolio import portfolio_tickers
+    from assetmonitor_core.providers import ReplayProvider, synthesize_fixtures
+    from backfill import last_final_session
+
+    session_date = last_final_session()
+    tickers = portfolio_tickers(sorted(glob.glob(os.path.join(ROOT, "portfolios", "*.toml"))))
+    provider = ReplayProvider(fixture_dir)
+    missing = [
+        t for t in tickers
+        if any(provider.load(t, interval) is None for interval in ("5m", "60m", "1d"))
+    ]
+    if missing:
+        print(f"synthesizing fixtures for {len(missing)} tickers -> {fixture_dir}")
+        synthesize_fixtures(missing, fixture_dir, end_date=session_date)
+    return session_date
+
+
+def run_page(script, view, session_date, reruns, fixture_dir):
+    # --page 로 불린 자식 프로세스 안에서: 재생 공급자를 끼우고 AppTest 로 실행
+    sys.path.insert(0, ROOT)
+    from streamlit.testing.v1 import AppTest
+
+    from assetmonitor_core.fetch_scheduler import FetchScheduler, TokenBucket, set_fetch_scheduler
+    from assetmonitor_core.providers import ReplayProvider, set_provider
+
+    set_provider(ReplayProvider(fixture_dir))
+    set_fetch_scheduler(FetchScheduler(bucket=TokenBucket(rate=1e9, capacity=1e9)))
+
+    app = AppTest.from_file(os.path.join(ROOT, script), default_timeout=APP_TIMEOUT)
+
+    def timed_run():
+        start = time.perf_counter()
+        app.run()
+        seconds = time.perf_counter() - start
+        if app.exception:
+            raise RuntimeError(f"{script}: {app.exception[0].message}")
+        return seconds
+
+    first = timed_run()
+    app.date_input[0].set_value(session_date)
+    if view:
+        app.radio(key="view").set_value(view)
+    cold = timed_run()
+    warm = [timed_run() for _ in range(reruns)]
+    print(json.dumps({"first": first, "cold": cold, "warm": statistics.median(warm), "warm_min": min(warm)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="불러오기 측정 프로세스 수 (가장 빠른 값)")
+    parser.add_argument("--reruns", type=int, default=5, help="warm 리런 횟수 (중앙값)")
+    parser.add_argument("--fixtures", default=None, help="봉 파일 폴더 (기본 .cache/fixtures)")
+    parser.add_argument("--import-budget", type=float, default=None, help="화면 모듈 불러오기 허용 시간(초)")
+    parser.add_argument("--rerun-budget", type=float, default=None, help="warm 리런 허용 시간(초)")
+    parser.add_argument("--json", default=None, help="결과를 JSON 으로 저장할 경로")
+    parser.add_argument("--page", nargs=3, metavar=("SCRIPT", "VIEW", "DATE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    fixture_dir = args.fixtures or DEFAULT_FIXTURES
+
+    if args.page:
+        script, view, session_date = args.page
+        from datetime import date
+        run_page(script, view if view != "-" else None, date.fromisoformat(session_date), args.reruns, fixture_dir)
+        return
+
+    over_budget = []
+    results = {"import": [], "rerun": []}
+    print(f"{'import':<16}{'seconds':>9}  lazy modules loaded")
+    for name, modules in IMPORT_TARGETS:
+        seconds, loaded = measure_import(modules, args.repeat)
+        results["import"].append({"name": name, "seconds": seconds, "loaded": loaded})
+        print(f"{name:<16}{seconds:>9.3f}  {', '.join(loaded) or '-'}")
+        if name == "pages":
+            if loaded:
+                over_budget.append(f"pages import pulled in {', '.join(loaded)}")
+            if args.import_budget is not None and seconds > args.import_budget:
+                over_budget.append(f"pages import {seconds:.3f}s > {args.import_budget}s")
+
+    session_date = prepare_fixtures(fixture_dir)
+    print(f"\nsession={session_date} fixtures={fixture_dir}")
+    print(f"{'page':<28}{'first':>8}{'cold':>8}{'warm':>8}{'warm min':>10}")
+    for script, view in PAGES:
+        result = run_json(
+            [sys.executable, os.path.abspath(__file__), "--page", script, view or "-", session_date.isoformat(),
+             "--reruns", str(args.reruns), "--fixtures", fixture_dir],
+            env=page_env(),
+        )
+        label = f"{script}" + (f" [{view}]" if view else "")
+        result.update(page=label)
+        results["rerun"].append(result)
+        print(f"{label:<28}{result['first']:>8.3f}{result['cold']:>8.3f}{result['warm']:>8.3f}{result['warm_min']:>10.3f}")
+        if args.rerun_budget is not None and result["warm"] > args.rerun_budget:
+            over_budget.append(f"{label} warm rerun {result['warm']:.3f}s > {args.rerun_budget}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if over_budget:
+        print("\n".join(["", "over budget:", *over_budget]), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""네트워크 없이 트리맵 / 차트 화면 파이프라인 성능 측정.
+
+재생 공급자(ReplayProvider)가 녹화해 둔(없으면 합성한) 봉 파일을 지연 시간을
+흉내 내며 돌려주고, 포트폴리오 크기별로 아래 단계를 잽니다.
+
+  treemap : 분봉/기준가 한 벌 받기 -> 등락률 표 -> 트리맵 figure -> JSON
+  charts  : 분봉/기준가 한 벌 받기 -> 종목별 지표 -> 섹터 묶음 차트 -> JSON (전 섹터 펼침)
+  both    : 같은 허브에서 treemap 다음 charts (두 화면이 한 벌을 나눠 써 charts 는 받지 않음)
+
+각 단계는 빈 캐시(cold)와 바로 이어지는 리런(warm)으로 나눠
+실행 시간, upstream 호출 수(요청 종목 수), 최대 메모리(tracemalloc)를 보고합니다.
+--ranges 로 조회 기간(1d, 1w, 1mo, 3mo)별로 돌리면 기간이 길어져도
+payload / 시간이 평평한지 볼 수 있습니다.
+payload 는 Streamlit 이 브라우저로 보내는 figure spec 크기이고,
+--raw-figures 로 압축 figure(float32 typed array, x0/dx)를 끄고 비교할 수 있습니다.
+
+합성 포트폴리오 대신 --portfolio 로 실제 포트폴리오 파일을 잴 수 있고,
+--record 를 붙이면 그 종목들의 실제 봉(5분봉 / 60분봉 / 일봉)을 upstream 에서 받아
+봉 파일 폴더에 녹화한 뒤 잽니다 (네트워크 필요, 한 번 녹화하면 이후 실행은 오프라인).
+
+    python benchmarks/run_benchmarks.py --sizes 150,500,1000,2000 --latency 0.05
+    python benchmarks/run_benchmarks.py --sizes 150 --ranges 1d,1w,1mo,3mo
+    python benchmarks/run_benchmarks.py --sizes 150 --raw-figures
+    python benchmarks/run_benchmarks.py --fixtures recorded/ --json result.json
+    python benchmarks/run_benchmarks.py --portfolio portfolios/app.toml --fixtures recorded/ --record
+    python benchmarks/run_benchmarks.py --portfolio portfolios/app.toml --fixtures recorded/
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 합성한 봉 파일은 다음 실행 때 다시 쓰도록 저장소 캐시 폴더에 둠
+DEFAULT_FIXTURES = os.path.join(ROOT, ".cache", "fixtures")
+
+# 디스크 저장소가 실제 캐시를 건드리지 않도록 모듈을 불러오기 전에 임시 폴더로
+os.environ.setdefault("ASSETMONITOR_CACHE_DIR", tempfile.mkdtemp(prefix="assetmonitor-bench-"))
+
+sys.path.insert(0, ROOT)
+
+import pandas as pd  # noqa: E402
+
+from assetmonitor_core import charts  # noqa: E402
+from assetmonitor_core.bar_store import BarStore, set_bar_store  # noqa: E402
+from assetmonitor_core.charts import create_sector_chart, create_treemap, figure_bytes  # noqa: E402
+from assetmonitor_core.fetch_scheduler import FetchScheduler, TokenBucket, set_fetch_scheduler  # noqa: E402
+from assetmonitor_core.intraday_cache import get_intraday_cache  # noqa: E402
+from assetmonitor_core.market_hub import MarketDataHub  # noqa: E402
+from assetmonitor_core.pipeline import build_treemap_rows, ticker_metric  # noqa: E402
+from assetmonitor_core.portfolio import PortfolioIndex  # noqa: E402
+from assetmonitor_core.providers import (  # noqa: E402
+    ReplayProvider, record_fixtures, set_provider, synthesize_fixtures,
+)
+from assetmonitor_core.ranges import RANGES  # noqa: E402
+
+SECTORS_PER_CATEGORY = 10
+# 실제 포트폴리오처럼 여러 섹터에 겹치는 종목 비율과 한국 종목 비율
+OVERLAP_EVERY = 20
+KOREAN_EVERY = 8
+
+
+def make_portfolio(n_tickers, sector_size=5):
+    # 카테고리 > 섹터 > 종목 구조의 합성 포트폴리오 (행 수 = n_tickers)
+    names = [
+        f"{i:06d}.KS" if i % KOREAN_EVERY == 0 else f"T{i:04d}"
+        for i in range(n_tickers)
+    ]
+    # 일부 칸은 앞 섹터 종목을 다시 씀 (AMZN, MSFT 처럼 여러 섹터에 있는 종목)
+    for i in range(OVERLAP_EVERY, n_tickers, OVERLAP_EVERY):
+        names[i] = names[i - sector_size - 1]
+
+    portfolio = {}
+    for s, start in enumerate(range(0, n_tickers, sector_size)):
+        category = f"Category {s // SECTORS_PER_CATEGORY:02d}"
+        portfolio.setdefault(category, {})[f"Sector {s:03d}"] = names[start:start + sector_size]
+    return PortfolioIndex(portfolio)
+
+
+def run_treemap(hub, index, session_date, view_range):
+    intraday, reference = hub.snapshot(index.tickers, session_date, True, view_range)
+    df_tree = build_treemap_rows(index, intraday, reference, session_date, view_range)
+    payload = figure_bytes(create_treemap(df_tree, view_range.color_limit)) if not df_tree.empty else 0
+    return payload
+
+
+def run_charts(hub, index, session_date, view_range, cols=5):
+    intraday, ref_prices = hub.snapshot(index.tickers, session_date, True, view_range)
+    payload = 0
+    for sectors in index.portfolio.values():
+        for sector_tickers in sectors.values():
+            for ticker in sector_tickers:
+                ticker_metric(ticker, intraday.get(ticker, pd.DataFrame()), ref_prices,
+                              view_range=view_range, end_date=session_date)
+            figure = create_sector_chart(sector_tickers, intraday, cols=cols, multi_day=view_range.multi_day)
+            payload += figure_bytes(figure)
+    return payload
+
+
+def run_both(hub, index, session_date, view_range):
+    return run_treemap(hub, index, session_date, view_range) + run_charts(hub, index, session_date, view_range)
+
+
+def measure(provider, fn, *args):
+    calls, requested = provider.calls, provider.tickers_requested
+    start = time.perf_counter()
+    payload = fn(*args)
+    seconds = time.perf_counter() - start
+    return {
+        "seconds": seconds,
+        "calls": provider.calls - calls,
+        "tickers_requested": provider.tickers_requested - requested,
+        "payload_kb": payload / 1024,
+    }
+
+
+def peak_memory(fn, *args):
+    # tracemalloc 은 실행을 몇 배 느리게 하므로 시간 측정과 따로 한 번 더 돌림
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def fresh_state():
+    # 프로세스가 막 뜬 상태: 허브/증분 캐시 비우고 로컬 저장소도 빈 것으로
+    # (끝난 세션 / 기간 조회 봉은 저장소에 남으므로 그대로 두면 다음 단계 cold 가 upstream 을 부르지 않음)
+    get_intraday_cache().clear()
+    set_bar_store(BarStore(os.path.join(tempfile.mkdtemp(prefix="assetmonitor-bench-store-"), "bars.sqlite")))
+    return MarketDataHub()
+
+
+def last_fixture_session(provider, tickers):
+    for ticker in tickers:
+        df = provider.load(ticker, "5m")
+        if df is not None and not df.empty:
+            return df.index[-1].date()
+    return date.today()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="150,500,1000,2000",
+                        help="포트폴리오 행 수 (쉼표로 구분)")
+    parser.add_argument("--sector-size", type=int, default=5)
+    parser.add_argument("--ranges", default="1d", help="조회 기간 (쉼표로 구분: 1d,1w,1mo,3mo)")
+    parser.add_argument("--latency", type=float, default=0.05, help="요청 한 번당 지연(초)")
+    parser.add_argument("--latency-per-ticker", type=float, default=0.0, help="종목당 추가 지연(초)")
+    parser.add_argument("--fixtures", default=None,
+                        help="봉 파일 폴더 (기본 .cache/fixtures, 없는 종목은 합성해서 채움)")
+    parser.add_argument("--portfolio", action="append", default=None,
+                        help="합성 대신 잴 실제 포트폴리오 TOML (여러 번 지정 가능, --sizes 무시)")
+    parser.add_argument("--record", action="store_true",
+                        help="--portfolio 종목의 실제 봉을 upstream 에서 받아 봉 파일 폴더에 녹화한 뒤 측정")
+    parser.add_argument("--raw-figures", action="store_true", help="압축 figure 를 끄고 원래 방식으로 직렬화")
+    parser.add_argument("--no-memory", action="store_true", help="tracemalloc 없이 시간만 측정")
+    parser.add_argument("--json", default=None, help="결과를 JSON 으로 저장할 경로")
+    args = parser.parse_args()
+    if args.record and not args.portfolio:
+        # 합성 종목(T0001 ...)은 upstream 에 없으므로 녹화는 실제 포트폴리오로만
+        parser.error("--record 는 --portfolio 와 함께 써야 합니다")
+
+    charts.COMPACT_FIGURES = not args.raw_figures
+    view_ranges = [RANGES[key] for key in args.ranges.split(",") if key]
+    fixture_dir = args.fixtures or DEFAULT_FIXTURES
+    if args.portfolio:
+        portfolios = [PortfolioIndex.from_file(path) for path in args.portfolio]
+    else:
+        portfolios = [make_portfolio(int(s), args.sector_size) for s in args.sizes.split(",") if s]
+    all_tickers = list(dict.fromkeys(t for index in portfolios for t in index.tickers))
+
+    if args.record:
+        recorded = record_fixtures(all_tickers, fixture_dir)
+        print(f"recorded {len(recorded)} of {len(all_tickers)} tickers -> {fixture_dir}")
+    provider = ReplayProvider(fixture_dir, latency=args.latency, latency_per_ticker=args.latency_per_ticker)
+    missing = [t for t in all_tickers if provider.load(t, "5m") is None or provider.load(t, "60m") is None]
+    if missing:
+        print(f"synthesizing fixtures for {len(missing)} tickers -> {fixture_dir}")
+        synthesize_fixtures(missing, fixture_dir)
+        provider = ReplayProvider(fixture_dir, latency=args.latency, latency_per_ticker=args.latency_per_ticker)
+    # 파일 읽기는 측정에서 빼고, 벤치마크는 요청 예산 대기 없이 파이프라인만 잼
+    provider.preload(all_tickers)
+    set_provider(provider)
+    set_fetch_scheduler(FetchScheduler(bucket=TokenBucket(rate=1e9, capacity=1e9)))
+    session_date = last_fixture_session(provider, all_tickers)
+
+    results = []
+    for portfolio in portfolios:
+        n = len(portfolio.rows)
+        for view_range in view_ranges:
+            for stage, fn in (("treemap", run_treemap), ("charts", run_charts), ("both", run_both)):
+                hub = fresh_state()
+                stage_results = []
+                for run in ("cold", "warm"):
+                    result = measure(provider, fn, hub, portfolio, session_date, view_range)
+                    result.update(size=n, unique=len(portfolio.tickers), range=view_range.key, stage=stage, run=run)
+                    stage_results.append(result)
+
+                if not args.no_memory:
+                    hub = fresh_state()
+                    for result in stage_results:
+                        result["peak_mb"] = peak_memory(fn, hub, portfolio, session_date, view_range)
+                results.extend(stage_results)
+
+    print(f"session={session_date} latency={args.latency}s fixtures={fixture_dir} "
+          f"figures={'raw' if args.raw_figures else 'compact'}")
+    print(f"{'size':>6}{'unique':>8}  {'range':<6}{'stage':<9}{'run':<6}{'seconds':>9}{'calls':>7}"
+          f"{'tickers':>9}{'peak MB':>9}{'payload KB':>12}")
+    for r in results:
+        print(f"{r['size']:>6}{r['unique']:>8}  {r['range']:<6}{r['stage']:<9}{r['run']:<6}{r['seconds']:>9.3f}"
+              f"{r['calls']:>7}{r['tickers_requested']:>9}{r.get('peak_mb', 0):>9.1f}{r['payload_kb']:>12.0f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
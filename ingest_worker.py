@@ -0,0 +1,69 @@
+"""시세 수집 워커: upstream 수집을 도맡아 스냅샷 파일로 발행.
+
+화면 서버(app.py / Assetmonitor.py)를 여러 대 띄울 때 이 워커 하나만 시세를 받고,
+각 화면 프로세스는 ASSETMONITOR_SNAPSHOT_DIR 의 최신 스냅샷을 메모리 매핑으로 읽습니다.
+upstream 요청 수가 화면 서버 수와 상관없어집니다.
+
+포트폴리오 파일(기본: portfolios/*.toml 전부)의 종목을 합쳐 PREFETCH_INTERVAL 마다
+당일 분봉/일봉을 갱신하고 새 버전을 발행합니다. 파일이 바뀌면 다음 주기부터 반영합니다.
+
+    ASSETMONITOR_SNAPSHOT_DIR=/srv/snapshots python ingest_worker.py
+    python ingest_worker.py --out /srv/snapshots --portfolio portfolios/app.toml --interval 30
+    python ingest_worker.py --out /tmp/snapshots --once
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+from assetmonitor_core.instrumentation import get_registry, start_metrics_server
+from assetmonitor_core.portfolio import PORTFOLIO_DIR, portfolio_tickers
+from assetmonitor_core.prefetch import PREFETCH_INTERVAL, PrefetchScheduler
+from assetmonitor_core.snapshot_store import KEEP_VERSIONS, SNAPSHOT_DIR, SnapshotWriter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=SNAPSHOT_DIR, help="스냅샷 폴더 (기본 ASSETMONITOR_SNAPSHOT_DIR)")
+    parser.add_argument("--portfolio", action="append", default=None,
+                        help="포트폴리오 TOML (여러 번 지정 가능, 기본 portfolios/*.toml)")
+    parser.add_argument("--interval", type=float, default=PREFETCH_INTERVAL, help="갱신 주기(초)")
+    parser.add_argument("--keep", type=int, default=KEEP_VERSIONS, help="남겨 둘 지난 버전 수")
+    parser.add_argument("--once", action="store_true", help="한 번만 발행하고 끝내기")
+    args = parser.parse_args()
+    if not args.out:
+        parser.error("--out 또는 ASSETMONITOR_SNAPSHOT_DIR 가 필요합니다")
+
+    paths = args.portfolio or sorted(glob.glob(os.path.join(PORTFOLIO_DIR, "*.toml")))
+    writer = SnapshotWriter(args.out, keep=args.keep)
+    # 스레드로 돌리지 않고 갱신 함수만 씀 (증분 분봉 캐시 / 일봉 갱신 계획은 그대로)
+    scheduler = PrefetchScheduler(portfolio_tickers(paths), interval=args.interval)
+    start_metrics_server()
+    registry = get_registry()
+
+    while True:
+        started = time.perf_counter()
+        scheduler.set_tickers(portfolio_tickers(paths))
+        try:
+            snapshot = scheduler.refresh()
+            version = writer.publish(snapshot)
+        except Exception as e:
+            # 이번 주기는 건너뛰고 화면 쪽은 이전 버전을 계속 읽음
+            registry.inc("snapshot_publish_errors_total", help="Failed snapshot refresh/publish cycles")
+            print(f"publish failed: {e!r}", file=sys.stderr, flush=True)
+        else:
+            seconds = time.perf_counter() - started
+            registry.inc("snapshot_publish_total", help="Published snapshot versions")
+            registry.set("snapshot_version", version, help="Latest published snapshot version")
+            registry.observe("snapshot_publish_seconds", seconds, help="Refresh + publish time per cycle")
+            print(f"v{version} {snapshot.session_date} intraday={len(snapshot.intraday)} "
+                  f"daily={len(snapshot.daily)} {seconds:.2f}s", flush=True)
+
+        if args.once:
+            break
+        time.sleep(max(0.0, args.interval - (time.perf_counter() - started)))
+
+
+if __name__ == "__main__":
+    main()